@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Measure how long `import evelink` takes in a fresh interpreter.
+
+Each scenario runs in its own subprocess, so nothing is already in
+sys.modules. The 'eager' scenario imports every submodule, which is
+what `import evelink` used to do; the others show what a short script
+pays now that submodules and `requests` are imported on first use.
+
+Median times can be saved to a baseline and later compared against
+it; they are kept under 'import_times' in the same file as the parser
+benchmarks:
+
+    python benchmarks/import_time.py --save benchmarks/baseline.json
+    python benchmarks/import_time.py --compare benchmarks/baseline.json
+
+When comparing, the exit status is 1 if 'import evelink' (or another
+lazy scenario) got slower than the baseline by more than --tolerance.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+SCENARIOS = [
+    ('import evelink', 'import evelink'),
+    ('evelink.server only', 'import evelink; evelink.server.Server'),
+    ('eager (all submodules)',
+        'import evelink; import evelink.account, evelink.char, evelink.corp,'
+        ' evelink.eve, evelink.map, evelink.server\n'
+        'try:\n    import requests\nexcept ImportError:\n    pass'),
+]
+
+TIMER = """
+import time
+start = time.time()
+%s
+print(time.time() - start)
+"""
+
+
+def time_import(statement, runs):
+    """Return the sorted import times of 'statement' over 'runs' processes."""
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    times = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', TIMER % statement], env=env)
+        times.append(float(output.decode('ascii').strip()))
+    return sorted(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=20,
+        help="Number of fresh interpreters per scenario (default: 20)")
+    parser.add_argument('--save', metavar='PATH',
+        help="Write the medians to a baseline JSON file")
+    parser.add_argument('--compare', metavar='PATH',
+        help="Compare the medians to a baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+        help="Allowed fractional slowdown when comparing (default: 0.25)")
+    options = parser.parse_args()
+
+    baseline = {}
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f).get('import_times', {})
+
+    medians = {}
+    regressions = []
+    print("%-28s %10s %10s %10s" % ('scenario', 'median ms', 'min ms', 'vs base'))
+    for name, statement in SCENARIOS:
+        times = time_import(statement, options.runs)
+        median = medians[name] = times[len(times) // 2]
+        change = ''
+        if baseline.get(name):
+            ratio = median / baseline[name]
+            change = '%+.0f%%' % ((ratio - 1) * 100)
+            # The eager scenario is only there for comparison.
+            if ratio > 1 + options.tolerance and not name.startswith('eager'):
+                regressions.append(name)
+        print("%-28s %10.1f %10.1f %10s" % (
+            name, median * 1000, times[0] * 1000, change))
+
+    if options.save:
+        save_baseline(options.save, medians)
+
+    if regressions:
+        print("Slower than baseline: %s" % ', '.join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+def save_baseline(path, medians):
+    """Store the medians in a baseline file, keeping what else it holds."""
+    data = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    data['import_times'] = medians
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+if __name__ == '__main__':
+    main()
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""Benchmark the hot parsers against large synthetic responses.
+
+For each parser, a synthetic <result> is generated (see synthetic.py)
+and parsed into an ElementTree once; only the evelink parsing step is
+timed. Rows per second is the best of --repeat runs, and peak memory
+(Python 3.4+, via tracemalloc) is measured over one separate run,
+along with the memory the parsed result keeps once the tree is freed.
+
+With --xml-backend, each named backend (see evelink.xml_backends) is
+also timed end to end: building the tree from the raw XML, then the
+parsing step.
+
+Results can be saved as a baseline and later compared against it:
+
+    python benchmarks/parsers.py --save benchmarks/baseline.json
+    python benchmarks/parsers.py --compare benchmarks/baseline.json
+
+When comparing, the exit status is 1 if any parser got slower than
+the baseline by more than --tolerance.
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from xml.etree import ElementTree
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import evelink
+from evelink import api
+from evelink import xml_backends
+from evelink.parsing.assets import parse_assets
+from evelink.parsing.kills import parse_kills
+from evelink.parsing.wallet_journal import parse_wallet_journal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import synthetic
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+def _api_result(elem):
+    return api.APIResult(elem, 0, 0)
+
+
+def wallet_journal(scale):
+    rows = int(100000 * scale)
+    return rows, synthetic.wallet_journal(rows), parse_wallet_journal
+
+
+def assets(scale):
+    xml, rows = synthetic.assets(int(200 * scale) or 1, depth=3, width=6)
+    return rows, xml, parse_assets
+
+
+def kills(scale):
+    attackers = int(10000 * scale) or 1
+    items = int(2000 * scale) or 1
+    return attackers + items, synthetic.kills(1, attackers, items), parse_kills
+
+
+def corp_members(scale):
+    rows = int(20000 * scale)
+    corp = evelink.corp.Corp(api=api.API())
+    return (rows, synthetic.member_tracking(rows),
+            lambda elem: corp.members(api_result=_api_result(elem)))
+
+
+def skill_tree(scale):
+    groups = int(40 * scale) or 1
+    skills = 50
+    eve = evelink.eve.EVE(api=api.API())
+    return (groups * skills, synthetic.skill_tree(groups, skills),
+            lambda elem: eve.skill_tree(api_result=_api_result(elem)))
+
+
+BENCHMARKS = [
+    ('parse_wallet_journal', wallet_journal),
+    ('parse_assets', assets),
+    ('parse_kills', kills),
+    ('Corp.members', corp_members),
+    ('EVE.skill_tree', skill_tree),
+]
+
+
+def run(setup, scale, repeat, backend=None):
+    rows, xml, parse = setup(scale)
+    if backend is None:
+        elem = ElementTree.fromstring(xml)
+        func = lambda: parse(elem)
+    else:
+        func = lambda: parse(backend.fromstring(xml))
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = retained = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        # What the result alone keeps alive once the tree is gone.
+        api.string_pool.clear()
+        tracemalloc.start()
+        result = parse(ElementTree.fromstring(xml))
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+
+    return {
+        'rows': rows,
+        'seconds': best,
+        'rows_per_sec': rows / best if best else None,
+        'peak_bytes': peak,
+        'retained_bytes': retained,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-s', '--scale', type=float, default=1.0,
+        help="Multiply the default fixture sizes by this (default: 1.0)")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+        help="Timed runs per parser; the best is kept (default: 3)")
+    parser.add_argument('-o', '--only', action='append', metavar='NAME',
+        help="Only run the named benchmark (may be repeated)")
+    parser.add_argument('-x', '--xml-backend', action='append', metavar='NAME',
+        help="Also time parsing the raw XML with this backend; may be "
+             "repeated, or 'all' for every available backend")
+    parser.add_argument('--save', metavar='PATH',
+        help="Write the results to a baseline JSON file")
+    parser.add_argument('--compare', metavar='PATH',
+        help="Compare the results to a baseline JSON file")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+        help="Allowed fractional slowdown when comparing (default: 0.25)")
+    options = parser.parse_args()
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)
+        if baseline['scale'] != options.scale:
+            print("Note: the baseline was recorded at scale %s" % baseline['scale'],
+                file=sys.stderr)
+        baseline = baseline['results']
+
+    backends = options.xml_backend or []
+    if 'all' in backends:
+        backends = xml_backends.available_backends()
+    backends = [xml_backends.get_backend(b) for b in backends]
+
+    runs = []
+    for name, setup in BENCHMARKS:
+        if options.only and name not in options.only:
+            continue
+        runs.append((name, setup, None))
+        for backend in backends:
+            runs.append(('%s [%s]' % (name, backend.name), setup, backend))
+
+    results = {}
+    regressions = []
+    print("%-30s %9s %12s %10s %10s %10s" % (
+        'parser', 'rows', 'rows/sec', 'peak MiB', 'kept MiB', 'vs base'))
+    for name, setup, backend in runs:
+        result = results[name] = run(setup, options.scale, options.repeat, backend)
+
+        peak, kept = [
+            '-' if result[k] is None else '%.1f' % (result[k] / 1048576.0)
+            for k in ('peak_bytes', 'retained_bytes')]
+        change = ''
+        if baseline and name in baseline and baseline[name]['rows_per_sec']:
+            ratio = result['rows_per_sec'] / baseline[name]['rows_per_sec']
+            change = '%+.0f%%' % ((ratio - 1) * 100)
+            if ratio < 1 - options.tolerance:
+                regressions.append(name)
+        print("%-30s %9d %12.0f %10s %10s %10s" % (
+            name, result['rows'], result['rows_per_sec'], peak, kept, change))
+
+    if options.save:
+        # Keep anything else in the file, e.g. import_time.py's results.
+        data = {}
+        if os.path.exists(options.save):
+            with open(options.save) as f:
+                data = json.load(f)
+        data.update({
+            'python': sys.version.split()[0],
+            'scale': options.scale,
+            'results': results,
+        })
+        with open(options.save, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if regressions:
+        print("Slower than baseline: %s" % ', '.join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,165 @@
+"""Generators for large, realistic synthetic EVE API responses.
+
+Each function returns the XML of a <result> element, shaped like the
+corresponding fixture in tests/xml but with a configurable size. The
+output is deterministic for a given size and seed.
+"""
+
+import random
+
+_NAMES = ['Pilot', 'Trader', 'Miner', 'Hauler', 'Scout', 'Director']
+_CORPS = ['Starbase Anchoring Corp', 'Inkblot Squad', 'Corp Stuff']
+_ALLIANCES = ['EVE Gurus', 'Authorities of EVE', '']
+
+
+def _ts(rng):
+    return '2013-%02d-%02d %02d:%02d:%02d' % (
+        rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 23),
+        rng.randint(0, 59), rng.randint(0, 59))
+
+
+def _name(rng):
+    return '%s %d' % (rng.choice(_NAMES), rng.randint(1, 100000))
+
+
+def wallet_journal(rows, seed=0):
+    """A wallet journal with 'rows' entries."""
+    rng = random.Random(seed)
+    out = ['<result>\n  <rowset name="entries" key="refID">\n']
+    for i in range(rows):
+        out.append(
+            '    <row date="%s" refID="%d" refTypeID="%d" ownerName1="%s"'
+            ' ownerID1="%d" ownerName2="%s" ownerID2="%d" argName1="%d"'
+            ' argID1="0" amount="%.2f" balance="%.2f" reason="" taxReceiverID="%s"'
+            ' taxAmount="%s" owner1TypeID="2" owner2TypeID="1378" />\n' % (
+                _ts(rng), 3605306236 + i, rng.choice([1, 10, 37, 72, 85]),
+                _name(rng), rng.randint(90000000, 99999999),
+                rng.choice(_CORPS), rng.randint(1000000, 1999999),
+                rng.randint(1, 40000000), rng.uniform(-1e7, 1e7),
+                rng.uniform(0, 1e10),
+                rng.choice(['', '1000132']), rng.choice(['', '%.2f' % rng.uniform(0, 1e5)])))
+    out.append('  </rowset>\n</result>\n')
+    return ''.join(out)
+
+
+def assets(locations, depth, width, seed=0):
+    """An asset list with containers nested 'depth' levels deep.
+
+    Each of the 'locations' top-level items holds 'width' items, each
+    of which holds 'width' more, and so on. Returns (xml, item count).
+    """
+    rng = random.Random(seed)
+    counter = [0]
+
+    def rows(level, indent):
+        out = []
+        for _ in range(width if level else locations):
+            counter[0] += 1
+            attrs = 'itemID="%d" typeID="%d" quantity="%d" flag="%d" singleton="%d"' % (
+                counter[0], rng.randint(1, 30000), rng.randint(1, 1000),
+                rng.randint(0, 120), rng.randint(0, 1))
+            if level == 0:
+                attrs += ' locationID="%d"' % rng.randint(60000000, 60015000)
+            if level < depth:
+                out.append('%s<row %s>\n%s  <rowset name="contents" key="itemID">\n' % (
+                    indent, attrs, indent))
+                out.extend(rows(level + 1, indent + '    '))
+                out.append('%s  </rowset>\n%s</row>\n' % (indent, indent))
+            else:
+                out.append('%s<row %s />\n' % (indent, attrs))
+        return out
+
+    body = rows(0, '    ')
+    xml = ('<result>\n  <rowset name="assets" key="itemID">\n%s  </rowset>\n</result>\n'
+           % ''.join(body))
+    return xml, counter[0]
+
+
+def _character_attrs(rng):
+    return ('characterID="%d" characterName="%s" corporationID="%d"'
+            ' corporationName="%s" allianceID="%d" allianceName="%s"'
+            ' factionID="0" factionName=""' % (
+                rng.randint(90000000, 99999999), _name(rng),
+                rng.randint(1000000, 1999999), rng.choice(_CORPS),
+                rng.randint(99000000, 99009999), rng.choice(_ALLIANCES)))
+
+
+def kills(count, attackers, items, seed=0):
+    """A kill log of 'count' kills with 'attackers' and 'items' each."""
+    rng = random.Random(seed)
+    out = ['<result>\n  <rowset name="kills" key="killID">\n']
+    for i in range(count):
+        out.append('    <row killID="%d" solarSystemID="%d" killTime="%s" moonID="0">\n' % (
+            15640551 + i, rng.randint(30000001, 30005000), _ts(rng)))
+        out.append('      <victim %s damageTaken="%d" shipTypeID="%d" x="%f" y="%f" z="%f" />\n' % (
+            _character_attrs(rng), rng.randint(1, 100000), rng.randint(500, 30000),
+            rng.uniform(-1e12, 1e12), rng.uniform(-1e12, 1e12), rng.uniform(-1e12, 1e12)))
+        out.append('      <rowset name="attackers" columns="characterID">\n')
+        for _ in range(attackers):
+            out.append('        <row %s securityStatus="%f" damageDone="%d" finalBlow="0"'
+                       ' weaponTypeID="%d" shipTypeID="%d" />\n' % (
+                           _character_attrs(rng), rng.uniform(-10, 5),
+                           rng.randint(0, 10000), rng.randint(500, 30000),
+                           rng.randint(500, 30000)))
+        out.append('      </rowset>\n      <rowset name="items" columns="typeID">\n')
+        for _ in range(items):
+            out.append('        <row typeID="%d" flag="%d" qtyDropped="%d" qtyDestroyed="%d"'
+                       ' singleton="0" />\n' % (
+                           rng.randint(1, 30000), rng.randint(0, 120),
+                           rng.randint(0, 5), rng.randint(0, 5)))
+        out.append('      </rowset>\n    </row>\n')
+    out.append('  </rowset>\n</result>\n')
+    return ''.join(out)
+
+
+def member_tracking(rows, seed=0):
+    """Extended corporation member tracking with 'rows' members."""
+    rng = random.Random(seed)
+    out = ['<result>\n  <rowset name="members" key="characterID">\n']
+    for i in range(rows):
+        out.append(
+            '    <row characterID="%d" name="%s" startDateTime="%s" baseID="0"'
+            ' base="" title="" logonDateTime="%s" logoffDateTime="%s"'
+            ' locationID="%d" location="Station %d" shipTypeID="%d"'
+            ' shipType="Ship %d" roles="%d" grantableRoles="0" />\n' % (
+                90000000 + i, _name(rng), _ts(rng), _ts(rng), _ts(rng),
+                rng.randint(60000000, 60015000), i % 200, rng.randint(-1, 30000),
+                i % 50, rng.choice([0, 1, 128, 2048])))
+    out.append('  </rowset>\n</result>\n')
+    return ''.join(out)
+
+
+def skill_tree(groups, skills, seed=0):
+    """A skill tree with 'groups' groups of 'skills' skills each."""
+    rng = random.Random(seed)
+    out = ['<result>\n  <rowset name="skillGroups" key="groupID">\n']
+    type_id = 3300
+    for g in range(groups):
+        group_id = 250 + g
+        out.append('    <row groupID="%d" groupName="Group %d">\n'
+                   '      <rowset name="skills" key="typeID">\n' % (group_id, g))
+        for _ in range(skills):
+            out.append('        <row groupID="%d" published="1" typeID="%d" typeName="Skill %d">\n'
+                       '          <description>Synthetic skill %d.</description>\n'
+                       '          <rank>%d</rank>\n'
+                       '          <rowset name="requiredSkills" key="typeID">\n' % (
+                           group_id, type_id, type_id, type_id, rng.randint(1, 16)))
+            for _ in range(rng.randint(0, 3)):
+                out.append('            <row skillLevel="%d" typeID="%d" />\n' % (
+                    rng.randint(1, 5), rng.randint(3300, type_id)))
+            out.append('          </rowset>\n'
+                       '          <requiredAttributes>\n'
+                       '            <primaryAttribute>memory</primaryAttribute>\n'
+                       '            <secondaryAttribute>intelligence</secondaryAttribute>\n'
+                       '          </requiredAttributes>\n'
+                       '          <rowset name="skillBonusCollection" key="bonusType">\n'
+                       '            <row bonusType="bonus%d" bonusValue="%d" />\n'
+                       '          </rowset>\n'
+                       '        </row>\n' % (rng.randint(0, 50), rng.randint(1, 10)))
+            type_id += 1
+        out.append('      </rowset>\n    </row>\n')
+    out.append('  </rowset>\n</result>\n')
+    return ''.join(out)
+
+
+# vim: set ts=4 sts=4 sw=4 et:
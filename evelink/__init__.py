@@ -1,18 +1,44 @@
 """EVELink - Python bindings for the EVE API."""
 
+import importlib
 import logging
+import sys
 
-from evelink import account
 from evelink import api
-from evelink import char
-from evelink import constants
-from evelink import corp
-from evelink import eve
-from evelink import map
-from evelink import server
 
 __version__ = "0.7.3"
 
+# Submodules that are available as attributes of the package. On Python
+# 3.7+ they are only imported on first access, so that e.g. a script
+# making one server.Server call doesn't pay for importing char and corp.
+_SUBMODULES = (
+    "account",
+    "char",
+    "constants",
+    "corp",
+    "eve",
+    "map",
+    "parsing",
+    "server",
+)
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name in _SUBMODULES:
+            return importlib.import_module('evelink.%s' % name)
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_SUBMODULES))
+else:
+    from evelink import account
+    from evelink import char
+    from evelink import constants
+    from evelink import corp
+    from evelink import eve
+    from evelink import map
+    from evelink import server
+
 # Implement NullHandler because it was only added in Python 2.7+.
 class NullHandler(logging.Handler):
     def emit(self, record):
@@ -1,26 +1,21 @@
 import calendar
 import collections
+import copy
 import functools
 import zlib
 import inspect
 import logging
 import re
+import sys
+import threading
 import time
 import hashlib
-from xml.etree import ElementTree
 
 from evelink.thirdparty import six
 from evelink.thirdparty.six.moves import urllib
 
 _log = logging.getLogger('evelink.api')
 
-# Python 2.6's ElementTree raises xml.parsers.expat.ExpatError instead
-# of ElementTree.ParseError
-_xml_error = getattr(ElementTree, 'ParseError', None)
-if _xml_error is None:
-    import xml.parsers.expat
-    _xml_error = xml.parsers.expat.ExpatError
-
 # Allows zlib.decompress to decompress gzip-compressed strings as well.
 # From zlib.h header file, not documented in Python.
 ZLIB_DECODE_AUTO = 32 + zlib.MAX_WBITS
@@ -35,15 +30,42 @@ _user_agent = None
 # cache instance for all API instances. Note: instance, not class.
 default_cache = None
 
+# Can be set to an APIStore instance that is used as a shared default
+# permanent store for all API instances.
+default_store = None
+
+# Can be set to an evelink.metrics.Metrics instance that is used as a
+# shared default for all API instances.
+default_metrics = None
+
+# Can be set to the name of an evelink.xml_backends backend (or a backend
+# instance) that is used by default to parse API responses.
+default_xml_backend = None
+
 # The timeout to use for API HTTP requests, in seconds (default 1 minute).
 http_request_timeout = 60
 
-try:
-    import requests
-    _has_requests = True
-except ImportError:
+def _find_requests():
+    """Check whether `requests` is installed, without importing it.
+
+    `requests` is slow to import, so it is only imported on the first
+    request that uses it.
+    """
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        # Python 2
+        import imp
+        try:
+            imp.find_module('requests')
+        except ImportError:
+            return None
+        return True
+    return True if find_spec('requests') is not None else None
+
+_has_requests = _find_requests()
+if not _has_requests:
     _log.info('`requests` not available, falling back to urllib2')
-    _has_requests = None
 
 def _clean(v):
     """Convert parameters into an acceptable format for the API."""
@@ -52,6 +74,15 @@ def _clean(v):
     else:
         return str(v)
 
+def _is_instance(obj, module, name):
+    """isinstance(obj, evelink.<module>.<name>), without importing the module.
+
+    The optional modules (metrics, parsepool, slowcalls) are only
+    imported when used, and obj cannot be one of their classes before.
+    """
+    module = sys.modules.get('evelink.%s' % module)
+    return module is not None and isinstance(obj, getattr(module, name))
+
 def decompress(s):
     """Decode a gzip compressed string."""
     return zlib.decompress(s, ZLIB_DECODE_AUTO)
@@ -66,6 +97,44 @@ def parse_ts(v):
     return ts if ts > 0 else None
 
 
+class StringPool(object):
+    """A bounded pool of shared string objects.
+
+    Parsed results repeat the same corporation, alliance, system and
+    type names across thousands of rows, and each occurrence is a
+    separate string object. Passing them through intern() makes equal
+    strings share one object, so large results kept around take less
+    memory. Unlike sys.intern(), this works for unicode strings on
+    Python 2, and the pool never holds more than max_size strings:
+    when it is full it starts over, which only means that strings
+    seen after that are shared with a new generation.
+    """
+
+    def __init__(self, max_size=50000):
+        self.max_size = max_size
+        self._strings = {}
+
+    def intern(self, s):
+        strings = self._strings
+        try:
+            return strings[s]
+        except KeyError:
+            if len(strings) >= self.max_size:
+                strings = self._strings = {}
+            # setdefault keeps this safe to share between threads.
+            return strings.setdefault(s, s)
+
+    def clear(self):
+        self._strings = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+
+# The pool used by the parsers for names repeated across rows.
+string_pool = StringPool()
+
+
 def get_named_value(elem, field):
     """Returns the string value of the named child element."""
     try:
@@ -168,10 +237,12 @@ class APICache(object):
     This very basic implementation simply stores values in
     memory, with no other persistence. You can subclass it
     to define a more complex/featureful/persistent cache.
+    It is safe to share between threads.
     """
 
     def __init__(self):
         self.cache = {}
+        self._cache_lock = threading.Lock()
 
     def get(self, key):
         """Return the value referred to by 'key' if it is cached.
@@ -179,13 +250,14 @@ class APICache(object):
         key:
             a string hash key
         """
-        result = self.cache.get(key)
-        if not result:
-            return None
-        value, expiration = result
-        if expiration < time.time():
-            del self.cache[key]
-            return None
+        with self._cache_lock:
+            result = self.cache.get(key)
+            if not result:
+                return None
+            value, expiration = result
+            if expiration < time.time():
+                self.cache.pop(key, None)
+                return None
         return value
 
     def put(self, key, value, duration):
@@ -199,7 +271,59 @@ class APICache(object):
             a number of seconds before this cache entry should expire.
         """
         expiration = time.time() + duration
-        self.cache[key] = (value, expiration)
+        with self._cache_lock:
+            self.cache[key] = (value, expiration)
+
+
+class APIStore(object):
+    """Minimal interface for permanently storing immutable API data.
+
+    Some API payloads (mail bodies, notification texts, contract items,
+    killmails) never change once they exist, so unlike APICache entries
+    they are kept forever, keyed by a namespace and the entity ID.
+
+    This very basic implementation simply stores values in
+    memory, with no other persistence. You can subclass it
+    to define a more complex/featureful/persistent store.
+    """
+
+    def __init__(self):
+        self.store = {}
+
+    def _key(self, namespace, entity_id):
+        # Shelve only accepts string keys.
+        return '%s-%s' % (namespace, entity_id)
+
+    def get(self, namespace, entity_id):
+        """Return the value stored for 'entity_id', or None.
+
+        namespace:
+            a string naming the kind of data, e.g. 'mail_bodies'
+        entity_id:
+            the ID of the stored entity
+        """
+        return self.store.get(self._key(namespace, entity_id))
+
+    def get_many(self, namespace, entity_ids):
+        """Return a dict of the stored values for any of 'entity_ids'.
+
+        IDs with no stored value are omitted from the result.
+        """
+        results = {}
+        for entity_id in entity_ids:
+            value = self.get(namespace, entity_id)
+            if value is not None:
+                results[entity_id] = value
+        return results
+
+    def put(self, namespace, entity_id, value):
+        """Permanently store the provided value for 'entity_id'."""
+        self.store[self._key(namespace, entity_id)] = value
+
+    def put_many(self, namespace, values):
+        """Permanently store a dict of entity IDs to values."""
+        for entity_id, value in values.items():
+            self.put(namespace, entity_id, value)
 
 
 APIResult = collections.namedtuple("APIResult", [
@@ -210,9 +334,19 @@ APIResult = collections.namedtuple("APIResult", [
 
 
 class API(object):
-    """A wrapper around the EVE API."""
+    """A wrapper around the EVE API.
+
+    A single API instance can be shared by many threads. The cache
+    and the HTTP session are shared, and all per-call metadata is
+    returned with each call, in the APIResult (or APIError) timestamps.
+    last_timestamps only reflects the latest call made by the current
+    thread. The cache and store in use must be thread-safe themselves.
+    The in-memory and sqlite ones are.
+    """
 
-    def __init__(self, base_url="api.eveonline.com", cache=None, api_key=None, user_agent=None):
+    def __init__(self, base_url="api.eveonline.com", cache=None, api_key=None, user_agent=None,
+                 store=None, metrics=None, slow_calls=None, xml_backend=None,
+                 parse_pool=None):
         self.base_url = base_url
         self.user_agent = _user_agent
 
@@ -225,77 +359,238 @@ class API(object):
         self.cache = cache
         self.CACHE_VERSION = '1'
 
+        # Unlike the cache, there is no store unless one is provided.
+        store = store or default_store
+        if store is not None and not isinstance(store, APIStore):
+            raise ValueError("The provided store must subclass from APIStore.")
+        self.store = store
+
+        # These modules are imported here rather than with evelink.api,
+        # to keep `import evelink` quick for scripts.
+        from evelink import metrics as evelink_metrics
+        from evelink import xml_backends
+
+        metrics = metrics or default_metrics or evelink_metrics.NULL_METRICS
+        if not isinstance(metrics, evelink_metrics.Metrics):
+            raise ValueError("The provided metrics must be an evelink.metrics.Metrics.")
+        self.metrics = metrics
+
+        # An optional evelink.slowcalls.SlowCallRecorder.
+        if slow_calls is not None:
+            from evelink import slowcalls
+            if not isinstance(slow_calls, slowcalls.SlowCallRecorder):
+                raise ValueError("The provided slow_calls must be a SlowCallRecorder.")
+        self.slow_calls = slow_calls
+
+        # 'etree' (the default), 'lxml' or 'expat', or a backend; see
+        # evelink.xml_backends.
+        self.xml_backend = xml_backends.get_backend(xml_backend or default_xml_backend)
+
+        # An optional evelink.parsepool.ParsePool for large responses.
+        if parse_pool is not None:
+            from evelink import parsepool
+            if not isinstance(parse_pool, parsepool.ParsePool):
+                raise ValueError("The provided parse_pool must be a ParsePool.")
+        self.parse_pool = parse_pool
+
         if api_key and len(api_key) != 2:
             raise ValueError("The provided API key must be a tuple of (keyID, vCode).")
         self.api_key = api_key
-        self._set_last_timestamps()
+        self._local = threading.local()
+        self._session_lock = threading.Lock()
 
-    def _set_last_timestamps(self, current_time=0, cached_until=0):
-        self.last_timestamps = {
+    def clone(self, api_key=None):
+        """Return a copy of this API that uses another API key.
+
+        The copy shares the cache, store, metrics, slow call recorder,
+        XML backend and parse pool, but has its own HTTP session and
+        last_timestamps.
+        """
+        if api_key and len(api_key) != 2:
+            raise ValueError("The provided API key must be a tuple of (keyID, vCode).")
+        api = copy.copy(self)
+        api.api_key = api_key
+        api._local = threading.local()
+        api._session_lock = threading.Lock()
+        api.__dict__.pop('session', None)
+        return api
+
+    @property
+    def last_timestamps(self):
+        """The timestamps of the latest call made from the current thread."""
+        return getattr(self._local, 'last_timestamps', {
+            'current_time': 0,
+            'cached_until': 0,
+        })
+
+    @property
+    def last_cached(self):
+        """Whether the latest call from the current thread hit the cache."""
+        return getattr(self._local, 'last_cached', False)
+
+    def _set_last_timestamps(self, current_time=0, cached_until=0, cached=False):
+        self._local.last_timestamps = {
             'current_time': current_time,
             'cached_until': cached_until,
         }
+        self._local.last_cached = cached
 
     def _cache_key(self, path, params):
         sorted_params = sorted(params.items())
         # Paradoxically, Shelve doesn't like integer keys.
         return '%s-%s' % (self.CACHE_VERSION, hashlib.sha1(str([path,sorted_params]).encode("utf-8")).hexdigest())
 
-    def get(self, path, params=None):
+    def _prepare_params(self, params):
+        """Clean request parameters and add the API key, if any."""
+        params = params or {}
+        params = dict((k, _clean(v)) for k,v in params.items())
+        if self.api_key:
+            params['keyID'] = self.api_key[0]
+            params['vCode'] = self.api_key[1]
+        return params
+
+    def request_key(self, path, params=None):
+        """Return the cache key that get() would use for a request."""
+        return self._cache_key(path, self._prepare_params(params))
+
+    def get(self, path, params=None, parser=None):
         """Request a specific path from the EVE API.
 
         The supplied path should be a slash-separated path
         frament, e.g. "corp/AssetList". (Basically, the portion
         of the API url in between the root / and the .xml bit.)
+
+        If a parser is supplied, the APIResult holds parser(<result>)
+        rather than the <result> element itself, and large responses
+        may be parsed in this API's parse_pool.
         """
+        return self.get_response(path, params, parser)[1]
 
-        params = params or {}
-        params = dict((k, _clean(v)) for k,v in params.items())
+    def get_response(self, path, params=None, parser=None):
+        """Like get(), but return a (raw response, APIResult) tuple."""
 
-        _log.debug("Calling %s with params=%r", path, params)
-        if self.api_key:
-            _log.debug("keyID and vCode added")
-            params['keyID'] = self.api_key[0]
-            params['vCode'] = self.api_key[1]
+        response, tree, current_time, expires_time = self.fetch(path, params,
+            parser=parser)
 
+        if _is_instance(tree, 'parsepool', 'ParsedResponse'):
+            error, result = tree.error, tree.result
+        else:
+            error = tree.find('error')
+            if error is not None:
+                error = (error.attrib['code'], error.text.strip())
+            else:
+                result = tree.find('result')
+                if parser is not None:
+                    with self.metrics.timer('method', path):
+                        result = parser(result)
+
+        if error is not None:
+            exc = APIError(error[0], error[1], current_time, expires_time)
+            _log.debug("Raising API error: %r" % exc)
+            raise exc
+
+        return response, APIResult(result, current_time, expires_time)
+
+    def full_path(self, path):
+        """Return the URL for an API path.
+
+        base_url may include a scheme, e.g. "http://localhost:8080" to
+        use an `evelink serve` proxy; otherwise HTTPS is used.
+        """
+        if '://' in self.base_url:
+            return "%s/%s.xml.aspx" % (self.base_url.rstrip('/'), path)
+        return "https://%s/%s.xml.aspx" % (self.base_url, path)
+
+    def fetch(self, path, params=None, parser=None):
+        """Return the raw XML for a request, from the cache if possible.
+
+        Unlike get(), this does not raise APIErrors; error responses
+        are returned (and cached) like any other. Returns a (response,
+        tree, current_time, expires_time) tuple.
+
+        If a parser is supplied and the response is large enough for
+        the parse_pool, the response is parsed by a worker process and
+        'tree' is a parsepool.ParsedResponse instead.
+        """
+        params = self._prepare_params(params)
+        _log.debug("Calling %s with params=%r", path, params)
         key = self._cache_key(path, params)
-        response = self.cache.get(key)
-        cached = response is not None
 
-        if not cached:
-            # no cached response body found, call the API for one.
-            full_path = "https://%s/%s.xml.aspx" % (self.base_url, path)
-            response, robj = self.send_request(full_path, params)
-        else:
+        metrics = self.metrics
+        with metrics.request(path):
+            response, robj, cached = self._load_response(key, path, params)
+
+            pool = self.parse_pool if parser is not None else None
+            errors = self.xml_backend.errors + (pool.errors if pool else ())
+            try:
+                if pool is not None and pool.offloads(response):
+                    # The worker runs the method's parser as well as
+                    # building the tree, so it all counts as 'method'.
+                    with metrics.timer('method'):
+                        tree = pool.parse(response, parser)
+                else:
+                    with metrics.timer('parse'):
+                        tree = self.xml_backend.fromstring(response)
+            except errors as e:
+                # If this is due to an HTTP error, raise the HTTP error
+                if robj is not None:
+                    self.maybe_raise_http_error(robj)
+                # otherwise, raise the parse error
+                raise e
+
+            if _is_instance(tree, 'parsepool', 'ParsedResponse'):
+                current_time, expires_time = tree.current_time, tree.expires_time
+            else:
+                current_time = get_ts_value(tree, 'currentTime')
+                expires_time = get_ts_value(tree, 'cachedUntil')
+            self.cache_response(key, response, cached, current_time, expires_time)
+
+        return response, tree, current_time, expires_time
+
+    def load_response(self, path, params=None):
+        """Return the raw response for a request, from the cache if possible.
+
+        Returns a (response, robj, cached) tuple, where robj is the
+        HTTP response object (None when cached). Once the response is
+        parsed, its timestamps must be passed to cache_response(), with
+        request_key(path, params) as the key.
+        """
+        params = self._prepare_params(params)
+        return self._load_response(self._cache_key(path, params), path, params)
+
+    def _load_response(self, key, path, params):
+        metrics = self.metrics
+        with metrics.timer('cache'):
+            response = self.cache.get(key)
+        if response is not None:
             _log.debug("Cache hit, returning cached payload")
+            return response, None, True
 
-        try:
-            tree = ElementTree.fromstring(response)
-        except _xml_error as e:
-            # If this is due to an HTTP error, raise the HTTP error
-            self.maybe_raise_http_error(robj)
-            # otherwise, raise the parse error
-            raise e
+        # no cached response body found, call the API for one.
+        metrics.incr('cache_miss')
+        with metrics.timer('network'):
+            response, robj = self.send_request(self.full_path(path), params)
+        return response, robj, False
 
-        current_time = get_ts_value(tree, 'currentTime')
-        expires_time = get_ts_value(tree, 'cachedUntil')
-        self._set_last_timestamps(current_time, expires_time)
+    def cache_response(self, key, response, cached, current_time, expires_time):
+        """Cache a response from load_response() once its timestamps are known.
 
+        The timestamps also become this thread's last_timestamps.
+        """
+        self._set_last_timestamps(current_time, expires_time, cached)
+
+        metrics = self.metrics
         if not cached:
-            # Have to split this up from above as timestamps have to be
+            # Have to split this up from loading as timestamps have to be
             # extracted.
-            self.cache.put(key, response, expires_time - current_time)
-
-        error = tree.find('error')
-        if error is not None:
-            code = error.attrib['code']
-            message = error.text.strip()
-            exc = APIError(code, message, current_time, expires_time)
-            _log.debug("Raising API error: %r" % exc)
-            raise exc
-
-        result = tree.find('result')
-        return APIResult(result, current_time, expires_time)
+            with metrics.timer('cache'):
+                self.cache.put(key, response, expires_time - current_time)
+        elif expires_time < time.time():
+            # The cache kept the payload past its cachedUntil, e.g.
+            # because of clock skew between us and the API server.
+            metrics.incr('cache_stale')
+        else:
+            metrics.incr('cache_hit')
 
     def maybe_raise_http_error(self, response):
         """Called if a XML parse error is raised for the response.
@@ -325,8 +620,9 @@ class API(object):
             if params:
                 # POST request
                 _log.debug("POSTing request")
-                params = urllib.parse.urlencode(params)
-                req = urllib.request.Request(full_path, data=params.encode())
+                params = urllib.parse.urlencode(params).encode()
+                self.metrics.incr('bytes_out', len(params))
+                req = urllib.request.Request(full_path, data=params)
             else:
                 # GET request
                 req = urllib.request.Request(full_path)
@@ -345,19 +641,25 @@ class API(object):
             raise e
 
         try:
+            response = r.read()
+            self.metrics.incr('bytes_in', len(response))
             if r.info().get('Content-Encoding') == 'gzip':
-                return decompress(r.read()), r
-            else:
-                return r.read(), r
+                with self.metrics.timer('decompress'):
+                    response = decompress(response)
+            return response, r
         finally:
             r.close()
 
     def requests_request(self, full_path, params):
+        import requests
         session = getattr(self, 'session', None)
         if not session:
-            session = requests.Session()
-            session.headers.update({'User-Agent': self.user_agent})
-            self.session = session
+            with self._session_lock:
+                session = getattr(self, 'session', None)
+                if not session:
+                    session = requests.Session()
+                    session.headers.update({'User-Agent': self.user_agent})
+                    self.session = session
 
         try:
             if params:
@@ -369,12 +671,36 @@ class API(object):
                 _log.debug("GETting request")
                 r = session.get(full_path, timeout=http_request_timeout)
             _log.debug("Response status code: %s" % r.status_code)
+            # requests decompresses the body itself, so its time is
+            # part of 'network' and the size is the decompressed one.
+            if params:
+                self.metrics.incr('bytes_out', len(urllib.parse.urlencode(params)))
+            self.metrics.incr('bytes_in', len(r.content))
             return r.content, r
         except requests.exceptions.RequestException as e:
             # TODO: Handle this better?
             raise e
 
 
+def map_concurrently(func, items, max_workers=4):
+    """Return [func(item) for item in items], running calls on a thread pool.
+
+    Uses concurrent.futures (the `futures` backport on Python 2) when it
+    is available, and falls back to calling func serially otherwise.
+    """
+    items = list(items)
+    if max_workers > 1 and len(items) > 1:
+        try:
+            from concurrent import futures
+        except ImportError:
+            _log.info('`futures` not available, running calls serially')
+        else:
+            workers = min(max_workers, len(items))
+            with futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(func, items))
+    return [func(item) for item in items]
+
+
 def auto_api(func):
     """A decorator to automatically provide an API instance.
 
@@ -462,9 +788,15 @@ class auto_call(object):
     paramater name. They will be added to 'evelink.api._args_map' to
     translate argument names to parameter names.
 
+    - 'parser': optional module-level function turning the <result>
+    element into the method's result. The method is then called with
+    an api_result holding the parsed result rather than the element.
+    When the api has a 'parse_pool', large responses are parsed in a
+    worker process.
+
     """
 
-    def __init__(self, path, prop_to_param=tuple(), map_params=None):
+    def __init__(self, path, prop_to_param=tuple(), map_params=None, parser=None):
         self.method = None
 
         self.path = path
@@ -472,6 +804,7 @@ class auto_call(object):
         self.defaults = None
         self.prop_to_param = prop_to_param
         self.map_params = map_params if map_params else {}
+        self.parser = parser
 
     def __call__(self, method):
         if self.method is not None:
@@ -486,12 +819,13 @@ class auto_call(object):
         self.args.remove('api_result')
         self.defaults.pop('api_result')  # TODO: better exception
 
-        wrapper._request_specs = {
+        self.specs = wrapper._request_specs = {
             'path': self.path,
             'args': self.args,
             'defaults': self.defaults,
             'prop_to_param': self.prop_to_param,
-            'map_params': self.map_params
+            'map_params': self.map_params,
+            'parser': self.parser,
         }
 
         return wrapper
@@ -501,19 +835,147 @@ class auto_call(object):
         @functools.wraps(self.method)
         def wrapper(client, *args, **kw):
             if 'api_result' in kw:
-                return self.method(client, *args, **kw)
+                return self._run(client, args, kw)
+
+            params = request_params(self.specs, client, args, kw)
+
+            recorder = getattr(client.api, 'slow_calls', None)
+            if _is_instance(recorder, 'slowcalls', 'SlowCallRecorder'):
+                return recorder.record(self.path, params,
+                    lambda: self._call(client, args, kw, params))
+            return self._call(client, args, kw, params)[0]
+
+        return wrapper
+
+    def _call(self, client, args, kw, params):
+        """Make the request and call the method on its result.
+
+        Returns a (method result, payload) tuple, where payload is the
+        raw response or the <result> element, for slow call captures.
+        """
+        pool = getattr(client.api, 'parse_pool', None)
+        if self.specs['parser'] is not None and _is_instance(pool, 'parsepool', 'ParsePool'):
+            # get_response() runs the parser, in the pool for large
+            # responses, and times it as 'method'.
+            payload, result = client.api.get_response(self.path, params=params,
+                parser=self.specs['parser'])
+            kw['api_result'] = result
+            return self.method(client, *args, **kw), payload
+
+        kw['api_result'] = client.api.get(self.path, params=params)
+        payload = kw['api_result'].result
+        metrics = getattr(client.api, 'metrics', None)
+        if not _is_instance(metrics, 'metrics', 'Metrics'):
+            return self._run(client, args, kw), payload
+        with metrics.timer('method', self.path):
+            return self._run(client, args, kw), payload
+
+    def _run(self, client, args, kw):
+        """Call the method, once the parser has turned its api_result
+        into the parsed result."""
+        parser = self.specs['parser']
+        if parser is not None:
+            api_result = kw['api_result']
+            kw['api_result'] = APIResult(parser(api_result.result),
+                api_result.timestamp, api_result.expires)
+        return self.method(client, *args, **kw)
+
+
+def request_params(specs, client, args, kw):
+    """Build the API request parameters of a call to an auto_call method.
+
+    specs should be the '_request_specs' of the method, and client the
+    object it is bound to.
+    """
+    args_map = map_func_args(args, kw, specs['args'], specs['defaults'])
+    for attr_name in specs['prop_to_param']:
+        args_map[attr_name] = getattr(client, attr_name, None)
+
+    params = translate_args(args_map, specs['map_params'])
+    return dict((k, v,) for k, v in params.items() if v is not None)
+
+
+class auto_store(object):
+    """A decorator to serve immutable results from the API's permanent store.
+
+    It wraps a method already decorated with auto_call. If the client's
+    api has no 'store', or an 'api_result' is supplied, the method is
+    called as usual. Otherwise:
+
+    - with 'ids_arg', the method result must be a dict keyed by the IDs
+    passed in that argument; only the IDs missing from the store are
+    requested, and the stored and fetched entries are merged.
+
+    - with 'id_arg', the whole method result is stored under the single
+    ID passed in that argument.
+
+    - with neither, the method result must be a dict keyed by entity ID
+    and its entries are only recorded, since there is no way to know
+    which IDs a request would return.
 
-            args_map = map_func_args(args, kw, self.args, self.defaults)
-            for attr_name in self.prop_to_param:
-                args_map[attr_name] = getattr(client, attr_name, None)
+    Entries with a value of None (e.g. missing message IDs) are never
+    stored. When every requested entry comes from the store no request
+    is made, and the timestamp and expires of the APIResult are None.
+    """
+
+    def __init__(self, namespace, ids_arg=None, id_arg=None):
+        self.namespace = namespace
+        self.ids_arg = ids_arg
+        self.id_arg = id_arg
+
+    def __call__(self, method):
+        specs = method._request_specs
 
-            params = translate_args(args_map, self.map_params)
-            params =  dict((k, v,) for k, v in params.items() if v is not None)
+        @functools.wraps(method)
+        def wrapper(client, *args, **kw):
+            store = getattr(client.api, 'store', None)
+            if store is None or 'api_result' in kw:
+                return method(client, *args, **kw)
+
+            args_map = map_func_args(args, kw, specs['args'], specs['defaults'])
 
-            kw['api_result'] = client.api.get(self.path, params=params)
-            return self.method(client, *args, **kw)
+            if self.ids_arg is not None:
+                return self._call_many(store, method, client, args_map)
+            elif self.id_arg is not None:
+                return self._call_one(store, method, client, args_map)
+
+            api_result = method(client, **args_map)
+            store.put_many(self.namespace, dict(
+                (k, v) for k, v in api_result.result.items() if v is not None))
+            return api_result
 
         return wrapper
 
+    def _call_many(self, store, method, client, args_map):
+        ids = args_map[self.ids_arg]
+        if not isinstance(ids, (list, set, tuple)):
+            ids = [ids]
+        ids = [int(i) for i in ids]
+
+        results = store.get_many(self.namespace, ids)
+        missing = [i for i in ids if i not in results]
+        if not missing:
+            return APIResult(results, None, None)
+
+        args_map[self.ids_arg] = missing
+        api_result = method(client, **args_map)
+        fetched = dict((k, v) for k, v in api_result.result.items() if v is not None)
+        store.put_many(self.namespace, fetched)
+
+        for entity_id, value in api_result.result.items():
+            results.setdefault(entity_id, value)
+        return APIResult(results, api_result.timestamp, api_result.expires)
+
+    def _call_one(self, store, method, client, args_map):
+        entity_id = int(args_map[self.id_arg])
+        result = store.get(self.namespace, entity_id)
+        if result is not None:
+            return APIResult(result, None, None)
+
+        api_result = method(client, **args_map)
+        if api_result.result is not None:
+            store.put(self.namespace, entity_id, api_result.result)
+        return api_result
+
 
 # vim: set ts=4 sts=4 sw=4 et:
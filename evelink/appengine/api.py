@@ -2,7 +2,6 @@ import functools
 import inspect
 import time
 from urllib import urlencode
-from xml.etree import ElementTree
 
 from google.appengine.api import memcache
 from google.appengine.api import urlfetch
@@ -47,14 +46,14 @@ class AppEngineAPI(api.API):
             response, robj = yield self.send_request_async(full_path, params)
 
         try:
-            tree = ElementTree.fromstring(response)
-        except ElementTree.ParseError as e:
+            tree = self.xml_backend.fromstring(response)
+        except self.xml_backend.errors as e:
             self.maybe_raise_http_error(robj)
             raise e
 
         current_time = api.get_ts_value(tree, 'currentTime')
         expires_time = api.get_ts_value(tree, 'cachedUntil')
-        self._set_last_timestamps(current_time, expires_time)
+        self._set_last_timestamps(current_time, expires_time, cached)
 
         if not cached:
             yield self.cache.put_async(key, response, expires_time - current_time)
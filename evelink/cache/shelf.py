@@ -8,3 +8,11 @@ class ShelveCache(api.APICache):
     def __init__(self, path):
         super(ShelveCache, self).__init__()
         self.cache = shelve.open(path)
+
+
+class ShelveStore(api.APIStore):
+    """An implementation of APIStore using shelve."""
+
+    def __init__(self, path):
+        super(ShelveStore, self).__init__()
+        self.store = shelve.open(path)
@@ -1,37 +1,92 @@
 import pickle
 import time
 import sqlite3
+import threading
 
 from evelink import api
 
 class SqliteCache(api.APICache):
-    """An implementation of APICache using sqlite."""
+    """An implementation of APICache using sqlite.
+
+    The connection is shared between threads, guarded by a lock.
+    """
 
     def __init__(self, path):
         super(SqliteCache, self).__init__()
-        self.connection = sqlite3.connect(path)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
         cursor = self.connection.cursor()
         cursor.execute('create table if not exists cache ("key" text primary key on conflict replace,'
                        'value blob, expiration integer)')
 
     def get(self, key):
-        cursor = self.connection.cursor()
-        cursor.execute('select value, expiration from cache where "key"=?',(key,))
-        result = cursor.fetchone()
-        if not result:
-            return None
-        value, expiration = result
-        if expiration < time.time():
-            cursor.execute('delete from cache where "key"=?', (key,))
-            self.connection.commit()
-            return None
-        cursor.close()
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute('select value, expiration from cache where "key"=?',(key,))
+            result = cursor.fetchone()
+            if not result:
+                return None
+            value, expiration = result
+            if expiration < time.time():
+                cursor.execute('delete from cache where "key"=?', (key,))
+                self.connection.commit()
+                return None
+            cursor.close()
         return pickle.loads(value)
 
     def put(self, key, value, duration):
         expiration = time.time() + duration
         value_tuple = (key, sqlite3.Binary(pickle.dumps(value, 2)), expiration)
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.execute('insert into cache values (?, ?, ?)', value_tuple)
+            self.connection.commit()
+            cursor.close()
+
+
+class SqliteStore(api.APIStore):
+    """An implementation of APIStore using sqlite.
+
+    The connection is shared between threads, guarded by a lock.
+    """
+
+    # SQLite's default limit on the number of host parameters is 999.
+    _max_params = 900
+
+    def __init__(self, path):
+        super(SqliteStore, self).__init__()
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
         cursor = self.connection.cursor()
-        cursor.execute('insert into cache values (?, ?, ?)', value_tuple)
-        self.connection.commit()
-        cursor.close()
+        cursor.execute('create table if not exists store (namespace text, "key" text, value blob,'
+                       'primary key (namespace, "key") on conflict replace)')
+
+    def get(self, namespace, entity_id):
+        return self.get_many(namespace, [entity_id]).get(entity_id)
+
+    def get_many(self, namespace, entity_ids):
+        by_key = dict((str(i), i) for i in entity_ids)
+        keys = list(by_key)
+        results = {}
+        with self._lock:
+            cursor = self.connection.cursor()
+            for start in range(0, len(keys), self._max_params):
+                chunk = keys[start:start + self._max_params]
+                cursor.execute('select "key", value from store where namespace=? and "key" in (%s)'
+                               % ','.join('?' * len(chunk)), [namespace] + chunk)
+                for key, value in cursor.fetchall():
+                    results[by_key[key]] = value
+            cursor.close()
+        return dict((k, pickle.loads(v)) for k, v in results.items())
+
+    def put(self, namespace, entity_id, value):
+        self.put_many(namespace, {entity_id: value})
+
+    def put_many(self, namespace, values):
+        rows = [(namespace, str(k), sqlite3.Binary(pickle.dumps(v, 2)))
+                for k, v in values.items()]
+        with self._lock:
+            cursor = self.connection.cursor()
+            cursor.executemany('insert into store values (?, ?, ?)', rows)
+            self.connection.commit()
+            cursor.close()
@@ -42,7 +42,7 @@ class Char(object):
         self.api = api
         self.char_id = char_id
 
-    @auto_call('char/AssetList')
+    @auto_call('char/AssetList', parser=parse_assets)
     def assets(self, api_result=None):
         """Get information about corp assets.
 
@@ -66,7 +66,7 @@ class Char(object):
         "contents" and "location_id".
         """
 
-        return api.APIResult(parse_assets(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
     @auto_call('char/Bookmarks')
     def bookmarks(self, api_result=None):
@@ -78,6 +78,7 @@ class Char(object):
         """Lists the latest bids that have been made to any recent auctions."""
         return api.APIResult(parse_contract_bids(api_result.result), api_result.timestamp, api_result.expires)
 
+    @api.auto_store('contract_items', id_arg='contract_id')
     @auto_call('char/ContractItems', map_params={'contract_id': 'contractID'})
     def contract_items(self, contract_id, api_result=None):
         """Lists items that a specified contract contains"""
@@ -88,10 +89,10 @@ class Char(object):
         """Returns a record of all contracts for a specified character"""
         return api.APIResult(parse_contracts(api_result.result), api_result.timestamp, api_result.expires)
 
-    @auto_call('char/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount'})
+    @auto_call('char/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount'}, parser=parse_wallet_journal)
     def wallet_journal(self, before_id=None, limit=None, api_result=None):
         """Returns a complete record of all wallet activity for a specified character"""
-        return api.APIResult(parse_wallet_journal(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
     @auto_call('char/AccountBalance')
     def wallet_info(self, api_result=None):
@@ -154,7 +155,8 @@ class Char(object):
 
         return dict(result)
 
-    @auto_call('char/KillMails', map_params={'before_kill': 'beforeKillID'})
+    @api.auto_store('kills')
+    @auto_call('char/KillMails', map_params={'before_kill': 'beforeKillID'}, parser=parse_kills)
     def kills(self, before_kill=None, api_result=None):
         """Look up recent kills for a character.
 
@@ -162,9 +164,10 @@ class Char(object):
             Optional. Only show kills before this kill id. (Used for paging.)
         """
 
-        return api.APIResult(parse_kills(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
-    @auto_call('char/KillLog', map_params={'before_kill': 'beforeKillID'})
+    @api.auto_store('kills')
+    @auto_call('char/KillLog', map_params={'before_kill': 'beforeKillID'}, parser=parse_kills)
     def kill_log(self, before_kill=None, api_result=None):
         """Look up recent kills for a character.
 
@@ -175,7 +178,7 @@ class Char(object):
             Optional. Only show kills before this kill id. (Used for paging.)
         """
 
-        return api.APIResult(parse_kills(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
     @auto_call('char/Notifications')
     def notifications(self, api_result=None):
@@ -195,6 +198,7 @@ class Char(object):
 
         return api.APIResult(result, api_result.timestamp, api_result.expires)
 
+    @api.auto_store('notification_texts', ids_arg='notification_ids')
     @auto_call('char/NotificationTexts', map_params={'notification_ids': 'IDs'})
     def notification_texts(self, notification_ids, api_result=None):
         """Returns the message bodies for notifications."""
@@ -465,6 +469,7 @@ class Char(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
+    @api.auto_store('mail_bodies', ids_arg='message_ids')
     @auto_call('char/MailBodies', map_params={'message_ids': 'ids'})
     def message_bodies(self, message_ids, api_result=None):
         """Returns the actual body content of a set of mail messages.
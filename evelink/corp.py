@@ -1,16 +1,23 @@
+import heapq
+
 from evelink import api, constants
 from evelink.parsing.assets import parse_assets
 from evelink.parsing.bookmarks import parse_bookmarks
 from evelink.parsing.contact_list import parse_contact_list
+from evelink.parsing.container_log import parse_container_log
 from evelink.parsing.contract_bids import parse_contract_bids
 from evelink.parsing.contract_items import parse_contract_items
 from evelink.parsing.contracts import parse_contracts
 from evelink.parsing.industry_jobs import parse_industry_jobs
 from evelink.parsing.kills import parse_kills
+from evelink.parsing.member_tracking import parse_member_tracking
 from evelink.parsing.orders import parse_market_orders
 from evelink.parsing.wallet_journal import parse_wallet_journal
 from evelink.parsing.wallet_transactions import parse_wallet_transactions
 
+# The accountKeys of the seven corporation wallet divisions.
+WALLET_DIVISIONS = tuple(range(1000, 1007))
+
 
 class Corp(object):
     """Wrapper around /corp/ of the EVE API.
@@ -137,7 +144,8 @@ class Corp(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/KillMails', map_params={'before_kill': 'beforeKillID'})
+    @api.auto_store('kills')
+    @api.auto_call('corp/KillMails', map_params={'before_kill': 'beforeKillID'}, parser=parse_kills)
     def kills(self, before_kill=None, api_result=None):
         """Look up recent kills for a corporation.
 
@@ -145,9 +153,10 @@ class Corp(object):
             Optional. Only show kills before this kill id. (Used for paging.)
         """
 
-        return api.APIResult(parse_kills(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
-    @api.auto_call('corp/KillLog', map_params={'before_kill': 'beforeKillID'})
+    @api.auto_store('kills')
+    @api.auto_call('corp/KillLog', map_params={'before_kill': 'beforeKillID'}, parser=parse_kills)
     def kill_log(self, before_kill=None, api_result=None):
         """Look up recent kills for a corporation.
 
@@ -158,7 +167,7 @@ class Corp(object):
             Optional. Only show kills before this kill id. (Used for paging.)
         """
 
-        return api.APIResult(parse_kills(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
     @api.auto_call('corp/AccountBalance')
     def wallet_info(self, api_result=None):
@@ -175,22 +184,70 @@ class Corp(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount', 'account': 'accountKey'})
+    @api.auto_call('corp/WalletJournal', map_params={'before_id': 'fromID', 'limit': 'rowCount', 'account': 'accountKey'}, parser=parse_wallet_journal)
     def wallet_journal(self, before_id=None, limit=None, account=None, api_result=None):
         """Returns wallet journal for a corporation."""
-        return api.APIResult(parse_wallet_journal(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
     @api.auto_call('corp/WalletTransactions', map_params={'before_id': 'fromID', 'limit': 'rowCount', 'account': 'accountKey'})
     def wallet_transactions(self, before_id=None, limit=None, account=None, api_result=None):
         """Returns wallet transactions for a corporation."""
         return api.APIResult(parse_wallet_transactions(api_result.result), api_result.timestamp, api_result.expires)
 
+    def _all_divisions(self, method, accounts, max_workers, **kw):
+        """Call a per-division wallet method for several divisions at once.
+
+        The rows of each division are tagged with its accountKey in
+        'account', and merged in one pass into a single list ordered by
+        'id'. The timestamp of the result is the latest one of the
+        calls, and its expiry the earliest.
+        """
+        accounts = list(accounts)
+        if not accounts:
+            raise ValueError("At least one account is required.")
+
+        results = api.map_concurrently(lambda account: method(account=account, **kw),
+            accounts, max_workers=max_workers)
+
+        def keyed(n, rows):
+            # The journal is already in order and transactions come in
+            # reverse, so sorting each division takes linear time.
+            for i, row in enumerate(sorted(rows, key=lambda row: row['id'])):
+                row['account'] = accounts[n]
+                yield row['id'], n, i, row
+
+        merged = heapq.merge(*[keyed(n, r.result) for n, r in enumerate(results)])
+        return api.APIResult([row for _, _, _, row in merged],
+            max(r.timestamp for r in results), min(r.expires for r in results))
+
+    def all_wallet_journals(self, before_id=None, limit=None, accounts=WALLET_DIVISIONS,
+                            max_workers=7):
+        """Returns the wallet journals of all divisions, merged by refID.
+
+        The divisions are requested concurrently, and each entry has its
+        division's accountKey in 'account'. before_id and limit apply to
+        each division.
+        """
+        return self._all_divisions(self.wallet_journal, accounts, max_workers,
+            before_id=before_id, limit=limit)
+
+    def all_wallet_transactions(self, before_id=None, limit=None, accounts=WALLET_DIVISIONS,
+                                max_workers=7):
+        """Returns the wallet transactions of all divisions, merged by ID.
+
+        The divisions are requested concurrently, and each transaction
+        has its division's accountKey in 'account'. before_id and limit
+        apply to each division.
+        """
+        return self._all_divisions(self.wallet_transactions, accounts, max_workers,
+            before_id=before_id, limit=limit)
+
     @api.auto_call('corp/MarketOrders')
     def orders(self, api_result=None):
         """Return a corporation's buy and sell orders."""
         return api.APIResult(parse_market_orders(api_result.result), api_result.timestamp, api_result.expires)
 
-    @api.auto_call('corp/AssetList')
+    @api.auto_call('corp/AssetList', parser=parse_assets)
     def assets(self, api_result=None):
         """Get information about corp assets.
 
@@ -214,7 +271,7 @@ class Corp(object):
         "contents" and "location_id".
         """
 
-        return api.APIResult(parse_assets(api_result.result), api_result.timestamp, api_result.expires)
+        return api_result
 
     @api.auto_call('corp/Bookmarks')
     def bookmarks(self, api_result=None):
@@ -257,6 +314,7 @@ class Corp(object):
         """Lists the latest bids that have been made to any recent auctions."""
         return api.APIResult(parse_contract_bids(api_result.result), api_result.timestamp, api_result.expires)
 
+    @api.auto_store('contract_items', id_arg='contract_id')
     @api.auto_call('corp/ContractItems', map_params={'contract_id': 'contractID'})
     def contract_items(self, contract_id, api_result=None):
         """Lists items that a specified contract contains"""
@@ -461,43 +519,7 @@ class Corp(object):
                 args['extended'] = 1
             api_result = self.api.get('corp/MemberTracking', params=args)
 
-        rowset = api_result.result.find('rowset')
-        results = {}
-        for row in rowset.findall('row'):
-            a = row.attrib
-            member = {
-                'id': int(a['characterID']),
-                'name': a['name'],
-                'join_ts': api.parse_ts(a['startDateTime']),
-                'base': {
-                    # TODO(aiiane): Maybe remove this?
-                    # It doesn't seem to ever have a useful value.
-                    'id': int(a['baseID']),
-                    'name': a['base'],
-                },
-                # Note that title does not include role titles,
-                # only ones like 'CEO'
-                'title': a['title'],
-            }
-            if extended:
-                member.update({
-                    'logon_ts': api.parse_ts(a['logonDateTime']),
-                    'logoff_ts': api.parse_ts(a['logoffDateTime']),
-                    'location': {
-                        'id': int(a['locationID']),
-                        'name': a['location'],
-                    },
-                    'ship_type': {
-                        # "Not available" = -1 ship id; we change to None
-                        'id': max(int(a['shipTypeID']), 0) or None,
-                        'name': a['shipType'] or None,
-                    },
-                    'roles': int(a['roles']),
-                    'can_grant': int(a['grantableRoles']),
-                })
-
-            results[member['id']] = member
-
+        results = parse_member_tracking(api_result.result, extended)
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/MemberSecurity')
@@ -667,40 +689,7 @@ class Corp(object):
     @api.auto_call('corp/ContainerLog')
     def container_log(self, api_result=None):
         """Returns a log of actions performed on corporation containers."""
-        results = []
-        rowset = api_result.result.find('rowset')
-
-        def int_or_none(val):
-            return int(val) if val else None
-
-        for row in rowset.findall('row'):
-            a = row.attrib
-            action = {
-                'timestamp': api.parse_ts(a['logTime']),
-                'item': {
-                    'id': int(a['itemID']),
-                    'type_id': int(a['itemTypeID']),
-                },
-                'actor': {
-                    'id': int(a['actorID']),
-                    'name': a['actorName'],
-                },
-                'location_id': int(a['locationID']),
-                'action': a['action'],
-                'details': {
-                    # TODO(aiiane): Find a translation for this flag field
-                    'flag': int(a['flag']),
-                    'password_type': a['passwordType'] or None,
-                    'type_id': int_or_none(a['typeID']),
-                    'quantity': int_or_none(a['quantity']),
-                    'config': {
-                        'old': int_or_none(a['oldConfiguration']),
-                        'new': int_or_none(a['newConfiguration']),
-                    },
-                },
-            }
-            results.append(action)
-
+        results = parse_container_log(api_result.result)
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
     @api.auto_call('corp/Locations', map_params={'location_list': 'IDs'})
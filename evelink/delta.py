@@ -0,0 +1,141 @@
+"""Report only what changed between successive polls of keyed endpoints."""
+
+import collections
+
+from evelink import api
+from evelink.thirdparty import six
+
+
+Delta = collections.namedtuple("Delta", [
+        "added",
+        "removed",
+        "changed",
+    ])
+Delta.__doc__ = """The difference between two results keyed by ID.
+
+added:
+    a dict of {key: entry} for entries that are new
+removed:
+    a sorted list of the keys that are gone
+changed:
+    a dict of {key: {field: (old, new)}} for entries that differ,
+    where nested fields are named with dots, e.g. 'faction.id'
+"""
+
+
+def _flatten(value, prefix=''):
+    """Yield (field, leaf value) pairs for a nested dict, in field order."""
+    for k in sorted(value, key=str):
+        field = '%s%s' % (prefix, k)
+        v = value[k]
+        if isinstance(v, dict) and v:
+            for pair in _flatten(v, field + '.'):
+                yield pair
+        else:
+            yield field, v
+
+
+class DeltaTracker(object):
+    """Tracks keyed endpoint results and returns only what changed.
+
+    Endpoints such as Map.sov_by_system, Map.faction_warfare_systems,
+    Corp.members, Char.orders, Corp.starbases and Char.contracts return
+    a dict of entries keyed by ID. Calling one through a tracker returns
+    a Delta against the result the tracker saw last time for the same
+    request (the same cache key), instead of the full dict. The first
+    call reports every entry as added.
+
+    Previous results are kept flattened: each entry is a tuple of leaf
+    values, and entries with the same fields share a single tuple of
+    field names.
+    """
+
+    def __init__(self):
+        # cache key -> {entry key: (fields, values)}
+        self._previous = {}
+        self._field_sets = {}
+
+    def _compact(self, entry):
+        if not isinstance(entry, dict):
+            fields, values = ('',), (entry,)
+        else:
+            pairs = list(_flatten(entry))
+            fields = tuple(f for f, _ in pairs)
+            values = tuple(v for _, v in pairs)
+        fields = self._field_sets.setdefault(fields, fields)
+        return fields, values
+
+    def diff(self, key, result):
+        """Compare a dict result with the one last seen under 'key'.
+
+        The new result replaces the old one for the next comparison.
+        """
+        previous = self._previous.get(key, {})
+        current = {}
+        added = {}
+        changed = {}
+
+        for entry_key, entry in result.items():
+            compact = current[entry_key] = self._compact(entry)
+            old = previous.get(entry_key)
+            if old is None:
+                added[entry_key] = entry
+            elif old != compact:
+                changed[entry_key] = self._changes(old, compact)
+
+        removed = sorted(k for k in previous if k not in current)
+        self._previous[key] = current
+        return Delta(added, removed, changed)
+
+    def _changes(self, old, new):
+        old_values = dict(zip(*old))
+        new_values = dict(zip(*new))
+        changes = {}
+        for field in set(old_values) | set(new_values):
+            old_value = old_values.get(field)
+            new_value = new_values.get(field)
+            if old_value != new_value:
+                changes[field] = (old_value, new_value)
+        return changes
+
+    def forget(self, key=None):
+        """Drop the remembered result for 'key', or for every key."""
+        if key is None:
+            self._previous.clear()
+        else:
+            self._previous.pop(key, None)
+
+    def _request_key(self, method, args, kwargs):
+        client = six.get_method_self(method)
+        specs = getattr(method, '_request_specs', None)
+        if specs is not None:
+            params = api.request_params(specs, client, args, kwargs)
+            return client.api.request_key(specs['path'], params)
+
+        # Methods like Corp.members call the API themselves; key them
+        # on their name and arguments instead.
+        params = dict(kwargs)
+        params.update(('_%d' % i, v) for i, v in enumerate(args))
+        return client.api.request_key(
+            '%s.%s' % (type(client).__name__, method.__name__), params)
+
+    def call(self, method, *args, **kwargs):
+        """Call a bound endpoint method and return an APIResult of its Delta.
+
+        Endpoints returning a (results, data_time) tuple, such as
+        Map.sov_by_system, return a (Delta, data_time) tuple instead.
+        """
+        key = self._request_key(method, args, kwargs)
+        api_result = method(*args, **kwargs)
+
+        result = api_result.result
+        if isinstance(result, tuple):
+            results, data_time = result
+            delta = (self.diff(key, results), data_time)
+        else:
+            delta = self.diff(key, result)
+
+        return api.APIResult(delta, api_result.timestamp, api_result.expires)
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -1,5 +1,111 @@
+import time
+
 from evelink import api
 
+
+def _alliance_memberships(result):
+    """Yield (alliance_id, start_ts, {corp_id: start_ts}) from an AllianceList result."""
+    rowset = result.find('rowset')
+    for row in rowset.findall('row'):
+        corps = {}
+        for corp_row in row.find('rowset').findall('row'):
+            a = corp_row.attrib
+            corps[int(a['corporationID'])] = api.parse_ts(a['startDate'])
+        yield int(row.attrib['allianceID']), api.parse_ts(row.attrib['startDate']), corps
+
+
+class AllianceIndex(object):
+    """A reverse index from corporation ID to alliance membership.
+
+    Built by EVE.alliance_index() straight from the AllianceList rows,
+    without building the dict returned by EVE.alliances(). Refreshing
+    an existing index only touches the corporations whose membership
+    changed.
+    """
+
+    def __init__(self):
+        self.timestamp = None
+        self.expires = None
+        # corp_id -> (alliance_id, corp start_ts)
+        self._corps = {}
+        # alliance_id -> (alliance start_ts, {corp_id: corp start_ts})
+        self._alliances = {}
+
+    def __contains__(self, corp_id):
+        return corp_id in self._corps
+
+    def __len__(self):
+        return len(self._corps)
+
+    def alliance_id(self, corp_id):
+        """Return the ID of the alliance 'corp_id' belongs to, or None."""
+        membership = self._corps.get(corp_id)
+        return membership[0] if membership else None
+
+    def membership(self, corp_id):
+        """Return a dict describing the alliance membership of 'corp_id', or None."""
+        membership = self._corps.get(corp_id)
+        if membership is None:
+            return None
+        alliance_id, corp_ts = membership
+        return {
+            'alliance_id': alliance_id,
+            'alliance_timestamp': self._alliances[alliance_id][0],
+            'timestamp': corp_ts,
+        }
+
+    def member_corps(self, alliance_id):
+        """Return {corp_id: start_ts} for the corporations in 'alliance_id'."""
+        return dict(self._alliances.get(alliance_id, (None, {}))[1])
+
+    def expired(self, now=None):
+        """Whether the AllianceList this index was built from has expired."""
+        now = time.time() if now is None else now
+        return self.expires is None or self.expires <= now
+
+    def update(self, memberships, timestamp=None, expires=None):
+        """Apply a full list of alliance memberships to the index.
+
+        memberships:
+            an iterable of (alliance_id, start_ts, {corp_id: start_ts})
+            covering every alliance; alliances that are not listed are
+            removed from the index.
+
+        Returns the set of corporation IDs whose membership changed.
+        """
+        changed = set()
+        seen = set()
+        for alliance_id, alliance_ts, corps in memberships:
+            seen.add(alliance_id)
+            old_ts, old_corps = self._alliances.get(alliance_id, (None, {}))
+            self._alliances[alliance_id] = (alliance_ts, corps)
+            if old_corps == corps:
+                continue
+            for corp_id in old_corps:
+                if corp_id not in corps:
+                    self._remove_corp(corp_id, alliance_id, changed)
+            for corp_id, corp_ts in corps.items():
+                if self._corps.get(corp_id) != (alliance_id, corp_ts):
+                    self._corps[corp_id] = (alliance_id, corp_ts)
+                    changed.add(corp_id)
+
+        for alliance_id in set(self._alliances) - seen:
+            _, old_corps = self._alliances.pop(alliance_id)
+            for corp_id in old_corps:
+                self._remove_corp(corp_id, alliance_id, changed)
+
+        self.timestamp = timestamp
+        self.expires = expires
+        return changed
+
+    def _remove_corp(self, corp_id, alliance_id, changed):
+        # The corp may already have been added to its new alliance.
+        membership = self._corps.get(corp_id)
+        if membership is not None and membership[0] == alliance_id:
+            del self._corps[corp_id]
+            changed.add(corp_id)
+
+
 class EVE(object):
     """Wrapper around /eve/ of the EVE API."""
 
@@ -209,6 +315,31 @@ class EVE(object):
 
         return api.APIResult(results, api_result.timestamp, api_result.expires)
 
+    @api.auto_call('eve/AllianceList')
+    def _alliance_list(self, api_result=None):
+        """Return the unparsed AllianceList, for alliance_index()."""
+        return api_result
+
+    def alliance_index(self, index=None, api_result=None):
+        """Return an AllianceIndex mapping corporation IDs to alliances.
+
+        index:
+            Optional. An AllianceIndex from a previous call. If it has
+            not expired it is returned as-is; otherwise it is refreshed
+            in place from a new AllianceList.
+        """
+        if api_result is None:
+            if index is not None and not index.expired():
+                return api.APIResult(index, index.timestamp, index.expires)
+            api_result = self._alliance_list()
+
+        if index is None:
+            index = AllianceIndex()
+        index.update(_alliance_memberships(api_result.result),
+            api_result.timestamp, api_result.expires)
+
+        return api.APIResult(index, api_result.timestamp, api_result.expires)
+
     @api.auto_call('eve/ErrorList')
     def errors(self, api_result=None):
         """Return a mapping of error codes to messages."""
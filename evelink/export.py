@@ -0,0 +1,194 @@
+"""Stream rowset endpoints to JSON lines or CSV files in constant memory.
+
+Instead of building the whole tree and a list of parsed rows, export()
+reads each response with ElementTree.iterparse and hands every <row>
+to the row parser from evelink.parsing as soon as it is read, then
+writes it out and throws the element away. Endpoints that page
+(wallet journals and transactions) are walked back a page at a time
+with fromID and rowCount, so memory stays bounded by one page however
+long the history is:
+
+    with open('journal.jsonl', 'w') as f:
+        export.export(api, 'char/WalletJournal', f, params={'characterID': 1})
+
+Responses go through the API's cache like any other request.
+"""
+
+import collections
+import csv
+import json
+import xml.parsers.expat
+from xml.etree import ElementTree
+
+from evelink import api as evelink_api
+from evelink.parsing.container_log import parse_container_log_row
+from evelink.parsing.member_tracking import parse_member_tracking_row
+from evelink.parsing.wallet_journal import parse_wallet_journal_row
+from evelink.parsing.wallet_transactions import parse_wallet_transactions_row
+from evelink.thirdparty import six
+
+# The most rows the API returns per page of a paging endpoint.
+PAGE_SIZE = 2560
+
+# How to export an endpoint: the row parser, the default params, and
+# for paging endpoints, the row attribute that fromID refers to.
+Endpoint = collections.namedtuple('Endpoint', 'parse_row params id_attr')
+
+ENDPOINTS = {
+    'char/WalletJournal': Endpoint(parse_wallet_journal_row, {}, 'refID'),
+    'corp/WalletJournal': Endpoint(parse_wallet_journal_row, {}, 'refID'),
+    'char/WalletTransactions': Endpoint(parse_wallet_transactions_row, {}, 'transactionID'),
+    'corp/WalletTransactions': Endpoint(parse_wallet_transactions_row, {}, 'transactionID'),
+    'corp/ContainerLog': Endpoint(parse_container_log_row, {}, None),
+    'corp/MemberTracking': Endpoint(parse_member_tracking_row, {'extended': 1}, None),
+}
+
+
+def _iter_page(api, path, params):
+    """Yield the attributes of each <row> of one response, as it is read.
+
+    The response is cached (and APIErrors raised) once it has been read
+    to the end, since cachedUntil comes after the rows.
+    """
+    key = api.request_key(path, params)
+    # A single scope for the page, so measurements made while reading
+    # it are attributed to its path.
+    with api.metrics.request(path):
+        response, robj, cached = api.load_response(path, params)
+
+        data = response
+        if isinstance(data, six.text_type):
+            data = data.encode('utf-8')
+
+        values = {}
+        rowset = row_depth = None
+        depth = 0
+        try:
+            for event, elem in ElementTree.iterparse(six.BytesIO(data), ('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if elem.tag == 'rowset' and rowset is None:
+                        rowset, row_depth = elem, depth + 1
+                    continue
+                if depth == row_depth and elem.tag == 'row':
+                    yield elem.attrib
+                    # Rows are handled in order, so this one is the first
+                    # left in the rowset; removing it lets it be freed.
+                    del rowset[0]
+                elif elem.tag in ('currentTime', 'cachedUntil', 'error'):
+                    values[elem.tag] = elem
+                depth -= 1
+        except (SyntaxError, xml.parsers.expat.ExpatError):
+            if robj is not None:
+                api.maybe_raise_http_error(robj)
+            raise
+
+        current_time = evelink_api.parse_ts(values['currentTime'].text)
+        expires_time = evelink_api.parse_ts(values['cachedUntil'].text)
+        api.cache_response(key, response, cached, current_time, expires_time)
+
+    error = values.get('error')
+    if error is not None:
+        raise evelink_api.APIError(error.attrib['code'], error.text.strip(),
+            current_time, expires_time)
+
+
+def iter_rows(api, path, params=None, paginate=True):
+    """Yield the parsed rows of an endpoint in ENDPOINTS, one at a time.
+
+    Paging endpoints are walked back to the oldest available row,
+    unless paginate is False or params already has a rowCount.
+    """
+    if path not in ENDPOINTS:
+        raise ValueError("Cannot export %s; supported endpoints are %s" % (
+            path, ', '.join(sorted(ENDPOINTS))))
+    endpoint = ENDPOINTS[path]
+    params = dict(endpoint.params, **(params or {}))
+
+    paging = paginate and endpoint.id_attr is not None and 'rowCount' not in params
+    if paging:
+        params['rowCount'] = PAGE_SIZE
+
+    while True:
+        count = 0
+        oldest = None
+        for attrib in _iter_page(api, path, params):
+            count += 1
+            if paging:
+                row_id = int(attrib[endpoint.id_attr])
+                oldest = row_id if oldest is None else min(oldest, row_id)
+            yield endpoint.parse_row(attrib)
+        if not paging or count < PAGE_SIZE:
+            return
+        params['fromID'] = oldest
+
+
+class JSONLinesWriter(object):
+    """Writes each row as one line of JSON."""
+
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, row):
+        self.f.write(json.dumps(row, sort_keys=True))
+        self.f.write('\n')
+
+
+def flatten(row, prefix=''):
+    """Flatten nested dicts into one level of dotted keys."""
+    flat = {}
+    for k, v in row.items():
+        if isinstance(v, dict):
+            flat.update(flatten(v, '%s%s.' % (prefix, k)))
+        else:
+            flat[prefix + k] = v
+    return flat
+
+
+class CSVWriter(object):
+    """Writes rows as CSV, with nested fields as dotted columns.
+
+    The columns are those of the first row (sorted), unless 'fields' is
+    given. On Python 3, f must be opened with newline=''.
+    """
+
+    def __init__(self, f, fields=None):
+        self.f = f
+        self.fields = fields
+        self._writer = None
+
+    def write(self, row):
+        row = flatten(row)
+        if self._writer is None:
+            if self.fields is None:
+                self.fields = sorted(row)
+            self._writer = csv.DictWriter(self.f, self.fields, extrasaction='ignore')
+            self._writer.writeheader()
+        if six.PY2:
+            row = dict((k, v.encode('utf-8') if isinstance(v, six.text_type) else v)
+                       for k, v in row.items())
+        self._writer.writerow(row)
+
+
+WRITERS = {
+    'jsonl': JSONLinesWriter,
+    'csv': CSVWriter,
+}
+
+
+def export(api, path, f, format='jsonl', params=None, paginate=True):
+    """Write every row of an endpoint to the file f, and return the row count.
+
+    format is 'jsonl' or 'csv'. See iter_rows() for the other arguments.
+    """
+    if format not in WRITERS:
+        raise ValueError("format must be one of %s" % ', '.join(sorted(WRITERS)))
+    writer = WRITERS[format](f)
+    count = 0
+    for row in iter_rows(api, path, params, paginate):
+        writer.write(row)
+        count += 1
+    return count
+
+
+# vim: set ts=4 sts=4 sw=4 et:
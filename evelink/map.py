@@ -1,5 +1,155 @@
+import array
+import bisect
+import heapq
+import pickle
+
 from evelink import api
 
+
+class SystemActivityHistory(object):
+    """An append-only store of hourly per-system activity snapshots.
+
+    Each snapshot from Map.jumps_by_system or Map.kills_by_system is
+    kept as one packed array per metric, indexed by a stable ordinal
+    assigned to each solar system the first time it is seen. Systems
+    first seen after a snapshot was taken count as 0 in it.
+
+    Metrics are 'jumps' (from jumps_by_system) and 'faction', 'ship'
+    and 'pod' (from kills_by_system).
+    """
+
+    METRICS = ('jumps', 'faction', 'ship', 'pod')
+
+    # Unsigned 32-bit counts per system.
+    _typecode = 'I' if array.array('I').itemsize == 4 else 'L'
+
+    def __init__(self):
+        self._ordinals = {}
+        self._systems = array.array('l')
+        self._hours = dict((m, array.array('l')) for m in self.METRICS)
+        self._values = dict((m, []) for m in self.METRICS)
+
+    def _ordinal(self, system_id):
+        ordinal = self._ordinals.get(system_id)
+        if ordinal is None:
+            ordinal = len(self._systems)
+            self._ordinals[system_id] = ordinal
+            self._systems.append(system_id)
+        return ordinal
+
+    def append(self, metric, data_time, counts):
+        """Append the snapshot of 'metric' taken at 'data_time'.
+
+        counts:
+            a dict of {system_id: count}
+
+        Snapshots must be appended in time order; one that is not newer
+        than the latest snapshot of the metric is ignored. Returns
+        whether the snapshot was stored.
+        """
+        hours = self._hours[metric]
+        if hours and data_time <= hours[-1]:
+            return False
+
+        ordinals = [(self._ordinal(s), c) for s, c in counts.items()]
+        values = array.array(self._typecode, [0]) * len(self._systems)
+        for ordinal, count in ordinals:
+            values[ordinal] = count
+
+        hours.append(data_time)
+        self._values[metric].append(values)
+        return True
+
+    def add_jumps(self, result):
+        """Append a (results, data_time) result of Map.jumps_by_system."""
+        counts, data_time = result
+        return self.append('jumps', data_time, counts)
+
+    def add_kills(self, result):
+        """Append a (results, data_time) result of Map.kills_by_system."""
+        kills, data_time = result
+        stored = False
+        for metric in ('faction', 'ship', 'pod'):
+            counts = dict((s, k[metric]) for s, k in kills.items())
+            stored = self.append(metric, data_time, counts) or stored
+        return stored
+
+    def hours(self, metric):
+        """Return the data times of every stored snapshot of 'metric'."""
+        return list(self._hours[metric])
+
+    def _window(self, metric, start, end):
+        hours = self._hours[metric]
+        lo = 0 if start is None else bisect.bisect_left(hours, start)
+        hi = len(hours) if end is None else bisect.bisect_right(hours, end)
+        return self._values[metric][lo:hi]
+
+    def window_sums(self, metric, start=None, end=None):
+        """Sum 'metric' per system over the snapshots in [start, end].
+
+        Returns an array indexed by system ordinal; see system_ids().
+        """
+        totals = array.array('l', [0]) * len(self._systems)
+        for values in self._window(metric, start, end):
+            for ordinal, count in enumerate(values):
+                if count:
+                    totals[ordinal] += count
+        return totals
+
+    def system_ids(self):
+        """Return the system IDs in ordinal order."""
+        return list(self._systems)
+
+    def top(self, metric, n=10, start=None, end=None):
+        """Return the n (system_id, total) pairs with the highest totals."""
+        totals = self.window_sums(metric, start, end)
+        best = heapq.nlargest(n, range(len(totals)), key=totals.__getitem__)
+        return [(self._systems[o], totals[o]) for o in best if totals[o]]
+
+    def series(self, metric, system_id):
+        """Return [(data_time, count)] for one system."""
+        ordinal = self._ordinals.get(system_id)
+        results = []
+        for data_time, values in zip(self._hours[metric], self._values[metric]):
+            count = values[ordinal] if ordinal is not None and ordinal < len(values) else 0
+            results.append((data_time, count))
+        return results
+
+    def rolling_sums(self, metric, system_id, window):
+        """Return [(data_time, sum)] over the last 'window' snapshots of one system."""
+        results = []
+        total = 0
+        series = self.series(metric, system_id)
+        for i, (data_time, count) in enumerate(series):
+            total += count
+            if i >= window:
+                total -= series[i - window][1]
+            results.append((data_time, total))
+        return results
+
+    def save(self, path):
+        """Write the history to 'path'."""
+        state = {
+            'systems': self._systems,
+            'hours': self._hours,
+            'values': self._values,
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, 2)
+
+    @classmethod
+    def load(cls, path):
+        """Read a history previously written by save()."""
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        history = cls()
+        history._systems = state['systems']
+        history._ordinals = dict((s, o) for o, s in enumerate(state['systems']))
+        history._hours = state['hours']
+        history._values = state['values']
+        return history
+
+
 class Map(object):
     """Wrapper around /map/ of the EVE API."""
 
@@ -0,0 +1,184 @@
+"""Per-path counters and latency histograms for API requests.
+
+An API created with metrics=Metrics(...) records, for each API path:
+
+- the time spent in each phase of a request: 'cache' (cache lookups
+  and stores), 'network' (sending the request and reading the
+  response, including 'decompress' when it is done by evelink), 'parse'
+  (building the ElementTree) and 'method' (the auto_call method turning
+  the tree into Python data, or for responses parsed in a parse_pool,
+  building the tree as well);
+- the counters 'cache_hit', 'cache_miss', 'cache_stale' (a cached
+  response whose cachedUntil has already passed), 'bytes_out' and
+  'bytes_in'.
+
+Measurements are passed on to one or more sinks. MemorySink keeps
+them for snapshots; CallbackSink forwards them statsd-style.
+"""
+
+import bisect
+import contextlib
+import threading
+import time
+
+# Upper bounds, in seconds, of the latency histogram buckets. Each
+# histogram has one more bucket for everything slower.
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MetricsSink(object):
+    """Minimal interface for receiving measurements.
+
+    Subclass it and override observe() and incr().
+    """
+
+    def observe(self, path, phase, seconds):
+        pass
+
+    def incr(self, path, counter, value):
+        pass
+
+
+class Histogram(object):
+    """Counts of latencies in the buckets given by BUCKETS."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'buckets': list(self.buckets),
+        }
+
+
+class MemorySink(MetricsSink):
+    """Keeps counters and histograms in memory for snapshot()."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def observe(self, path, phase, seconds):
+        with self._lock:
+            histogram = self._histograms.get((path, phase))
+            if histogram is None:
+                histogram = self._histograms[(path, phase)] = Histogram()
+            histogram.add(seconds)
+
+    def incr(self, path, counter, value):
+        with self._lock:
+            key = (path, counter)
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """Return {path: {'counters': {...}, 'phases': {phase: histogram}}}."""
+        results = {}
+        with self._lock:
+            for (path, counter), value in self._counters.items():
+                entry = results.setdefault(path, {'counters': {}, 'phases': {}})
+                entry['counters'][counter] = value
+            for (path, phase), histogram in self._histograms.items():
+                entry = results.setdefault(path, {'counters': {}, 'phases': {}})
+                entry['phases'][phase] = histogram.as_dict()
+        return results
+
+
+class CallbackSink(MetricsSink):
+    """Forwards measurements to a statsd-style callback.
+
+    The callback is called as callback(name, value, kind), where name
+    is e.g. 'evelink.corp.AssetList.network', and kind is 'ms' for
+    timings (value in milliseconds) or 'c' for counters.
+    """
+
+    def __init__(self, callback, prefix='evelink'):
+        self.callback = callback
+        self.prefix = prefix
+
+    def _name(self, path, metric):
+        return '.'.join(p for p in (self.prefix, path.replace('/', '.'), metric) if p)
+
+    def observe(self, path, phase, seconds):
+        self.callback(self._name(path, phase), seconds * 1000.0, 'ms')
+
+    def incr(self, path, counter, value):
+        self.callback(self._name(path, counter), value, 'c')
+
+
+class Metrics(object):
+    """Records measurements for API paths and passes them to sinks.
+
+    By default a single MemorySink is used. Measurements made without
+    an explicit path are attributed to the innermost request() block
+    of the current thread.
+    """
+
+    def __init__(self, sinks=None):
+        self.sinks = [MemorySink()] if sinks is None else list(sinks)
+        self._local = threading.local()
+
+    @contextlib.contextmanager
+    def request(self, path):
+        """Attribute measurements in this block to 'path'."""
+        previous = getattr(self._local, 'path', None)
+        self._local.path = path
+        try:
+            yield
+        finally:
+            self._local.path = previous
+
+    def current_path(self):
+        return getattr(self._local, 'path', None)
+
+    def observe(self, phase, seconds, path=None):
+        path = path or self.current_path() or ''
+        for sink in self.sinks:
+            sink.observe(path, phase, seconds)
+
+    def incr(self, counter, value=1, path=None):
+        path = path or self.current_path() or ''
+        for sink in self.sinks:
+            sink.incr(path, counter, value)
+
+    @contextlib.contextmanager
+    def timer(self, phase, path=None):
+        """Record the time spent in this block as 'phase'."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.time() - start, path)
+
+    def snapshot(self):
+        """Return the snapshot of the first MemorySink, or None."""
+        for sink in self.sinks:
+            if isinstance(sink, MemorySink):
+                return sink.snapshot()
+        return None
+
+
+# Used by API instances that have no metrics; records nothing.
+NULL_METRICS = Metrics(sinks=())
+
+
+# vim: set ts=4 sts=4 sw=4 et:
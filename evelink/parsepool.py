@@ -0,0 +1,103 @@
+"""Parse very large API responses in worker processes.
+
+Building the tree for a multi-megabyte response and parsing it holds
+the GIL, which stalls every other thread (e.g. those of a
+RefreshScheduler) for as long as it takes. An API created with
+parse_pool=ParsePool() hands responses of at least 'threshold' bytes
+to a process pool instead, for the methods whose auto_call has a
+'parser' (asset lists, wallet journals and kill logs). The worker
+builds the tree and runs the parser from evelink.parsing, and only
+the parsed result, which is plain picklable data, is sent back.
+
+Smaller responses, and methods without a parser, are parsed in the
+calling thread as usual.
+"""
+
+import collections
+import logging
+import threading
+
+from evelink import xml_backends
+from evelink.thirdparty import six
+
+_log = logging.getLogger('evelink.parsepool')
+
+# What a worker sends back: the parsed <result> (or None), the error
+# code and message of an <error> response (or None), and the
+# currentTime and cachedUntil timestamps.
+ParsedResponse = collections.namedtuple('ParsedResponse',
+    'result error current_time expires_time')
+
+
+def parse_response(response, parser, xml_backend='etree'):
+    """Parse a raw response and run parser() on its <result>.
+
+    This is what runs in the worker processes, so parser must be
+    picklable, i.e. a module-level function.
+    """
+    from evelink import api as evelink_api
+
+    tree = xml_backends.get_backend(xml_backend).fromstring(response)
+    current_time = evelink_api.get_ts_value(tree, 'currentTime')
+    expires_time = evelink_api.get_ts_value(tree, 'cachedUntil')
+
+    error = tree.find('error')
+    if error is not None:
+        return ParsedResponse(None, (error.attrib['code'], error.text.strip()),
+            current_time, expires_time)
+    return ParsedResponse(parser(tree.find('result')), None, current_time, expires_time)
+
+
+class ParsePool(object):
+    """A pool of worker processes for parsing large responses.
+
+    max_workers defaults to the number of CPUs. xml_backend names the
+    evelink.xml_backends backend the workers use. The processes are
+    started on first use; call shutdown() to stop them.
+    """
+
+    def __init__(self, max_workers=None, threshold=1024 * 1024, xml_backend='etree'):
+        if not isinstance(xml_backend, six.string_types):
+            raise ValueError("xml_backend must be the name of a backend.")
+        self.errors = xml_backends.get_backend(xml_backend).errors
+        self.xml_backend = xml_backend
+        self.max_workers = max_workers
+        self.threshold = threshold
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def offloads(self, response):
+        """Return whether a response is large enough for the pool."""
+        return len(response) >= self.threshold
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                try:
+                    from concurrent import futures
+                except ImportError:
+                    _log.info('`futures` not available, parsing in the calling thread')
+                    return None
+                self._executor = futures.ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def parse(self, response, parser):
+        """Parse a response in a worker process, and return a ParsedResponse.
+
+        The calling thread only waits for the result, so other threads
+        keep running in the meantime.
+        """
+        executor = self._get_executor()
+        if executor is None:
+            return parse_response(response, parser, self.xml_backend)
+        return executor.submit(parse_response, response, parser, self.xml_backend).result()
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,35 @@
+from evelink import api
+
+def _int_or_none(val):
+    return int(val) if val else None
+
+def parse_container_log_row(a):
+    """Parse the attributes of one container log <row>."""
+    return {
+        'timestamp': api.parse_ts(a['logTime']),
+        'item': {
+            'id': int(a['itemID']),
+            'type_id': int(a['itemTypeID']),
+        },
+        'actor': {
+            'id': int(a['actorID']),
+            'name': a['actorName'],
+        },
+        'location_id': int(a['locationID']),
+        'action': a['action'],
+        'details': {
+            # TODO(aiiane): Find a translation for this flag field
+            'flag': int(a['flag']),
+            'password_type': a['passwordType'] or None,
+            'type_id': _int_or_none(a['typeID']),
+            'quantity': _int_or_none(a['quantity']),
+            'config': {
+                'old': _int_or_none(a['oldConfiguration']),
+                'new': _int_or_none(a['newConfiguration']),
+            },
+        },
+    }
+
+def parse_container_log(api_result):
+    rowset = api_result.find('rowset')
+    return [parse_container_log_row(row.attrib) for row in rowset.findall('row')]
@@ -2,6 +2,7 @@ from evelink import api
 from evelink import constants
 
 def parse_industry_jobs(api_result):
+        shared = api.string_pool.intern
         rowset = api_result.find('rowset')
         result = {}
 
@@ -20,7 +21,7 @@ def parse_industry_jobs(api_result):
                     'location_id': int(a['blueprintLocationID']),
                     'type': {
                         'id': int(a['blueprintTypeID']),
-                        'name': a['blueprintTypeName'],
+                        'name': shared(a['blueprintTypeName']),
                     },
                 },
                 'completed': completed,
@@ -31,12 +32,12 @@ def parse_industry_jobs(api_result):
                 'facility_id': int(a['facilityID']),
                 'installer': {
                     'id': int(a['installerID']),
-                    'name': a['installerName'],
+                    'name': shared(a['installerName']),
                 },
                 'product': {
                     'type_id': int(a['productTypeID']),
                     'location_id': int(a['outputLocationID']),
-                    'name': a['productTypeName'],
+                    'name': shared(a['productTypeName']),
                     'probability': float(a['probability']),
                 },
                 'runs': int(a['runs']),
@@ -44,7 +45,7 @@ def parse_industry_jobs(api_result):
                 'pause_ts': api.parse_ts(a['pauseDate']),
                 'system': {
                     'id': int(a['solarSystemID']),
-                    'name': a['solarSystemName'],
+                    'name': shared(a['solarSystemName']),
                 },
                 'station_id': int(a['stationID']),
                 'begin_ts': api.parse_ts(a['startDate']),
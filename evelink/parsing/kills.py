@@ -1,6 +1,7 @@
 from evelink import api
 
 def parse_kills(api_result):
+    shared = api.string_pool.intern
     rowset = api_result.find('rowset')
     result = {}
     for row in rowset.findall('row'):
@@ -17,18 +18,18 @@ def parse_kills(api_result):
         a = victim.attrib
         result[kill_id]['victim'] = {
             'id': int(a['characterID']),
-            'name': a['characterName'],
+            'name': shared(a['characterName']),
             'corp': {
                 'id': int(a['corporationID']),
-                'name': a['corporationName'],
+                'name': shared(a['corporationName']),
             },
             'alliance': {
                 'id': int(a['allianceID']),
-                'name': a['allianceName'],
+                'name': shared(a['allianceName']),
             },
             'faction': {
                 'id': int(a['factionID']),
-                'name': a['factionName'],
+                'name': shared(a['factionName']),
             },
             'damage': int(a['damageTaken']),
             'ship_type_id': int(a['shipTypeID']),
@@ -49,18 +50,18 @@ def parse_kills(api_result):
             attacker_id = int(a['characterID'])
             result[kill_id]['attackers'][attacker_id] = {
                 'id': attacker_id,
-                'name': a['characterName'],
+                'name': shared(a['characterName']),
                 'corp': {
                     'id': int(a['corporationID']),
-                    'name': a['corporationName'],
+                    'name': shared(a['corporationName']),
                 },
                 'alliance': {
                     'id': int(a['allianceID']),
-                    'name': a['allianceName'],
+                    'name': shared(a['allianceName']),
                 },
                 'faction': {
                     'id': int(a['factionID']),
-                    'name': a['factionName'],
+                    'name': shared(a['factionName']),
                 },
                 'sec_status': float(a['securityStatus']),
                 'damage': int(a['damageDone']),
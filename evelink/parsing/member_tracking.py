@@ -0,0 +1,44 @@
+from evelink import api
+
+def parse_member_tracking_row(a, extended=True):
+    """Parse the attributes of one member tracking <row>."""
+    shared = api.string_pool.intern
+    member = {
+        'id': int(a['characterID']),
+        'name': a['name'],
+        'join_ts': api.parse_ts(a['startDateTime']),
+        'base': {
+            # TODO(aiiane): Maybe remove this?
+            # It doesn't seem to ever have a useful value.
+            'id': int(a['baseID']),
+            'name': shared(a['base']),
+        },
+        # Note that title does not include role titles,
+        # only ones like 'CEO'
+        'title': shared(a['title']),
+    }
+    if extended:
+        member.update({
+            'logon_ts': api.parse_ts(a['logonDateTime']),
+            'logoff_ts': api.parse_ts(a['logoffDateTime']),
+            'location': {
+                'id': int(a['locationID']),
+                'name': shared(a['location']),
+            },
+            'ship_type': {
+                # "Not available" = -1 ship id; we change to None
+                'id': max(int(a['shipTypeID']), 0) or None,
+                'name': shared(a['shipType']) or None,
+            },
+            'roles': int(a['roles']),
+            'can_grant': int(a['grantableRoles']),
+        })
+    return member
+
+def parse_member_tracking(api_result, extended=True):
+    rowset = api_result.find('rowset')
+    results = {}
+    for row in rowset.findall('row'):
+        member = parse_member_tracking_row(row.attrib, extended)
+        results[member['id']] = member
+    return results
@@ -1,42 +1,49 @@
 from evelink import api
 
+# Journal names repeat within a journal, but across journals most of
+# them are one-off players, so they are kept out of api.string_pool
+# where they would crowd out the names other parsers share.
+journal_names = api.StringPool()
+
+def parse_wallet_journal_row(a):
+    """Parse the attributes of one wallet journal <row>."""
+    shared = journal_names.intern
+    return {
+        'timestamp': api.parse_ts(a['date']),
+        'id': int(a['refID']),
+        'type_id': int(a['refTypeID']),
+        'party_1': {
+            'name': shared(a['ownerName1']),
+            'id': int(a['ownerID1']),
+            'type':int(a['owner1TypeID']),
+        },
+        'party_2': {
+            'name': shared(a['ownerName2']),
+            'id': int(a['ownerID2']),
+            'type':int(a['owner2TypeID']),
+        },
+        'arg': {
+            'name': shared(a['argName1']),
+            'id': int(a['argID1']),
+        },
+        'amount': float(a['amount']),
+        'balance': float(a['balance']),
+        'reason': a['reason'],
+        # The tax fields might be an empty string, or not present
+        # at all (e.g., for corp wallet records.)  Need to handle
+        # both edge cases.
+        'tax': {
+            'taxer_id': int(a.get('taxReceiverID') or 0),
+            'amount': float(a.get('taxAmount') or 0),
+        },
+    }
+
 def parse_wallet_journal(api_result):
     rowset = api_result.find('rowset')
     result = []
 
     for row in rowset.findall('row'):
-        a = row.attrib
-        entry = {
-            'timestamp': api.parse_ts(a['date']),
-            'id': int(a['refID']),
-            'type_id': int(a['refTypeID']),
-            'party_1': {
-                'name': a['ownerName1'],
-                'id': int(a['ownerID1']),
-                'type':int(a['owner1TypeID']),
-            },
-            'party_2': {
-                'name': a['ownerName2'],
-                'id': int(a['ownerID2']),
-                'type':int(a['owner2TypeID']),
-            },
-            'arg': {
-                'name': a['argName1'],
-                'id': int(a['argID1']),
-            },
-            'amount': float(a['amount']),
-            'balance': float(a['balance']),
-            'reason': a['reason'],
-            # The tax fields might be an empty string, or not present
-            # at all (e.g., for corp wallet records.)  Need to handle
-            # both edge cases.
-            'tax': {
-                'taxer_id': int(a.get('taxReceiverID') or 0),
-                'amount': float(a.get('taxAmount') or 0),
-            },
-        }
-
-        result.append(entry)
+        result.append(parse_wallet_journal_row(row.attrib))
 
     result.sort(key=lambda x: x['id'])
     return result
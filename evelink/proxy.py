@@ -0,0 +1,122 @@
+"""A caching reverse proxy for the EVE API, used by `evelink serve`."""
+
+import logging
+import threading
+from wsgiref import simple_server
+
+from evelink.thirdparty.six.moves import socketserver
+from evelink.thirdparty.six.moves import urllib
+
+_log = logging.getLogger('evelink.proxy')
+
+_PATH_SUFFIX = '.xml.aspx'
+
+
+class _Flight(object):
+    """An upstream request that other threads may be waiting on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class CachingProxy(object):
+    """Answers EVE API requests from one shared cache.
+
+    Cache hits return the stored XML as-is, without parsing it.
+    Concurrent misses for the same request are coalesced, so only one
+    of them goes upstream and the others wait for its response.
+
+    The API instance supplies the cache and the upstream transport. It
+    should not have an API key; clients send their own.
+    """
+
+    def __init__(self, api):
+        self.api = api
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def fetch(self, path, params):
+        """Return the raw XML for a request to an API path."""
+        key = self.api.request_key(path, params)
+        response = self.api.cache.get(key)
+        if response is not None:
+            _log.debug("Cache hit for %s", path)
+            return response
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            _log.debug("Waiting on in-flight request for %s", path)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self.api.fetch(path, params)[0]
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.response
+
+    def __call__(self, environ, start_response):
+        """Serve the EVE API URL space as a WSGI application."""
+        path = environ.get('PATH_INFO', '').lstrip('/')
+        if not path.endswith(_PATH_SUFFIX) or len(path) == len(_PATH_SUFFIX):
+            start_response('404 Not Found', [('Content-Type', 'text/plain')])
+            return [b'Not an EVE API path\n']
+        path = path[:-len(_PATH_SUFFIX)]
+
+        params = dict(urllib.parse.parse_qsl(environ.get('QUERY_STRING', '')))
+        if environ.get('REQUEST_METHOD') == 'POST':
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+            body = environ['wsgi.input'].read(length)
+            params.update(urllib.parse.parse_qsl(body.decode('utf-8')))
+
+        try:
+            response = self.fetch(path, params)
+        except Exception as e:
+            _log.error("Upstream request for %s failed: %r", path, e)
+            start_response('502 Bad Gateway', [('Content-Type', 'text/plain')])
+            return [('Upstream request failed: %s\n' % e).encode('utf-8')]
+
+        if not isinstance(response, bytes):
+            response = response.encode('utf-8')
+        start_response('200 OK', [
+            ('Content-Type', 'text/xml; charset=utf-8'),
+            ('Content-Length', str(len(response))),
+        ])
+        return [response]
+
+
+class _ThreadingWSGIServer(socketserver.ThreadingMixIn, simple_server.WSGIServer):
+    daemon_threads = True
+
+
+def make_server(proxy, host='127.0.0.1', port=8080):
+    """Return a threaded HTTP server for a CachingProxy."""
+    return simple_server.make_server(host, port, proxy,
+        server_class=_ThreadingWSGIServer)
+
+
+def serve(proxy, host='127.0.0.1', port=8080):
+    """Serve a CachingProxy until interrupted."""
+    server = make_server(proxy, host, port)
+    _log.info("Serving the EVE API on http://%s:%d/", host, port)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,190 @@
+"""Local shortest-path routing over the EVE stargate network."""
+
+import array
+import collections
+
+from evelink.thirdparty import six
+
+
+def _security_class(security):
+    """Return 'high', 'low' or 'null' for a system security status."""
+    rounded = round(security, 1)
+    if rounded >= 0.5:
+        return 'high'
+    elif rounded > 0.0:
+        return 'low'
+    return 'null'
+
+
+def read_adjacency(path):
+    """Read a stargate adjacency file.
+
+    Each non-empty line that does not start with '#' holds four
+    tab-separated fields: the system ID, the system name, its security
+    status, and a comma-separated list of the IDs of the systems it has
+    stargates to.
+
+    Yields (system_id, name, security, [neighbor_id, ...]) tuples.
+    """
+    with open(path) as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            system_id, name, security, neighbors = line.split('\t')
+            yield (
+                int(system_id),
+                name,
+                float(security),
+                [int(n) for n in neighbors.split(',') if n],
+            )
+
+
+class Router(object):
+    """A breadth-first route finder over an array-backed stargate graph.
+
+    The graph is stored in compressed sparse row form: systems are
+    numbered by ordinal, and the neighbors of ordinal i are
+    neighbors[offsets[i]:offsets[i + 1]]. The breadth-first tree of
+    each source system (and security filter) is cached, so repeated
+    routes from the same system only walk the tree back from the
+    destination.
+
+    route() returns the same stop structure as EVECentral.route().
+    """
+
+    def __init__(self, systems, max_cached_trees=256):
+        systems = list(systems)
+        self._ordinals = {}
+        self._names = {}
+        self.ids = array.array('l')
+        self.names = []
+        self.security = array.array('d')
+        for system_id, name, security, _ in systems:
+            self._ordinals[system_id] = len(self.ids)
+            self._names[name.lower()] = len(self.ids)
+            self.ids.append(system_id)
+            self.names.append(name)
+            self.security.append(security)
+
+        self.offsets = array.array('l', [0])
+        self.neighbors = array.array('l')
+        for _, _, _, neighbor_ids in systems:
+            self.neighbors.extend(
+                self._ordinals[n] for n in neighbor_ids if n in self._ordinals)
+            self.offsets.append(len(self.neighbors))
+
+        self.max_cached_trees = max_cached_trees
+        self._trees = collections.OrderedDict()
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Build a Router from a stargate adjacency file; see read_adjacency()."""
+        return cls(read_adjacency(path), **kwargs)
+
+    def _ordinal(self, system):
+        """Resolve a system ID or exact system name to its ordinal."""
+        if isinstance(system, six.string_types) and not system.isdigit():
+            ordinal = self._names.get(system.lower())
+        else:
+            ordinal = self._ordinals.get(int(system))
+        if ordinal is None:
+            raise ValueError("Unknown solar system: %r" % (system,))
+        return ordinal
+
+    def _tree(self, source, min_security, max_security):
+        """Return the BFS predecessor and distance arrays rooted at 'source'.
+
+        Systems outside the security bounds are reached but never
+        expanded, so they can only be the final stop of a route.
+        """
+        tree_key = (source, min_security, max_security)
+        tree = self._trees.get(tree_key)
+        if tree is not None:
+            # Mark as most recently used.
+            del self._trees[tree_key]
+            self._trees[tree_key] = tree
+            return tree
+
+        count = len(self.ids)
+        previous = array.array('l', [-1]) * count
+        distance = array.array('l', [-1]) * count
+        distance[source] = 0
+
+        offsets = self.offsets
+        neighbors = self.neighbors
+        security = self.security
+        queue = collections.deque([source])
+        while queue:
+            current = queue.popleft()
+            if current != source:
+                sec = security[current]
+                if ((min_security is not None and sec < min_security) or
+                        (max_security is not None and sec > max_security)):
+                    continue
+            next_distance = distance[current] + 1
+            for i in range(offsets[current], offsets[current + 1]):
+                neighbor = neighbors[i]
+                if distance[neighbor] == -1:
+                    distance[neighbor] = next_distance
+                    previous[neighbor] = current
+                    queue.append(neighbor)
+
+        tree = (previous, distance)
+        self._trees[tree_key] = tree
+        while len(self._trees) > self.max_cached_trees:
+            self._trees.popitem(last=False)
+        return tree
+
+    def route(self, start, dest, min_security=None, max_security=None):
+        """Returns a shortest-path route between two systems.
+
+        Both start and dest can be either exact system names or
+        system IDs. Intermediate systems can be limited to a range
+        of security status with min_security and max_security.
+
+        Returns an empty list if dest cannot be reached, like
+        EVECentral.route(); use jumps() to tell that apart from a route
+        to start itself.
+        """
+        start = self._ordinal(start)
+        dest = self._ordinal(dest)
+        previous, distance = self._tree(start, min_security, max_security)
+        if distance[dest] == -1:
+            return []
+
+        path = [dest]
+        while path[-1] != start:
+            path.append(previous[path[-1]])
+        path.reverse()
+
+        results = []
+        for from_o, to_o in zip(path, path[1:]):
+            results.append({
+                'from': {
+                    'id': self.ids[from_o],
+                    'name': self.names[from_o],
+                },
+                'to': {
+                    'id': self.ids[to_o],
+                    'name': self.names[to_o],
+                },
+                'security_change': (_security_class(self.security[from_o]) !=
+                    _security_class(self.security[to_o])),
+            })
+        return results
+
+    def jumps(self, start, dest, min_security=None, max_security=None):
+        """Return the number of jumps between two systems, or None."""
+        dest = self._ordinal(dest)
+        _, distance = self._tree(self._ordinal(start), min_security, max_security)
+        return distance[dest] if distance[dest] != -1 else None
+
+    def systems_within(self, start, jumps, min_security=None, max_security=None):
+        """Return {system_id: jumps} for every system at most 'jumps' away."""
+        _, distance = self._tree(self._ordinal(start), min_security, max_security)
+        return dict((self.ids[o], d) for o, d in enumerate(distance)
+                    if d != -1 and d <= jumps)
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,247 @@
+"""Refresh API data as soon as the cache allows, and no sooner."""
+
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+from evelink import api as evelink_api
+
+_log = logging.getLogger('evelink.scheduler')
+
+
+class Subscription(object):
+    """One endpoint that a RefreshScheduler keeps fresh."""
+
+    def __init__(self, sub_id, endpoint, params, api_key, callback):
+        self.id = sub_id
+        self.endpoint = endpoint
+        self.params = params
+        self.api_key = api_key
+        self.callback = callback
+        self.next_run = None
+        self.running = False
+        self.cancelled = False
+        self.last_result = None
+        self.last_error = None
+
+
+class RefreshScheduler(object):
+    """Refreshes subscribed endpoints just after their cache expires.
+
+    An endpoint is either an API path such as 'char/WalletJournal',
+    requested with the given params and API key, or a callable such as
+    a bound evelink method, called with the params as keyword
+    arguments. Either way, it must produce an APIResult.
+
+    Subscriptions wait in a priority queue ordered by when their data
+    expires. Each one runs 'delay' seconds after its cachedUntil, plus
+    a random jitter of up to 'jitter' seconds so that keys expiring
+    together don't all refresh at once. Refreshes run on a pool of at
+    most 'max_workers' threads (or inline, when concurrent.futures is
+    not available). Failed refreshes are retried when the error says
+    the API will have fresh data, or after 'retry_delay' seconds.
+
+    Expiry times are taken relative to the API's currentTime, so clock
+    skew between us and the API server does not matter. Results served
+    from the cache are refreshed just after their cachedUntil too,
+    rather than a whole cache lifetime later.
+    """
+
+    def __init__(self, api=None, max_workers=4, delay=1.0, jitter=30.0,
+                 retry_delay=300.0):
+        self.api = api or evelink_api.API()
+        self.max_workers = max_workers
+        self.delay = delay
+        self.jitter = jitter
+        self.retry_delay = retry_delay
+
+        self._subscriptions = {}
+        self._queue = []
+        self._ids = itertools.count(1)
+        self._order = itertools.count()
+        self._apis = {}
+        self._clock_offset = None
+        self._condition = threading.Condition()
+        self._executor = None
+        self._stopped = False
+
+    def subscribe(self, endpoint, params=None, api_key=None, callback=None):
+        """Add an endpoint to keep fresh, and return its subscription ID.
+
+        The first refresh runs as soon as possible. callback, if given,
+        is called as callback(subscription, api_result, error) after
+        every refresh, with exactly one of api_result and error set.
+        """
+        with self._condition:
+            sub = Subscription(next(self._ids), endpoint, dict(params or {}),
+                api_key, callback)
+            self._subscriptions[sub.id] = sub
+            self._push(sub, time.time())
+            self._condition.notify()
+        return sub.id
+
+    def unsubscribe(self, sub_id):
+        """Stop refreshing a subscription."""
+        with self._condition:
+            sub = self._subscriptions.pop(sub_id, None)
+            if sub is not None:
+                sub.cancelled = True
+
+    def subscription(self, sub_id):
+        return self._subscriptions[sub_id]
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def _push(self, sub, when):
+        sub.next_run = when
+        heapq.heappush(self._queue, (when, next(self._order), sub))
+
+    def _api_for(self, api_key):
+        """Return an API for a key, sharing everything else with self.api."""
+        if api_key is None:
+            return self.api
+        api = self._apis.get(api_key)
+        if api is None:
+            api = self._apis[api_key] = self.api.clone(api_key=api_key)
+        return api
+
+    def _api_time(self, now, api, timestamp, expires):
+        """Estimate the API server's current time.
+
+        A response fetched just now carries the server's currentTime,
+        and tells us how far our clock is from it. A cached one carries
+        the time it was first fetched, so our clock is used instead,
+        corrected by the last offset seen.
+        """
+        fresh = (api is not None and not api.last_cached and api.last_timestamps ==
+            {'current_time': timestamp, 'cached_until': expires})
+        if fresh:
+            self._clock_offset = timestamp - now
+            return timestamp
+        return now + (self._clock_offset or 0)
+
+    def _next_run(self, now, result=None, error=None, api=None):
+        source = result if result is not None else error
+        timestamp = getattr(source, 'timestamp', None)
+        expires = getattr(source, 'expires', None)
+        if timestamp is None or expires is None:
+            return now + self.retry_delay
+        remaining = expires - self._api_time(now, api, timestamp, expires)
+        return now + max(remaining, 0) + self.delay + random.uniform(0, self.jitter)
+
+    def _refresh(self, sub):
+        result = error = None
+        if callable(sub.endpoint):
+            # Bound evelink methods report their timestamps on their
+            # client's API.
+            api = getattr(getattr(sub.endpoint, '__self__', None), 'api', None)
+            if not isinstance(api, evelink_api.API):
+                api = self.api
+        else:
+            with self._condition:
+                api = self._api_for(sub.api_key)
+        try:
+            if callable(sub.endpoint):
+                result = sub.endpoint(**sub.params)
+            else:
+                result = api.get(sub.endpoint, sub.params)
+        except Exception as e:
+            _log.warning("Refreshing %r failed: %r", sub.endpoint, e)
+            error = e
+
+        now = time.time()
+        with self._condition:
+            sub.running = False
+            sub.last_result = result
+            sub.last_error = error
+            if not sub.cancelled:
+                self._push(sub, self._next_run(now, result, error, api))
+                self._condition.notify()
+
+        if sub.callback is not None:
+            try:
+                sub.callback(sub, result, error)
+            except Exception:
+                _log.exception("Callback for %r failed", sub.endpoint)
+
+    def _submit(self, sub):
+        if self._executor is None and self.max_workers > 1:
+            try:
+                from concurrent import futures
+            except ImportError:
+                _log.info('`futures` not available, refreshing serially')
+                self.max_workers = 1
+            else:
+                self._executor = futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        if self._executor is not None:
+            self._executor.submit(self._refresh, sub)
+        else:
+            self._refresh(sub)
+
+    def _pop_due(self, now):
+        """Remove and return the subscriptions due at 'now'."""
+        due = []
+        with self._condition:
+            while self._queue and self._queue[0][0] <= now:
+                when, _, sub = heapq.heappop(self._queue)
+                if sub.cancelled or sub.running or sub.next_run != when:
+                    continue
+                sub.running = True
+                due.append(sub)
+        return due
+
+    def run_pending(self, now=None):
+        """Start the refreshes that are due, and return how many were started."""
+        due = self._pop_due(time.time() if now is None else now)
+        for sub in due:
+            self._submit(sub)
+        return len(due)
+
+    def seconds_until_next(self, now=None):
+        """Return the time until the next refresh is due, or None."""
+        now = time.time() if now is None else now
+        with self._condition:
+            # Drop entries for cancelled or rescheduled subscriptions.
+            while self._queue:
+                when, _, sub = self._queue[0]
+                if not sub.cancelled and sub.next_run == when:
+                    return max(when - now, 0)
+                heapq.heappop(self._queue)
+        return None
+
+    def run(self):
+        """Run refreshes as they come due, until stop() is called."""
+        while True:
+            self.run_pending()
+            with self._condition:
+                if self._stopped:
+                    break
+                wait = self.seconds_until_next()
+                self._condition.wait(wait)
+                if self._stopped:
+                    break
+
+    def start(self):
+        """Run the scheduler in a background thread, and return the thread."""
+        with self._condition:
+            self._stopped = False
+        thread = threading.Thread(target=self.run, name='evelink-scheduler')
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def stop(self, wait=True):
+        """Stop run(), and shut down the worker pool."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,192 @@
+"""Capture profiles and payloads of slow API method calls.
+
+An API created with slow_calls=SlowCallRecorder(directory) times every
+auto_call method (the request and the parsing). Calls that take longer
+than the threshold leave a capture in the directory, made up of files
+sharing one name:
+
+- <name>.json: the path, the params (with the vCode removed), the
+  duration and the size of the response;
+- <name>.prof: a cProfile profile (load it with pstats), or
+  <name>.folded: sampled stacks in the 'folded' format used by
+  flame graph tools, if a profiler is set;
+- <name>.xml: the <result> payload (the whole response, for responses
+  parsed in a parse_pool), if save_payload is set.
+
+Only the newest 'keep' captures are kept.
+"""
+
+import collections
+import cProfile
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+from evelink import xml_backends
+from evelink.thirdparty import six
+
+_log = logging.getLogger('evelink.slowcalls')
+
+PROFILERS = ('cprofile', 'sample', None)
+
+_REDACTED_PARAMS = ('vCode',)
+
+
+class _StackSampler(threading.Thread):
+    """Periodically samples the stack of another thread."""
+
+    def __init__(self, thread_id, interval):
+        super(_StackSampler, self).__init__()
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('%s (%s:%d)' % (
+                    code.co_name, os.path.basename(code.co_filename), frame.f_lineno))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def folded(self):
+        return ''.join('%s %d\n' % (stack, count)
+                       for stack, count in sorted(self.stacks.items()))
+
+
+class SlowCallRecorder(object):
+    """Profiles API method calls and keeps the ones that were slow.
+
+    profiler:
+        None (the default) to only record timings and sizes, 'cprofile'
+        to profile each call with cProfile (thorough, but slows every
+        call down), or 'sample' to sample the calling thread's stack
+        every sample_interval seconds. Sampling starts a thread per
+        call, about 0.1ms, so it only suits calls that are slow anyway.
+    """
+
+    def __init__(self, directory, threshold=1.0, profiler=None, keep=50,
+                 save_payload=False, sample_interval=0.005):
+        if profiler not in PROFILERS:
+            raise ValueError("profiler must be one of %r" % (PROFILERS,))
+        self.directory = directory
+        self.threshold = threshold
+        self.profiler = profiler
+        self.keep = keep
+        self.save_payload = save_payload
+        self.sample_interval = sample_interval
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def record(self, path, params, func):
+        """Call func() and capture it if it is slow.
+
+        func() must return a (result, payload) tuple, and record()
+        returns the result. payload is what the call worked on, saved
+        with save_payload and used for the size: the raw response, the
+        <result> element, or None.
+        """
+        profile = sampler = None
+        if self.profiler == 'cprofile':
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already active in this process.
+                profile = None
+        elif self.profiler == 'sample':
+            sampler = _StackSampler(threading.current_thread().ident, self.sample_interval)
+            sampler.start()
+
+        start = time.time()
+        payload = None
+        try:
+            result, payload = func()
+            return result
+        finally:
+            elapsed = time.time() - start
+            if profile is not None:
+                profile.disable()
+            if sampler is not None:
+                sampler.stop()
+            if elapsed >= self.threshold:
+                try:
+                    self._save(path, params, elapsed, payload, profile, sampler)
+                except Exception:
+                    _log.exception("Failed to save slow call capture for %s", path)
+
+    def _save(self, path, params, elapsed, payload, profile, sampler):
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            if not os.path.isdir(self.directory):
+                raise
+
+        name = '%s-%s-%d-%06d' % (time.strftime('%Y%m%d-%H%M%S'),
+            path.replace('/', '.'), os.getpid(), next(self._counter))
+        base = os.path.join(self.directory, name)
+
+        if isinstance(payload, six.text_type):
+            payload = payload.encode('utf-8')
+        elif payload is not None and not isinstance(payload, bytes):
+            payload = xml_backends.tostring(payload)
+
+        info = {
+            'path': path,
+            'params': dict((k, v) for k, v in (params or {}).items()
+                           if k not in _REDACTED_PARAMS),
+            'seconds': elapsed,
+            'threshold': self.threshold,
+            'response_bytes': len(payload) if payload is not None else None,
+            'profiler': self.profiler,
+            'time': time.time(),
+        }
+        with open(base + '.json', 'w') as f:
+            json.dump(info, f, indent=2, sort_keys=True)
+
+        if profile is not None:
+            profile.dump_stats(base + '.prof')
+        if sampler is not None:
+            with open(base + '.folded', 'w') as f:
+                f.write(sampler.folded())
+        if self.save_payload and payload is not None:
+            with open(base + '.xml', 'wb') as f:
+                f.write(payload)
+
+        _log.warning("Slow call to %s took %.2fs; captured in %s", path, elapsed, base)
+        self._rotate()
+
+    def captures(self):
+        """Return the names of the saved captures, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        # Names start with the capture time, so they sort chronologically.
+        return sorted(set(os.path.splitext(f)[0] for f in os.listdir(self.directory)
+                          if f.endswith('.json')))
+
+    def _rotate(self):
+        with self._lock:
+            captures = self.captures()
+            for name in captures[:max(len(captures) - self.keep, 0)]:
+                for ext in ('.json', '.prof', '.folded', '.xml'):
+                    try:
+                        os.remove(os.path.join(self.directory, name + ext))
+                    except OSError:
+                        pass
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,313 @@
+"""Snapshots of rarely changing EVE data that load without the API."""
+
+import json
+import mmap
+import pickle
+import struct
+
+from evelink import api
+from evelink import eve
+
+
+# Bumped whenever the layout of a serialized snapshot changes.
+SNAPSHOT_VERSION = 1
+
+
+def _prerequisite_closure(direct):
+    """Compute the transitive prerequisites of every skill.
+
+    direct:
+        a dict mapping skill ID to a dict of {required skill ID: level}
+
+    Returns a dict of the same shape where each skill maps to every
+    skill needed to train it, directly or indirectly, at the highest
+    level required along any path.
+    """
+    closure = {}
+
+    def visit(skill_id, visiting):
+        if skill_id in closure:
+            return closure[skill_id]
+        required = {}
+        # Guard against malformed data; the real tree is acyclic.
+        visiting.add(skill_id)
+        for req_id, level in direct.get(skill_id, {}).items():
+            required[req_id] = max(level, required.get(req_id, 0))
+            if req_id in visiting:
+                continue
+            for sub_id, sub_level in visit(req_id, visiting).items():
+                required[sub_id] = max(sub_level, required.get(sub_id, 0))
+        visiting.discard(skill_id)
+        closure[skill_id] = required
+        return required
+
+    for skill_id in direct:
+        visit(skill_id, set())
+    return closure
+
+
+class SkillTree(object):
+    """A precompiled snapshot of the EVE skill tree.
+
+    The snapshot is built once from the result of EVE.skill_tree() and
+    saved to disk; loading it later does not touch the API or any XML.
+    Skills are kept as flat tuples, and the transitive prerequisites of
+    every skill are precomputed, so 'all skills required for X' is a
+    single lookup.
+
+    Snapshots returned by load() are read lazily, on first use.
+    """
+
+    def __init__(self, data=None, path=None):
+        self._data = data
+        self._path = path
+
+    @classmethod
+    def from_result(cls, groups):
+        """Build a snapshot from the result of EVE.skill_tree()."""
+        snapshot_groups = {}
+        skills = {}
+        direct = {}
+        for group_id, group in groups.items():
+            snapshot_groups[group_id] = (group['name'], tuple(sorted(group['skills'])))
+            for skill_id, skill in group['skills'].items():
+                skills[skill_id] = (
+                    skill['group_id'],
+                    skill['name'],
+                    skill['published'],
+                    skill['description'],
+                    skill['rank'],
+                    skill['attributes']['primary'],
+                    skill['attributes']['secondary'],
+                    tuple((r['id'], r['level']) for r in skill['required_skills'].values()),
+                    tuple((b['type'], b['value']) for b in skill['bonuses'].values()),
+                )
+                direct[skill_id] = dict(
+                    (r['id'], r['level']) for r in skill['required_skills'].values())
+
+        closure = _prerequisite_closure(direct)
+        prerequisites = dict(
+            (skill_id, tuple(sorted(required.items())))
+            for skill_id, required in closure.items())
+
+        return cls(data={
+            'version': SNAPSHOT_VERSION,
+            'groups': snapshot_groups,
+            'skills': skills,
+            'prerequisites': prerequisites,
+        })
+
+    @classmethod
+    def load(cls, path):
+        """Return a snapshot that is read from 'path' on first use."""
+        return cls(path=path)
+
+    def save(self, path):
+        """Write the snapshot to 'path'."""
+        with open(path, 'wb') as f:
+            pickle.dump(self.data, f, 2)
+
+    @property
+    def data(self):
+        if self._data is None:
+            with open(self._path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') != SNAPSHOT_VERSION:
+                raise ValueError("Unsupported skill tree snapshot version: %r"
+                    % data.get('version'))
+            self._data = data
+        return self._data
+
+    def __contains__(self, skill_id):
+        return skill_id in self.data['skills']
+
+    def skill(self, skill_id):
+        """Return a skill dict in the format used by EVE.skill_tree()."""
+        skills = self.data['skills']
+        (group_id, name, published, description, rank,
+            primary, secondary, required, bonuses) = skills[skill_id]
+
+        required_skills = {}
+        for req_id, level in required:
+            req = skills.get(req_id)
+            required_skills[req_id] = {
+                'id': req_id,
+                'level': level,
+                'name': req[1] if req else None,
+            }
+
+        return {
+            'id': skill_id,
+            'group_id': group_id,
+            'name': name,
+            'published': published,
+            'description': description,
+            'rank': rank,
+            'required_skills': required_skills,
+            'bonuses': dict(
+                (t, {'type': t, 'value': v}) for t, v in bonuses),
+            'attributes': {
+                'primary': primary,
+                'secondary': secondary,
+            },
+        }
+
+    def prerequisites(self, skill_id):
+        """Return {skill_id: level} for every skill required to train 'skill_id'.
+
+        This includes indirect requirements, each at the highest level
+        that any skill in the chain requires.
+        """
+        return dict(self.data['prerequisites'].get(skill_id, ()))
+
+    def groups(self):
+        """Return the full skill tree in the format used by EVE.skill_tree()."""
+        results = {}
+        for group_id, (name, skill_ids) in self.data['groups'].items():
+            results[group_id] = {
+                'id': group_id,
+                'name': name,
+                'skills': dict((s, self.skill(s)) for s in skill_ids),
+            }
+        return results
+
+
+def build_skill_tree(path, eve):
+    """Fetch the skill tree through 'eve' (an EVE instance) and save a snapshot.
+
+    Returns the SkillTree that was written.
+    """
+    api_result = eve.skill_tree()
+    snapshot = SkillTree.from_result(api_result.result)
+    snapshot.save(path)
+    return snapshot
+
+
+# The EVE methods whose results are written into a static bundle.
+BUNDLED_METHODS = (
+    'alliances',
+    'conquerable_stations',
+    'errors',
+    'reference_types',
+    'skill_tree',
+)
+
+_BUNDLE_MAGIC = b'EVELINK-STATIC\n'
+_BUNDLE_HEADER = struct.Struct('>I')
+
+
+def build_bundle(path, eve, methods=BUNDLED_METHODS):
+    """Fetch rarely changing data through 'eve' and write it to one file.
+
+    The file holds a small JSON index followed by one pickled section
+    per method, so a StaticBundle can unpickle just the sections that
+    are used. The skill tree is stored as a SkillTree snapshot.
+    """
+    sections = []
+    for name in methods:
+        api_result = getattr(eve, name)()
+        result = api_result.result
+        if name == 'skill_tree':
+            result = SkillTree.from_result(result).data
+        payload = pickle.dumps(result, 2)
+        sections.append((name, payload, api_result.timestamp, api_result.expires))
+
+    index = {'version': SNAPSHOT_VERSION, 'sections': {}}
+    offset = 0
+    for name, payload, timestamp, expires in sections:
+        index['sections'][name] = [offset, len(payload), timestamp, expires]
+        offset += len(payload)
+    index_data = json.dumps(index, sort_keys=True).encode('utf-8')
+
+    with open(path, 'wb') as f:
+        f.write(_BUNDLE_MAGIC)
+        f.write(_BUNDLE_HEADER.pack(len(index_data)))
+        f.write(index_data)
+        for name, payload, timestamp, expires in sections:
+            f.write(payload)
+
+
+class StaticBundle(object):
+    """Read-only access to a file written by build_bundle().
+
+    The file is memory-mapped when opened and each section is only
+    unpickled the first time it is requested.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic_end = len(_BUNDLE_MAGIC)
+        if self._map[:magic_end] != _BUNDLE_MAGIC:
+            raise ValueError("%r is not an evelink static bundle" % path)
+        header_end = magic_end + _BUNDLE_HEADER.size
+        index_length, = _BUNDLE_HEADER.unpack(self._map[magic_end:header_end])
+        index = json.loads(self._map[header_end:header_end + index_length].decode('utf-8'))
+        if index['version'] != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported static bundle version: %r" % index['version'])
+
+        self._data_start = header_end + index_length
+        self._sections = index['sections']
+        self._loaded = {}
+
+    def __contains__(self, name):
+        return name in self._sections
+
+    def close(self):
+        self._map.close()
+
+    def _section(self, name):
+        if name not in self._loaded:
+            offset, length, _, _ = self._sections[name]
+            start = self._data_start + offset
+            self._loaded[name] = pickle.loads(self._map[start:start + length])
+        return self._loaded[name]
+
+    def skill_tree(self):
+        """Return the bundled skill tree as a SkillTree snapshot."""
+        return SkillTree(data=self._section('skill_tree'))
+
+    def get(self, name):
+        """Return the bundled APIResult for the named EVE method."""
+        _, _, timestamp, expires = self._sections[name]
+        if name == 'skill_tree':
+            result = self.skill_tree().groups()
+        else:
+            result = self._section(name)
+        return api.APIResult(result, timestamp, expires)
+
+
+def _bundled(name):
+    method = getattr(eve.EVE, name)
+
+    def wrapper(self, *args, **kwargs):
+        if 'api_result' not in kwargs and name in self.bundle:
+            return self.bundle.get(name)
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+class StaticEVE(eve.EVE):
+    """An EVE wrapper that answers bundled methods from a StaticBundle.
+
+    Methods that are not in the bundle still go through the API.
+    """
+
+    def __init__(self, bundle, api=None):
+        super(StaticEVE, self).__init__(api=api)
+        if not isinstance(bundle, StaticBundle):
+            bundle = StaticBundle(bundle)
+        self.bundle = bundle
+
+    alliances = _bundled('alliances')
+    conquerable_stations = _bundled('conquerable_stations')
+    errors = _bundled('errors')
+    reference_types = _bundled('reference_types')
+    skill_tree = _bundled('skill_tree')
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -1,26 +1,161 @@
 import datetime
+import hashlib
 import json
+import threading
 from xml.etree import ElementTree
 
+from evelink import api as evelink_api
 from evelink.thirdparty.six.moves import urllib
 
 
+class OrderBook(object):
+    """Market orders for one item, sorted by price on each side.
+
+    Built from the result of EVECentral.item_orders(). Buy orders are
+    sorted from the highest price down and sell orders from the lowest
+    price up, so the best order on either side comes first. Orders are
+    also grouped per station and per region, keeping that order.
+    """
+
+    SIDES = ('buy', 'sell')
+
+    def __init__(self, item_orders):
+        self.id = item_orders['id']
+        self.name = item_orders['name']
+        self._orders = {}
+        self._stations = {}
+        self._regions = {}
+        for side in self.SIDES:
+            orders = sorted(item_orders['orders'][side].values(),
+                key=lambda o: (o['price'], o['id']), reverse=(side == 'buy'))
+            stations = self._stations[side] = {}
+            regions = self._regions[side] = {}
+            for order in orders:
+                stations.setdefault(order['station']['id'], []).append(order)
+                regions.setdefault(order['region_id'], []).append(order)
+            self._orders[side] = orders
+
+    def _check_side(self, side):
+        if side not in self.SIDES:
+            raise ValueError("Unknown order side: %r" % (side,))
+
+    def orders(self, side, station_id=None, region_id=None):
+        """Return the orders on one side, best price first.
+
+        Optionally limited to one station or one region.
+        """
+        self._check_side(side)
+        if station_id is not None:
+            return self._stations[side].get(station_id, [])
+        if region_id is not None:
+            return self._regions[side].get(region_id, [])
+        return self._orders[side]
+
+    def stations(self, side):
+        """Return the IDs of the stations with orders on one side."""
+        self._check_side(side)
+        return sorted(self._stations[side])
+
+    def best(self, side, station_id=None, region_id=None):
+        """Return the best-priced order on one side, or None."""
+        orders = self.orders(side, station_id=station_id, region_id=region_id)
+        return orders[0] if orders else None
+
+    def spread(self, station_id=None, region_id=None):
+        """Return the lowest sell price minus the highest buy price, or None."""
+        bid = self.best('buy', station_id=station_id, region_id=region_id)
+        ask = self.best('sell', station_id=station_id, region_id=region_id)
+        if bid is None or ask is None:
+            return None
+        return ask['price'] - bid['price']
+
+    def depth(self, side, quantity=None, price_limit=None, stations=None):
+        """Walk one side of the book from the best price.
+
+        Stops once 'quantity' units are filled, or at the first order
+        priced worse than 'price_limit'. 'stations' limits the walk to
+        a collection of station IDs, e.g. those within a number of jumps.
+
+        Returns a dict with the filled 'volume', the volume-weighted
+        'average' price and the 'worst' price reached (both None if
+        nothing was filled).
+        """
+        self._check_side(side)
+        volume = 0
+        cost = 0.0
+        worst = None
+        for order in self._orders[side]:
+            if quantity is not None and volume >= quantity:
+                break
+            price = order['price']
+            if price_limit is not None and (
+                    price < price_limit if side == 'buy' else price > price_limit):
+                break
+            if stations is not None and order['station']['id'] not in stations:
+                continue
+            take = order['volume']['remaining']
+            if quantity is not None:
+                take = min(take, quantity - volume)
+            volume += take
+            cost += take * price
+            worst = price
+
+        return {
+            'volume': volume,
+            'average': cost / volume if volume else None,
+            'worst': worst,
+        }
+
+
 class EVECentral(object):
 
     def __init__(self, url_fetch_func=None,
-        api_base='http://api.eve-central.com/api'):
+        api_base='http://api.eve-central.com/api', router=None,
+        cache=None, max_workers=4, max_url_length=2000, api=None):
         super(EVECentral, self).__init__()
 
+        # Requests go through the same transport as the EVE API; see
+        # _get_api().
+        self.api = api
+        self._api_lock = threading.Lock()
+
         self.api_base = api_base
+        # An optional evelink.routing.Router that answers route() locally.
+        self.router = router
 
         if url_fetch_func is not None:
             self.url_fetch = url_fetch_func
         else:
             self.url_fetch = self._default_fetch_func
 
+        # Market stats are only cached when a cache is given.
+        if cache is not None and not isinstance(cache, evelink_api.APICache):
+            raise ValueError("The provided cache must subclass from APICache.")
+        self.cache = cache
+        # Seconds for which the market stats of a type are cached.
+        self.cachetime = 900
+
+        self.max_workers = max_workers
+        self.max_url_length = max_url_length
+
+    def _get_api(self):
+        """Return the API whose transport requests go through.
+
+        It is only created when first needed, so none is built when a
+        url_fetch_func is given.
+        """
+        if self.api is None:
+            with self._api_lock:
+                if self.api is None:
+                    self.api = evelink_api.API()
+        return self.api
+
     def _default_fetch_func(self, url):
         """Fetches a given URL using GET and returns the response."""
-        return urllib.request.urlopen(url).read()
+        api = self._get_api()
+        response, robj = api.send_request(url, None)
+        api.maybe_raise_http_error(robj)
+        return response
 
     def market_stats(self, type_ids, hours=24, regions=None, system=None,
         quantity_threshold=None):
@@ -31,20 +166,82 @@ class EVECentral(object):
             regions (list of ints) - Region id(s) for which to compute stats.
             systems (int) - System id for which to compute stats.
             quantity_threshold (int) - minimum size of order to consider.
+
+        With a cache, stats are cached per type and set of filters for
+        'cachetime' seconds, and only uncached types are requested. The
+        types are split into as many requests as needed to keep URLs
+        under 'max_url_length', which are sent concurrently.
         """
 
-        params = [('typeid', type_ids), ('hours', hours)]
+        filters = [('hours', hours)]
         if regions:
-            params.append(('regionlimit', regions))
+            filters.append(('regionlimit', regions))
         if system:
-            params.append(('usesystem', system))
+            filters.append(('usesystem', system))
         if quantity_threshold:
-            params.append(('minQ', quantity_threshold))
+            filters.append(('minQ', quantity_threshold))
 
-        query = urllib.parse.urlencode(params, True)
-        url = '%s/marketstat?%s' % (self.api_base, query)
+        results = {}
+        seen = set()
+        missing = []
+        for type_id in type_ids:
+            type_id = int(type_id)
+            if type_id in seen:
+                continue
+            seen.add(type_id)
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.get(self._stats_cache_key(type_id, filters))
+            if cached is not None:
+                results[type_id] = cached
+            else:
+                missing.append(type_id)
+
+        chunks = self._chunk_type_ids(missing, filters)
+        for chunk_results in evelink_api.map_concurrently(
+                lambda chunk: self._fetch_market_stats(chunk, filters),
+                chunks, self.max_workers):
+            for type_id, type_result in chunk_results.items():
+                if self.cache is not None:
+                    self.cache.put(self._stats_cache_key(type_id, filters),
+                        type_result, self.cachetime)
+                results[type_id] = type_result
 
-        response = self.url_fetch(url)
+        return results
+
+    def _stats_cache_key(self, type_id, filters):
+        key = str(['marketstat', type_id, filters])
+        return 'evec-%s' % hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def _market_stats_url(self, type_ids, filters):
+        params = [('typeid', type_ids)] + filters
+        query = urllib.parse.urlencode(params, True)
+        return '%s/marketstat?%s' % (self.api_base, query)
+
+    def _chunk_type_ids(self, type_ids, filters):
+        """Split type_ids into lists whose marketstat URLs fit max_url_length."""
+        base_length = len(self._market_stats_url([], filters))
+        chunks = []
+        chunk = []
+        length = base_length
+        for type_id in type_ids:
+            param_length = len('&typeid=%d' % type_id)
+            if chunk and length + param_length > self.max_url_length:
+                chunks.append(chunk)
+                chunk = []
+                length = base_length
+            chunk.append(type_id)
+            length += param_length
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def _fetch_market_stats(self, type_ids, filters):
+        response = self.url_fetch(self._market_stats_url(type_ids, filters))
+        return self._parse_market_stats(response)
+
+    def _parse_market_stats(self, response):
+        """Parse a marketstat response into a dict keyed by type ID."""
         api_result = ElementTree.fromstring(response)
 
         results = {}
@@ -100,6 +297,14 @@ class EVECentral(object):
         response = self.url_fetch(url)
         return self._parse_item_orders(response)
 
+    def order_book(self, type_id, **filters):
+        """Fetches market orders for a given item as an OrderBook.
+
+        Accepts the same optional filters as item_orders().
+        """
+
+        return OrderBook(self.item_orders(type_id, **filters))
+
     def item_orders_on_route(self, type_id, start, dest, hours=360,
         quantity_threshold=None):
         """Fetches market orders for a given item along a shortest-path route.
@@ -135,6 +340,10 @@ class EVECentral(object):
             'orders': {},
         }
 
+        # EVE-Central only reports the month and day of each order, so
+        # the year is filled in relative to a single 'now'.
+        now = datetime.datetime.now()
+
         for act in ('buy', 'sell'):
             sub_result = {}
             for order in res.find('%s_orders' % act).findall('order'):
@@ -166,9 +375,8 @@ class EVECentral(object):
                 # Correct errors due to EVE-Central only reporting the month
                 # and day of the report, not the year. (Assumes reports are
                 # never from the future and never older than a year.)
-                this_year = datetime.datetime.now().year
-                o['reported'] = o['reported'].replace(year=this_year)
-                if o['reported'] > datetime.datetime.now():
+                o['reported'] = o['reported'].replace(year=now.year)
+                if o['reported'] > now:
                     previous_year = o['reported'].year - 1
                     o['reported'] = o['reported'].replace(year=previous_year)
 
@@ -183,11 +391,19 @@ class EVECentral(object):
 
         Both start and dest can be either exact system names or
         system IDs.
+
+        If this instance has a router, the route is computed locally
+        instead of being requested from EVE-Central.
         """
 
+        if self.router is not None:
+            return self.router.route(start, dest)
+
         url = '%s/route/from/%s/to/%s' % (self.api_base, start, dest)
         response = self.url_fetch(url)
 
+        if isinstance(response, bytes):
+            response = response.decode('utf-8')
         stops = json.loads(response)
 
         results = []
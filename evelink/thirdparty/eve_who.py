@@ -1,9 +1,12 @@
+import hashlib
 import json
 import re
 import logging
+import threading
+import time
 from time import sleep
 
-from evelink import api
+from evelink import api as evelink_api
 
 from evelink.thirdparty.six.moves import urllib
 
@@ -15,33 +18,81 @@ class FetchError(Exception):
     pass
 
 
+_HAMMERING = re.compile("^hammering a website isn't very nice ya know.... please wait (\d+) seconds")
+
+
 class EVEWho(object):
     def __init__(self, url_fetch_func=None, cache=None, wait=True,
-                 api_base='http://evewho.com/api.php'):
+                 api_base='http://evewho.com/api.php', max_workers=4, api=None):
         super(EVEWho, self).__init__()
 
+        # Requests go through the same transport as the EVE API; see
+        # _get_api().
+        self.api = api
+        self._api_lock = threading.Lock()
+
         self.api_base = api_base
         self.wait = wait
+        # Number of member list pages fetched at the same time.
+        self.max_workers = max_workers
+
+        # When EVEWho asks us to back off, every request waits until
+        # this time, not just the one that was told to.
+        self._backoff_lock = threading.Lock()
+        self._backoff_until = 0
 
         if url_fetch_func is not None:
             self.url_fetch = url_fetch_func
         else:
             self.url_fetch = self._default_fetch_func
 
-        cache = cache or api.APICache()
-        if not isinstance(cache, api.APICache):
+        # Pages are only cached when a cache is given.
+        if cache is not None and not isinstance(cache, evelink_api.APICache):
             raise ValueError("The provided cache must subclass from APICache.")
         self.cache = cache
         self.cachetime = 3600
 
+    def _get_api(self):
+        """Return the API whose transport requests go through.
+
+        It is only created when first needed, so none is built when a
+        url_fetch_func is given.
+        """
+        if self.api is None:
+            with self._api_lock:
+                if self.api is None:
+                    self.api = evelink_api.API()
+        return self.api
+
     def _default_fetch_func(self, url):
         """Fetches a given URL using GET and returns the response."""
-        return urllib.request.urlopen(url).read()
+        api = self._get_api()
+        response, robj = api.send_request(url, None)
+        api.maybe_raise_http_error(robj)
+        if isinstance(response, bytes):
+            response = response.decode('utf-8')
+        return response
 
     def _cache_key(self, path, params):
         sorted_params = sorted(params.items())
         # Paradoxically, Shelve doesn't like integer keys.
-        return str(hash((path, tuple(sorted_params))))
+        # hash() is randomized per process, so use a stable digest to
+        # allow persistent caches to hit across restarts.
+        return 'evewho-%s' % hashlib.sha1(
+            str([path, sorted_params]).encode('utf-8')).hexdigest()
+
+    def _backoff(self, seconds):
+        """Make all requests wait at least 'seconds' from now."""
+        with self._backoff_lock:
+            self._backoff_until = max(self._backoff_until, time.time() + seconds)
+
+    def _wait_for_backoff(self):
+        while True:
+            with self._backoff_lock:
+                remaining = self._backoff_until - time.time()
+            if remaining <= 0:
+                return
+            sleep(remaining)
 
     def _get(self, ext_id, api_type, page=0):
         """Request page from EveWho api."""
@@ -51,10 +102,12 @@ class EVEWho(object):
                   'page': page}
 
         key = self._cache_key(path, params)
-        cached_result = self.cache.get(key)
+        cached_result = None
+        if self.cache is not None:
+            cached_result = self.cache.get(key)
         if cached_result is not None:
             # Cached APIErrors should be re-raised
-            if isinstance(cached_result, api.APIError):
+            if isinstance(cached_result, evelink_api.APIError):
                 _log.error("Raising cached error: %r" % cached_result)
                 raise cached_result
                 # Normal cached results get returned
@@ -65,21 +118,23 @@ class EVEWho(object):
         url = '%s?%s' % (path, query)
         response = None
 
-        regexp = re.compile("^hammering a website isn't very nice ya know.... please wait (\d+) seconds")
         hammering = True
         while hammering:
+            if self.wait:
+                self._wait_for_backoff()
             response = self.url_fetch(url)
-            hammering = regexp.findall(response)
+            hammering = _HAMMERING.findall(response)
             if hammering:
                 if self.wait:
                     _log.debug("Fetch page waiting: %s (%s)" % (url, response))
-                    sleep(int(hammering[0]))
+                    self._backoff(int(hammering[0]))
                 else:
                     _log.error("Fetch page error: %s (%s)" % (url, response))
                     raise FetchError(response)
 
         result = json.loads(response)
-        self.cache.put(key, result, self.cachetime)
+        if self.cache is not None:
+            self.cache.put(key, result, self.cachetime)
         return result
 
     def _member_list(self, ext_id, api_type):
@@ -90,24 +145,25 @@ class EVEWho(object):
         if api_type not in ['corplist', 'allilist']:
             raise ValueError("not valid api type - valid api types: 'corplist' and 'allilist'.")
 
-        member_count = 0
-        page = 0
-        members = []
-        while page <= (member_count // 200):
-            data = self._get(ext_id, api_type, page)
-
-            info = data['info']
-            if info:
-                member_count = int(info['member_count']) - 1    # workaround for numbers divisible by 200
-            else:
-                return members
+        # The first page tells us how many more there are; the rest
+        # are fetched concurrently.
+        pages = [self._get(ext_id, api_type, 0)]
+        info = pages[0]['info']
+        if info:
+            member_count = int(info['member_count']) - 1    # workaround for numbers divisible by 200
+            pages.extend(evelink_api.map_concurrently(
+                lambda page: self._get(ext_id, api_type, page),
+                range(1, member_count // 200 + 1), self.max_workers))
 
+        members = []
+        for data in pages:
+            if not data['info']:
+                break
             for member in data['characters']:
                 members.append({'name': str(member['name']),
                                 'char_id': int(member['character_id']),
                                 'corp_id': int(member['corporation_id']),
                                 'alli_id': int(member['alliance_id'])})
-            page += 1
 
         return members
 
@@ -0,0 +1,276 @@
+"""Keep wallet, market and industry history in indexed sqlite tables.
+
+A Warehouse copies parsed results (from parse_wallet_journal,
+parse_wallet_transactions, parse_market_orders and parse_industry_jobs,
+or the evelink methods returning them) into one table each, so that
+history can be queried with SQL instead of by walking Python lists:
+
+    warehouse = Warehouse('history.sqlite')
+    warehouse.add_journal(char.wallet_journal(), owner_id=char.char_id)
+    warehouse.query('select type_id, sum(amount) from wallet_journal'
+                    ' group by type_id')
+
+Rows are upserted, keyed on the owner (character or corporation) and
+the entry's ID, so adding overlapping pages, or orders and jobs whose
+state has changed, keeps one up-to-date row per entry. Each page of
+rows is written with one executemany() in one transaction. Rows may
+also come from an iterator such as evelink.export.iter_rows(), in which
+case they are written a page at a time.
+"""
+
+import itertools
+import sqlite3
+import threading
+
+from evelink import api
+
+# Rows written per transaction when adding from an iterator.
+PAGE_SIZE = 2560
+
+
+def _get(*keys):
+    def getter(row):
+        for key in keys:
+            row = row.get(key) if row is not None else None
+        return row
+    return getter
+
+
+# Each table's columns, as (name, type, getter for the parsed row).
+# Every table also starts with an owner_id column, and account_key
+# where relevant; the primary key is listed separately.
+_TABLES = {
+    'wallet_journal': {
+        'account': True,
+        'key': ('owner_id', 'account_key', 'ref_id'),
+        'columns': (
+            ('ref_id', 'integer', _get('id')),
+            ('timestamp', 'integer', _get('timestamp')),
+            ('type_id', 'integer', _get('type_id')),
+            ('party_1_id', 'integer', _get('party_1', 'id')),
+            ('party_1_name', 'text', _get('party_1', 'name')),
+            ('party_1_type', 'integer', _get('party_1', 'type')),
+            ('party_2_id', 'integer', _get('party_2', 'id')),
+            ('party_2_name', 'text', _get('party_2', 'name')),
+            ('party_2_type', 'integer', _get('party_2', 'type')),
+            ('arg_id', 'integer', _get('arg', 'id')),
+            ('arg_name', 'text', _get('arg', 'name')),
+            ('amount', 'real', _get('amount')),
+            ('balance', 'real', _get('balance')),
+            ('reason', 'text', _get('reason')),
+            ('tax_receiver_id', 'integer', _get('tax', 'taxer_id')),
+            ('tax_amount', 'real', _get('tax', 'amount')),
+        ),
+        'indexes': (
+            ('owner_id', 'timestamp'),
+            ('type_id', 'timestamp'),
+            ('party_1_id',),
+            ('party_2_id',),
+        ),
+    },
+    'wallet_transactions': {
+        'account': True,
+        'key': ('owner_id', 'account_key', 'transaction_id'),
+        'columns': (
+            ('transaction_id', 'integer', _get('id')),
+            ('journal_id', 'integer', _get('journal_id')),
+            ('timestamp', 'integer', _get('timestamp')),
+            ('quantity', 'integer', _get('quantity')),
+            ('type_id', 'integer', _get('type', 'id')),
+            ('type_name', 'text', _get('type', 'name')),
+            ('price', 'real', _get('price')),
+            ('client_id', 'integer', _get('client', 'id')),
+            ('client_name', 'text', _get('client', 'name')),
+            ('station_id', 'integer', _get('station', 'id')),
+            ('station_name', 'text', _get('station', 'name')),
+            ('action', 'text', _get('action')),
+            ('transaction_for', 'text', _get('for')),
+            ('char_id', 'integer', _get('char', 'id')),
+            ('char_name', 'text', _get('char', 'name')),
+        ),
+        'indexes': (
+            ('owner_id', 'timestamp'),
+            ('type_id', 'timestamp'),
+            ('station_id',),
+            ('journal_id',),
+        ),
+    },
+    'market_orders': {
+        'account': False,
+        'key': ('owner_id', 'order_id'),
+        'columns': (
+            ('order_id', 'integer', _get('id')),
+            ('char_id', 'integer', _get('char_id')),
+            ('station_id', 'integer', _get('station_id')),
+            ('amount', 'integer', _get('amount')),
+            ('amount_left', 'integer', _get('amount_left')),
+            ('status', 'text', _get('status')),
+            ('type_id', 'integer', _get('type_id')),
+            ('range', 'integer', _get('range')),
+            ('account_key', 'integer', _get('account_key')),
+            ('duration', 'integer', _get('duration')),
+            ('escrow', 'real', _get('escrow')),
+            ('price', 'real', _get('price')),
+            ('type', 'text', _get('type')),
+            ('timestamp', 'integer', _get('timestamp')),
+        ),
+        'indexes': (
+            ('owner_id', 'status'),
+            ('type_id', 'status'),
+            ('station_id',),
+        ),
+    },
+    'industry_jobs': {
+        'account': False,
+        'key': ('owner_id', 'job_id'),
+        'columns': (
+            ('job_id', 'integer', _get('id')),
+            ('activity_id', 'integer', _get('activity_id')),
+            ('blueprint_id', 'integer', _get('blueprint', 'id')),
+            ('blueprint_location_id', 'integer', _get('blueprint', 'location_id')),
+            ('blueprint_type_id', 'integer', _get('blueprint', 'type', 'id')),
+            ('blueprint_type_name', 'text', _get('blueprint', 'type', 'name')),
+            ('completed', 'integer', _get('completed')),
+            ('complete_ts', 'integer', _get('complete_ts')),
+            ('completor_id', 'integer', _get('completor_id')),
+            ('cost', 'real', _get('cost')),
+            ('begin_ts', 'integer', _get('begin_ts')),
+            ('end_ts', 'integer', _get('end_ts')),
+            ('pause_ts', 'integer', _get('pause_ts')),
+            ('facility_id', 'integer', _get('facility_id')),
+            ('installer_id', 'integer', _get('installer', 'id')),
+            ('installer_name', 'text', _get('installer', 'name')),
+            ('product_type_id', 'integer', _get('product', 'type_id')),
+            ('product_location_id', 'integer', _get('product', 'location_id')),
+            ('product_name', 'text', _get('product', 'name')),
+            ('probability', 'real', _get('product', 'probability')),
+            ('runs', 'integer', _get('runs')),
+            ('licensed_runs', 'integer', _get('licensed_runs')),
+            ('system_id', 'integer', _get('system', 'id')),
+            ('system_name', 'text', _get('system', 'name')),
+            ('station_id', 'integer', _get('station_id')),
+            ('status', 'integer', _get('status')),
+            ('team_id', 'integer', _get('team_id')),
+            ('duration', 'integer', _get('duration')),
+        ),
+        'indexes': (
+            ('owner_id', 'end_ts'),
+            ('product_type_id',),
+            ('system_id',),
+            ('status',),
+        ),
+    },
+}
+
+
+def _table_columns(table):
+    spec = _TABLES[table]
+    columns = ['owner_id']
+    if spec['account']:
+        columns.append('account_key')
+    return columns + [name for name, _, _ in spec['columns']]
+
+
+def _rows(result):
+    """Return the entries of a parsed result, APIResult or iterable."""
+    if isinstance(result, api.APIResult):
+        result = result.result
+    if isinstance(result, dict):
+        # Orders and industry jobs are keyed by ID, and only orders
+        # repeat it in the entries.
+        return (row if 'id' in row else dict(row, id=row_id)
+                for row_id, row in result.items())
+    return iter(result or ())
+
+
+class Warehouse(object):
+    """Parsed API history in an sqlite database.
+
+    The connection is shared between threads, guarded by a lock.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        with self.connection:
+            for table, spec in sorted(_TABLES.items()):
+                types = dict((name, type_) for name, type_, _ in spec['columns'])
+                types.setdefault('owner_id', 'integer')
+                types.setdefault('account_key', 'integer')
+                self.connection.execute('create table if not exists %s (%s, primary key (%s))' % (
+                    table,
+                    ', '.join('%s %s' % (c, types[c]) for c in _table_columns(table)),
+                    ', '.join(spec['key'])))
+                for columns in spec['indexes']:
+                    self.connection.execute('create index if not exists %s_%s on %s (%s)' % (
+                        table, '_'.join(columns), table, ', '.join(columns)))
+
+    def _add(self, table, result, owner_id, account_key=None):
+        spec = _TABLES[table]
+        getters = [getter for _, _, getter in spec['columns']]
+        if spec['account']:
+            # Rows merged from several wallet divisions (e.g. by
+            # Corp.all_wallet_journals()) carry their own account.
+            getters.insert(0, lambda row: row.get('account', account_key))
+        prefix = (owner_id,)
+        sql = 'insert or replace into %s (%s) values (%s)' % (
+            table, ', '.join(_table_columns(table)),
+            ', '.join('?' * len(_table_columns(table))))
+
+        rows = _rows(result)
+        count = 0
+        while True:
+            page = [prefix + tuple(get(row) for get in getters)
+                    for row in itertools.islice(rows, PAGE_SIZE)]
+            if not page:
+                return count
+            with self._lock:
+                with self.connection:
+                    self.connection.executemany(sql, page)
+            count += len(page)
+
+    def add_journal(self, entries, owner_id, account_key=1000):
+        """Upsert wallet journal entries, and return how many were added.
+
+        owner_id is the character or corporation the journal belongs
+        to, and account_key the wallet division (1000 for characters),
+        for entries without an 'account' of their own.
+        """
+        return self._add('wallet_journal', entries, owner_id, account_key)
+
+    def add_transactions(self, transactions, owner_id, account_key=1000):
+        """Upsert wallet transactions, and return how many were added."""
+        return self._add('wallet_transactions', transactions, owner_id, account_key)
+
+    def add_orders(self, orders, owner_id):
+        """Upsert market orders, and return how many were added."""
+        return self._add('market_orders', orders, owner_id)
+
+    def add_industry_jobs(self, jobs, owner_id):
+        """Upsert industry jobs, and return how many were added."""
+        return self._add('industry_jobs', jobs, owner_id)
+
+    def query(self, sql, params=()):
+        """Run a query and return all of its rows, as tuples."""
+        with self._lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def journal_totals(self, owner_id, since=None, until=None):
+        """Return {ref_type_id: (entries, total amount)} for a time range."""
+        sql = 'select type_id, count(*), sum(amount) from wallet_journal where owner_id = ?'
+        params = [owner_id]
+        if since is not None:
+            sql += ' and timestamp >= ?'
+            params.append(since)
+        if until is not None:
+            sql += ' and timestamp < ?'
+            params.append(until)
+        rows = self.query(sql + ' group by type_id', params)
+        return dict((type_id, (count, total)) for type_id, count, total in rows)
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+# vim: set ts=4 sts=4 sw=4 et:
@@ -0,0 +1,202 @@
+"""Interchangeable XML parsers for API responses.
+
+All backends return trees that support the ElementTree API used by
+evelink's parsers (find, findall, attrib, text, ...) and give
+identical parse results:
+
+- 'etree': xml.etree.ElementTree (cElementTree on Python 2). The
+  default, and the fastest on Python 3.
+- 'lxml': lxml.etree, if installed. Its trees take about half the
+  memory of etree's, but evelink's parsers read them more slowly, so
+  parsing a response end to end is slower on Python 3. Only worth
+  choosing when memory matters more than speed.
+- 'expat': builds ElementTree elements straight from xml.parsers.expat
+  callbacks. It only exists for Python 2 interpreters without
+  cElementTree, where it beats the pure-Python ElementTree; on
+  Python 3 it is slower than etree.
+
+Pass the name (or a backend object) to API(xml_backend=...). To save
+memory on large responses only, pass LargeResponseBackend('lxml').
+"""
+
+import abc
+import xml.parsers.expat
+from xml.etree import ElementTree
+
+from evelink.thirdparty import six
+
+try:
+    from xml.etree import cElementTree as _etree
+except ImportError:
+    _etree = ElementTree
+
+# Python 2.6's ElementTree raises xml.parsers.expat.ExpatError instead
+# of ElementTree.ParseError
+_etree_errors = (getattr(ElementTree, 'ParseError', xml.parsers.expat.ExpatError),
+                 getattr(_etree, 'ParseError', xml.parsers.expat.ExpatError))
+
+# Default size from which LargeResponseBackend uses its large backend.
+LARGE_THRESHOLD = 64 * 1024
+
+
+@six.add_metaclass(abc.ABCMeta)
+class XMLBackend(object):
+    """Minimal interface for an XML backend.
+
+    Subclasses implement fromstring(). 'errors' is the tuple of
+    exceptions that fromstring() raises for malformed XML.
+    """
+
+    name = None
+    errors = _etree_errors
+
+    @abc.abstractmethod
+    def fromstring(self, data):
+        """Parse a response (bytes or text) and return its root element."""
+
+    def tostring(self, elem):
+        return tostring(elem)
+
+
+class ETreeBackend(XMLBackend):
+    name = 'etree'
+
+    def fromstring(self, data):
+        return _etree.fromstring(data)
+
+
+class LxmlBackend(XMLBackend):
+    name = 'lxml'
+
+    def __init__(self):
+        from lxml import etree
+        self._etree = etree
+        self._parser = etree.XMLParser(remove_comments=True,
+            resolve_entities=False, huge_tree=True)
+        self.errors = (etree.XMLSyntaxError,)
+
+    def fromstring(self, data):
+        # lxml refuses text that carries an encoding declaration.
+        if not isinstance(data, bytes):
+            data = data.encode('utf-8')
+        return self._etree.fromstring(data, self._parser)
+
+
+class ExpatBackend(XMLBackend):
+    """Builds ElementTree elements from expat callbacks, for Python 2."""
+
+    name = 'expat'
+    errors = (xml.parsers.expat.ExpatError,)
+
+    def fromstring(self, data):
+        parser = xml.parsers.expat.ParserCreate()
+        parser.buffer_text = True
+
+        # The same bookkeeping as ElementTree.TreeBuilder: character
+        # data goes to the text of the last opened element, or to the
+        # tail of the last closed one.
+        stack = []
+        state = {'root': None, 'last': None, 'tail': False}
+        text = []
+        element = ElementTree.Element
+
+        def flush():
+            if text:
+                if state['last'] is not None:
+                    value = ''.join(text)
+                    if state['tail']:
+                        state['last'].tail = value
+                    else:
+                        state['last'].text = value
+                del text[:]
+
+        def start(tag, attrib):
+            flush()
+            elem = element(tag, attrib)
+            if stack:
+                stack[-1].append(elem)
+            else:
+                state['root'] = elem
+            stack.append(elem)
+            state['last'] = elem
+            state['tail'] = False
+
+        def end(tag):
+            flush()
+            state['last'] = stack.pop()
+            state['tail'] = True
+
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = text.append
+        parser.Parse(data, True)
+        flush()
+        return state['root']
+
+
+class LargeResponseBackend(XMLBackend):
+    """Uses another backend (e.g. 'lxml') for large responses, and etree
+    for the rest.
+
+    This trades speed for memory on the responses of at least threshold
+    bytes, so it is never used unless asked for.
+    """
+
+    name = 'large-response'
+
+    def __init__(self, large, threshold=LARGE_THRESHOLD):
+        self.threshold = threshold
+        self.small = ETreeBackend()
+        self.large = get_backend(large)
+        self.name = 'large-response:%s' % self.large.name
+        self.errors = self.small.errors + self.large.errors
+
+    def fromstring(self, data):
+        if len(data) >= self.threshold:
+            return self.large.fromstring(data)
+        return self.small.fromstring(data)
+
+
+def tostring(elem):
+    """Serialize an element produced by any of the backends."""
+    if hasattr(elem, 'getroottree'):
+        from lxml import etree
+        return etree.tostring(elem)
+    return ElementTree.tostring(elem)
+
+
+BACKENDS = {
+    'etree': ETreeBackend,
+    'lxml': LxmlBackend,
+    'expat': ExpatBackend,
+}
+
+
+def get_backend(backend=None):
+    """Return a backend object for a name, a backend, or None (etree).
+
+    Raises ValueError for unknown names, and ImportError if the backend
+    needs a library that is not installed.
+    """
+    if backend is None:
+        backend = 'etree'
+    if isinstance(backend, XMLBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError("Unknown XML backend: %r" % (backend,))
+    return BACKENDS[backend]()
+
+
+def available_backends():
+    """Return the names of the backends that can be used here."""
+    names = []
+    for name in sorted(BACKENDS):
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+# vim: set ts=4 sts=4 sw=4 et:
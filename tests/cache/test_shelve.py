@@ -3,7 +3,7 @@ import tempfile
 
 from tests.compat import unittest
 
-from evelink.cache.shelf import ShelveCache
+from evelink.cache.shelf import ShelveCache, ShelveStore
 
 class ShelveCacheTestCase(unittest.TestCase):
 
@@ -30,3 +30,27 @@ class ShelveCacheTestCase(unittest.TestCase):
     def test_expire(self):
         self.cache.put('baz', 'qux', -1)
         self.assertEqual(self.cache.get('baz'), None)
+
+
+class ShelveStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.store_dir, 'shelf')
+        self.store = ShelveStore(self.store_path)
+
+    def tearDown(self):
+        self.store.store.close()
+        try:
+          os.remove(self.store_path)
+        except OSError:
+          pass
+        try:
+          os.rmdir(self.store_dir)
+        except OSError:
+          pass
+
+    def test_store(self):
+        self.store.put('foo', 1, 'bar')
+        self.assertEqual(self.store.get('foo', 1), 'bar')
+        self.assertEqual(self.store.get_many('foo', [1, 2]), {1: 'bar'})
@@ -1,9 +1,10 @@
 import os
 import tempfile
+import threading
 
 from tests.compat import unittest
 
-from evelink.cache.sqlite import SqliteCache
+from evelink.cache.sqlite import SqliteCache, SqliteStore
 
 class SqliteCacheTestCase(unittest.TestCase):
 
@@ -34,3 +35,55 @@ class SqliteCacheTestCase(unittest.TestCase):
     def test_expire(self):
         self.cache.put('baz', 'qux', -1)
         self.assertEqual(self.cache.get('baz'), None)
+
+
+class SqliteStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.store_path = os.path.join(self.store_dir, 'sqlite')
+        self.store = SqliteStore(self.store_path)
+
+    def tearDown(self):
+        self.store.connection.close()
+        try:
+          os.remove(self.store_path)
+        except OSError:
+          pass
+        try:
+          os.rmdir(self.store_dir)
+        except OSError:
+          pass
+
+    def test_store(self):
+        self.store.put('foo', 1, {'bar': 'baz'})
+        self.assertEqual(self.store.get('foo', 1), {'bar': 'baz'})
+        self.assertEqual(self.store.get('qux', 1), None)
+
+    def test_get_many(self):
+        self.store.put_many('foo', dict((i, str(i)) for i in range(2000)))
+        results = self.store.get_many('foo', range(1995, 2005))
+        self.assertEqual(results, dict((i, str(i)) for i in range(1995, 2000)))
+
+    def test_threads(self):
+        errors = []
+        def worker(n):
+            try:
+                self.store.put('foo', n, str(n))
+                self.store.get('foo', n)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.store.get_many('foo', range(8)),
+            dict((n, str(n)) for n in range(8)))
+
+    def test_persistence(self):
+        self.store.put('foo', 1, 'bar')
+        self.store.connection.close()
+        self.store = SqliteStore(self.store_path)
+        self.assertEqual(self.store.get('foo', 1), 'bar')
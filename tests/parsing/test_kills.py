@@ -110,3 +110,11 @@ class KillsTestCase(unittest.TestCase):
                     'z': 3000.0,
                 }},
             })
+
+    def test_names_are_shared(self):
+        api_result, _, _ = make_api_result("char/kills.xml")
+
+        result = evelink_k.parse_kills(api_result)
+
+        self.assertTrue(result[15640545]['victim']['corp']['name']
+                        is result[15640551]['victim']['corp']['name'])
@@ -1,6 +1,7 @@
 from tests.compat import unittest
 from tests.utils import make_api_result
 
+from evelink import api
 from evelink.parsing import wallet_journal as evelink_w
 
 class WalletJournalTestCase(unittest.TestCase):
@@ -105,6 +106,11 @@ class WalletJournalTestCase(unittest.TestCase):
             'arg': {'name': '153219782', 'id': 0}, 'id': 6422968336}
         ])
 
+    def test_names_use_own_pool(self):
+        api_result, _, _ = make_api_result("char/wallet_journal.xml")
+        api.string_pool.clear()
 
+        result = evelink_w.parse_wallet_journal(api_result)
 
-
+        self.assertTrue(result[0]['party_2']['name'] is result[1]['party_2']['name'])
+        self.assertEqual(len(api.string_pool), 0)
@@ -1,4 +1,7 @@
+import subprocess
 import sys
+import threading
+import time
 import zlib
 import mock
 from xml.etree import ElementTree
@@ -40,6 +43,61 @@ class CacheTestCase(unittest.TestCase):
         self.cache.put('baz', 'qux', -1)
         self.assertEqual(self.cache.get('baz'), None)
 
+    def test_concurrent_expire(self):
+        class SlowDict(dict):
+            # Lets other threads in between reading an entry and expiring it.
+            def get(self, key):
+                value = dict.get(self, key)
+                time.sleep(0.01)
+                return value
+
+        self.cache.cache = SlowDict()
+        self.cache.put('baz', 'qux', -1)
+        results, errors = [], []
+        def get():
+            try:
+                results.append(self.cache.get('baz'))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=get) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [None] * 4)
+
+class StringPoolTestCase(unittest.TestCase):
+
+    def test_intern(self):
+        pool = evelink_api.StringPool()
+        first = pool.intern(''.join(['Inkblot', ' Squad']))
+        second = ''.join(['Inkblot', ' Squad'])
+        self.assertFalse(first is second)
+        self.assertTrue(pool.intern(second) is first)
+        self.assertEqual(len(pool), 1)
+
+    def test_bounded(self):
+        pool = evelink_api.StringPool(max_size=3)
+        for i in range(10):
+            self.assertEqual(pool.intern(str(i)), str(i))
+            self.assertTrue(len(pool) <= 3)
+
+class StoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.store = evelink_api.APIStore()
+
+    def test_store(self):
+        self.store.put('foo', 1, 'bar')
+        self.assertEqual(self.store.get('foo', 1), 'bar')
+        self.assertEqual(self.store.get('baz', 1), None)
+
+    def test_get_many(self):
+        self.store.put_many('foo', {1: 'bar', 2: 'baz'})
+        self.assertEqual(self.store.get_many('foo', [1, 2, 3]), {1: 'bar', 2: 'baz'})
+
 class APITestCase(unittest.TestCase):
 
     def setUp(self):
@@ -110,6 +168,13 @@ class APITestCase(unittest.TestCase):
             self.api._cache_key('foo/bar', {'a':1})
         )
 
+    def test_full_path(self):
+        self.assertEqual(self.api.full_path('foo/bar'),
+            'https://api.eveonline.com/foo/bar.xml.aspx')
+        self.api.base_url = 'http://localhost:8080/'
+        self.assertEqual(self.api.full_path('foo/bar'),
+            'http://localhost:8080/foo/bar.xml.aspx')
+
     @mock.patch('evelink.thirdparty.six.moves.urllib.request.urlopen')
     def test_get(self, mock_urlopen):
         # mock up an urlopen compatible response object and pretend to have no
@@ -130,6 +195,7 @@ class APITestCase(unittest.TestCase):
             'current_time': 1255885531,
             'cached_until': 1258563931,
         })
+        self.assertFalse(self.api.last_cached)
         self.assertEqual(current, 1255885531)
         self.assertEqual(expiry, 1258563931)
 
@@ -169,9 +235,25 @@ class APITestCase(unittest.TestCase):
             'current_time': 1255885531,
             'cached_until': 1258563931,
         })
+        self.assertTrue(self.api.last_cached)
         self.assertEqual(current, 1255885531)
         self.assertEqual(expiry, 1258563931)
 
+    def test_last_timestamps_are_per_thread(self):
+        self.cache.get.return_value = self.test_xml
+        self.api.get('foo/Bar')
+
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(self.api.last_timestamps))
+        thread.start()
+        thread.join()
+
+        self.assertEqual(seen, [{'current_time': 0, 'cached_until': 0}])
+        self.assertEqual(self.api.last_timestamps, {
+            'current_time': 1255885531,
+            'cached_until': 1258563931,
+        })
+
     @mock.patch('evelink.thirdparty.six.moves.urllib.request.urlopen')
     def test_get_with_apikey(self, mock_urlopen):
         mock_urlopen.return_value.read.return_value = self.test_xml
@@ -417,7 +499,8 @@ class AutoCallTestCase(unittest.TestCase):
                 ],
                 'defaults': dict(limit=None, before_kill=None),
                 'prop_to_param': tuple(),
-                'map_params': {}
+                'map_params': {},
+                'parser': None,
             },
             func._request_specs
             )
@@ -519,5 +602,80 @@ class AutoCallTestCase(unittest.TestCase):
         self.assertFalse(client.get.called)
 
 
+class AutoStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = mock.Mock(name='client')
+        self.client.api.store = evelink_api.APIStore()
+        self.fetch = mock.Mock()
+
+        fetch = self.fetch
+
+        @evelink_api.auto_store('things', ids_arg='ids')
+        @evelink_api.auto_call('foo/bar', map_params={'ids': 'IDs'})
+        def get_many(self, ids, api_result=None):
+            fetch(ids)
+            return api_result
+
+        @evelink_api.auto_store('thing', id_arg='thing_id')
+        @evelink_api.auto_call('foo/baz', map_params={'thing_id': 'ID'})
+        def get_one(self, thing_id, api_result=None):
+            fetch(thing_id)
+            return api_result
+
+        self.get_many = get_many
+        self.get_one = get_one
+
+    def test_ids_arg_fetches_missing_only(self):
+        self.client.api.store.put('things', 1, 'stored')
+        self.client.api.get.return_value = evelink_api.APIResult(
+            {2: 'fetched', 3: None}, 12345, 67890)
+
+        result = self.get_many(self.client, [1, 2, 3])
+
+        self.assertEqual(result, ({1: 'stored', 2: 'fetched', 3: None}, 12345, 67890))
+        self.client.api.get.assert_called_once_with('foo/bar', params={'IDs': [2, 3]})
+        self.assertEqual(self.client.api.store.get_many('things', [1, 2, 3]),
+            {1: 'stored', 2: 'fetched'})
+
+    def test_ids_arg_all_stored(self):
+        self.client.api.store.put_many('things', {1: 'a', 2: 'b'})
+
+        result = self.get_many(self.client, [1, 2])
+
+        self.assertEqual(result, ({1: 'a', 2: 'b'}, None, None))
+        self.assertFalse(self.client.api.get.called)
+
+    def test_id_arg(self):
+        self.client.api.get.return_value = evelink_api.APIResult(['item'], 12345, 67890)
+
+        self.assertEqual(self.get_one(self.client, 5), (['item'], 12345, 67890))
+        self.assertEqual(self.get_one(self.client, 5), (['item'], None, None))
+        self.assertEqual(self.client.api.get.call_count, 1)
+
+    def test_no_store(self):
+        self.client.api.store = None
+        self.client.api.get.return_value = evelink_api.APIResult({1: 'x'}, 12345, 67890)
+
+        self.get_many(self.client, [1])
+        self.get_many(self.client, [1])
+        self.assertEqual(self.client.api.get.call_count, 2)
+
+    def test_request_specs_preserved(self):
+        self.assertEqual(self.get_one._request_specs['path'], 'foo/baz')
+
+
+class ImportTestCase(unittest.TestCase):
+
+    def test_optional_modules_not_imported(self):
+        # Run in a fresh interpreter, since the test suite imports them all.
+        code = ("import sys, evelink, evelink.api; "
+                "print(' '.join(sorted(sys.modules)))")
+        modules = subprocess.check_output([sys.executable, '-c', code]).split()
+        for name in ('evelink.metrics', 'evelink.parsepool', 'evelink.slowcalls',
+                     'evelink.xml_backends', 'cProfile', 'requests'):
+            self.assertFalse(name.encode('ascii') in modules, name)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -16,8 +16,8 @@ class CharTestCase(APITestCase):
         super(CharTestCase, self).setUp()
         self.char = evelink_char.Char(1, api=self.api)
 
-    @mock.patch('evelink.char.parse_assets')
-    def test_assets(self, mock_parse):
+    def test_assets(self):
+        mock_parse = self.patch_parser(evelink_char.Char.assets)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.parsed_assets
 
@@ -96,8 +96,8 @@ class CharTestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
-    @mock.patch('evelink.char.parse_wallet_journal')
-    def test_wallet_journal(self, mock_parse):
+    def test_wallet_journal(self):
+        mock_parse = self.patch_parser(evelink_char.Char.wallet_journal)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.parsed_journal
 
@@ -322,8 +322,8 @@ class CharTestCase(APITestCase):
             1014990361649: set([605707989])}
         )
 
-    @mock.patch('evelink.char.parse_kills')
-    def test_kills(self, mock_parse):
+    def test_kills(self):
+        mock_parse = self.patch_parser(evelink_char.Char.kills)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.kills
 
@@ -339,8 +339,8 @@ class CharTestCase(APITestCase):
                 mock.call(mock.sentinel.api_result),
             ])
 
-    @mock.patch('evelink.char.parse_kills')
-    def test_kill_log(self, mock_parse):
+    def test_kill_log(self):
+        mock_parse = self.patch_parser(evelink_char.Char.kill_log)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.kills
 
@@ -728,6 +728,28 @@ class CharTestCase(APITestCase):
                 }),
             ])
 
+    def test_message_bodies_stored(self):
+        self.api.store = evelink_api.APIStore()
+        self.api.store.put('mail_bodies', 297023723, 'Stored body')
+        self.api.get.return_value = self.make_api_result("char/message_bodies.xml")
+
+        result, current, expires = self.char.message_bodies([297023723,297023208])
+        self.assertEqual(result[297023723], 'Stored body')
+        self.assertEqual(result[297023208], '<p>Another message</p>')
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('char/MailBodies', params={
+                    'characterID': 1,
+                    'ids': [297023208],
+                }),
+            ])
+        self.assertEqual(self.api.store.get('mail_bodies', 297023208),
+            '<p>Another message</p>')
+
+        # Every body is now stored, so no further request is made.
+        result, current, expires = self.char.message_bodies([297023723,297023208])
+        self.assertEqual(len(self.api.mock_calls), 1)
+        self.assertEqual((current, expires), (None, None))
+
     def test_mailing_lists(self):
         self.api.get.return_value = self.make_api_result("char/mailing_lists.xml")
 
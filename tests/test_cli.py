@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import tempfile
+from xml.etree import ElementTree
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+from evelink.thirdparty import six
+from evelink.thirdparty.six.moves.configparser import RawConfigParser
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'bin', 'evelink')
+
+
+def load_script():
+    try:
+        from importlib.machinery import SourceFileLoader
+    except ImportError:
+        import imp
+        return imp.load_source('evelink_script', SCRIPT)
+    return SourceFileLoader('evelink_script', SCRIPT).load_module()
+
+
+class BatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.script = load_script()
+        self.directory = tempfile.mkdtemp()
+        self.api_obj_params = {'cache': evelink_api.APICache()}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_batch(self, calls):
+        path = os.path.join(self.directory, 'calls.jsonl')
+        with open(path, 'w') as f:
+            for call in calls:
+                f.write(json.dumps(call) + '\n')
+        with mock.patch('sys.stdout', new_callable=six.StringIO) as stdout:
+            self.script.run_batch(self.api_obj_params, ['file=%s' % path, 'workers=4'],
+                RawConfigParser())
+        records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        return sorted(records, key=lambda r: r['id'])
+
+    @mock.patch.object(evelink_api.API, 'get', autospec=True)
+    def test_one_api_per_key(self, mock_get):
+        mock_get.return_value = evelink_api.APIResult(
+            ElementTree.fromstring('<result><foo>bar</foo></result>'), 12345, 67890)
+
+        records = self.run_batch([
+            {'id': 1, 'call': 'char/Foo', 'key': '1:abc', 'kwargs': {'characterID': 5}},
+            {'id': 2, 'call': 'char/Bar', 'key': '1:abc'},
+            {'id': 3, 'call': 'char/Foo', 'key': '2:def'},
+            {'id': 4, 'call': 'eve/Baz'},
+        ])
+
+        self.assertEqual([r['result'] for r in records],
+            ['<result><foo>bar</foo></result>'] * 4)
+        apis = {}
+        for call in mock_get.call_args_list:
+            api = call[0][0]
+            apis.setdefault(api.api_key, set()).add(api)
+        # One API per key, all sharing the cache.
+        self.assertEqual(sorted(apis, key=str), [(1, 'abc'), (2, 'def'), None])
+        self.assertEqual([len(a) for a in apis.values()], [1, 1, 1])
+        for api in apis[(1, 'abc')] | apis[(2, 'def')] | apis[None]:
+            self.assertTrue(api.cache is self.api_obj_params['cache'])
+
+    def test_errors_do_not_stop_the_batch(self):
+        results = {'1': {'a': 1}, '2': object()}
+        method = lambda n: results[n]
+        get_method = lambda api, path, args, config: (method, args)
+        with mock.patch.object(self.script, 'get_evelink_method', side_effect=get_method):
+            records = self.run_batch([
+                {'id': 1, 'call': 'eve.EVE.foo', 'args': ['1']},
+                {'id': 2, 'call': 'eve.EVE.alliance_index', 'args': ['2']},
+                {'id': 3, 'call': 'eve.EVE.foo', 'args': ['3']},
+            ])
+
+        self.assertEqual(records[0], {'id': 1, 'call': 'eve.EVE.foo', 'result': {'a': 1}})
+        self.assertTrue(records[1]['error'].startswith('TypeError'))
+        self.assertFalse('result' in records[1])
+        self.assertTrue(records[2]['error'].startswith('KeyError'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -158,8 +158,8 @@ class CorpTestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
-    @mock.patch('evelink.corp.parse_kills')
-    def test_kills(self, mock_parse):
+    def test_kills(self):
+        mock_parse = self.patch_parser(evelink_corp.Corp.kills)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.kills
 
@@ -175,8 +175,8 @@ class CorpTestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
-    @mock.patch('evelink.corp.parse_kills')
-    def test_kill_log(self, mock_parse):
+    def test_kill_log(self):
+        mock_parse = self.patch_parser(evelink_corp.Corp.kill_log)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.kills
 
@@ -276,8 +276,8 @@ class CorpTestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
-    @mock.patch('evelink.corp.parse_wallet_journal')
-    def test_wallet_journal(self, mock_parse):
+    def test_wallet_journal(self):
+        mock_parse = self.patch_parser(evelink_corp.Corp.wallet_journal)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.parsed_journal
 
@@ -316,6 +316,35 @@ class CorpTestCase(APITestCase):
                 mock.call.get('corp/WalletJournal', params={'accountKey': '0003'}),
             ])
 
+    def test_all_wallet_journals(self):
+        results = {
+            1000: evelink_api.APIResult(self.make_api_result("char/wallet_journal.xml").result, 100, 500),
+            1003: evelink_api.APIResult(self.make_api_result("corp/wallet_journal.xml").result, 110, 400),
+        }
+        self.api.get.side_effect = lambda path, params: results[params['accountKey']]
+
+        result, current, expires = self.corp.all_wallet_journals(limit=50, accounts=[1000, 1003])
+
+        ids = [entry['id'] for entry in result]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(result), 8)
+        self.assertEqual(sorted(set(entry['account'] for entry in result)), [1000, 1003])
+        self.assertEqual((current, expires), (110, 400))
+        self.assertEqual(sorted(c[2]['params']['accountKey'] for c in self.api.get.mock_calls),
+            [1000, 1003])
+        self.assertTrue(all(c[2]['params']['rowCount'] == 50 for c in self.api.get.mock_calls))
+
+    def test_all_wallet_transactions(self):
+        self.api.get.return_value = self.make_api_result("char/wallet_transactions.xml")
+
+        result, current, expires = self.corp.all_wallet_transactions()
+
+        self.assertEqual(self.api.get.call_count, 7)
+        self.assertEqual(len(result), 7 * len(self.corp.wallet_transactions(account=1000).result))
+        keys = [(entry['id'], entry['account']) for entry in result]
+        self.assertEqual(keys, sorted(keys))
+        self.assertRaises(ValueError, self.corp.all_wallet_transactions, accounts=[])
+
     @mock.patch('evelink.corp.parse_wallet_transactions')
     def test_wallet_transcations(self, mock_parse):
         self.api.get.return_value = API_RESULT_SENTINEL
@@ -390,8 +419,8 @@ class CorpTestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
-    @mock.patch('evelink.corp.parse_assets')
-    def test_assets(self, mock_parse):
+    def test_assets(self):
+        mock_parse = self.patch_parser(evelink_corp.Corp.assets)
         self.api.get.return_value = API_RESULT_SENTINEL
         mock_parse.return_value = mock.sentinel.parsed_assets
 
@@ -0,0 +1,82 @@
+from tests.compat import unittest
+from tests.utils import APITestCase
+
+import evelink.corp as evelink_corp
+import evelink.delta as evelink_delta
+import evelink.map as evelink_map
+
+
+class DeltaTrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = evelink_delta.DeltaTracker()
+
+    def test_diff(self):
+        first = {
+            1: {'id': 1, 'name': 'A', 'faction': {'id': 10, 'name': 'F'}},
+            2: {'id': 2, 'name': 'B', 'faction': {'id': None, 'name': None}},
+        }
+        delta = self.tracker.diff('key', first)
+        self.assertEqual(delta, evelink_delta.Delta(first, [], {}))
+
+        second = {
+            1: {'id': 1, 'name': 'A', 'faction': {'id': 11, 'name': 'G'}},
+            3: {'id': 3, 'name': 'C', 'faction': {'id': None, 'name': None}},
+        }
+        delta = self.tracker.diff('key', second)
+        self.assertEqual(delta.added, {3: second[3]})
+        self.assertEqual(delta.removed, [2])
+        self.assertEqual(delta.changed, {
+                1: {'faction.id': (10, 11), 'faction.name': ('F', 'G')},
+            })
+
+        delta = self.tracker.diff('key', second)
+        self.assertEqual(delta, evelink_delta.Delta({}, [], {}))
+
+    def test_keys_are_independent(self):
+        self.tracker.diff('a', {1: {'x': 1}})
+        delta = self.tracker.diff('b', {1: {'x': 2}})
+        self.assertEqual(delta.added, {1: {'x': 2}})
+
+    def test_changed_shape(self):
+        self.tracker.diff('key', {1: {'x': 1}})
+        delta = self.tracker.diff('key', {1: {'x': 1, 'y': 2}})
+        self.assertEqual(delta.changed, {1: {'y': (None, 2)}})
+
+    def test_forget(self):
+        self.tracker.diff('key', {1: 'x'})
+        self.tracker.forget('key')
+        self.assertEqual(self.tracker.diff('key', {1: 'x'}).added, {1: 'x'})
+
+
+class DeltaTrackerCallTestCase(APITestCase):
+
+    def setUp(self):
+        super(DeltaTrackerCallTestCase, self).setUp()
+        self.api.request_key.side_effect = lambda path, params=None: (path, repr(sorted((params or {}).items())))
+        self.tracker = evelink_delta.DeltaTracker()
+
+    def test_auto_call_method(self):
+        self.api.get.return_value = self.make_api_result("map/sov_by_system.xml")
+        sov_map = evelink_map.Map(api=self.api)
+
+        (delta, data_time), current, expires = self.tracker.call(sov_map.sov_by_system)
+        self.assertEqual(sorted(delta.added), sorted(sov_map.sov_by_system().result[0]))
+        self.assertEqual(current, 12345)
+        self.assertEqual(expires, 67890)
+
+        (delta, data_time), current, expires = self.tracker.call(sov_map.sov_by_system)
+        self.assertEqual(delta, evelink_delta.Delta({}, [], {}))
+        self.api.request_key.assert_called_with('map/Sovereignty', {})
+
+    def test_plain_method(self):
+        self.api.get.return_value = self.make_api_result("corp/members.xml")
+        corp = evelink_corp.Corp(api=self.api)
+
+        delta, current, expires = self.tracker.call(corp.members, extended=False)
+        self.assertTrue(delta.added)
+        self.api.request_key.assert_called_with('Corp.members', {'extended': False})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,7 @@ from tests.compat import unittest
 from tests.utils import APITestCase
 
 import evelink.eve as evelink_eve
+import evelink.metrics as evelink_metrics
 
 class EVETestCase(APITestCase):
 
@@ -230,6 +231,65 @@ class EVETestCase(APITestCase):
         self.assertEqual(current, 12345)
         self.assertEqual(expires, 67890)
 
+    def test_alliance_index(self):
+        self.api.get.return_value = self.make_api_result("eve/alliances.xml")
+
+        index, current, expires = self.eve.alliance_index()
+        self.assertEqual(index.alliance_id(3), 1)
+        self.assertEqual(index.alliance_id(5), None)
+        self.assertEqual(index.membership(2), {
+                'alliance_id': 1,
+                'alliance_timestamp': 1272717240,
+                'timestamp': 1289250660,
+            })
+        self.assertEqual(index.member_corps(1),
+            {2: 1289250660, 3: 1327728960, 4: 1292440500})
+        self.assertEqual(len(index), 3)
+        self.assertEqual(self.api.mock_calls, [
+                mock.call.get('eve/AllianceList', params={}),
+            ])
+        self.assertEqual(current, 12345)
+        self.assertEqual(expires, 67890)
+
+    def test_alliance_index_uses_auto_call(self):
+        self.api.get.return_value = self.make_api_result("eve/alliances.xml")
+        self.api.metrics = evelink_metrics.Metrics()
+
+        self.eve.alliance_index()
+
+        phases = self.api.metrics.snapshot()['eve/AllianceList']['phases']
+        self.assertEqual(phases['method']['count'], 1)
+
+    def test_alliance_index_not_expired(self):
+        index = evelink_eve.AllianceIndex()
+        index.expires = 2 ** 40
+
+        result, current, expires = self.eve.alliance_index(index=index)
+        self.assertTrue(result is index)
+        self.assertEqual(self.api.mock_calls, [])
+
+    def test_alliance_index_update(self):
+        index = evelink_eve.AllianceIndex()
+        index.update([
+            (1, 100, {10: 110, 11: 111}),
+            (2, 200, {20: 210}),
+        ])
+
+        changed = index.update([
+            (1, 100, {10: 110}),
+            (3, 300, {11: 311, 30: 310}),
+        ])
+
+        self.assertEqual(changed, set([11, 20, 30]))
+        self.assertEqual(index.alliance_id(10), 1)
+        self.assertEqual(index.alliance_id(11), 3)
+        self.assertEqual(index.alliance_id(20), None)
+        self.assertEqual(index.membership(11)['timestamp'], 311)
+        self.assertEqual(index.update([
+            (1, 100, {10: 110}),
+            (3, 300, {11: 311, 30: 310}),
+        ]), set())
+
     def test_errors(self):
         self.api.get.return_value = self.make_api_result("eve/errors.xml")
 
@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.export as evelink_export
+import evelink.metrics as evelink_metrics
+from evelink.thirdparty import six
+from evelink.parsing.container_log import parse_container_log
+from evelink.parsing.wallet_journal import parse_wallet_journal
+
+XML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xml')
+
+
+def make_response(result):
+    return ('<eveapi version="2"><currentTime>2009-10-18 17:05:31</currentTime>%s'
+            '<cachedUntil>2009-10-18 17:35:31</cachedUntil></eveapi>' % result).encode('utf-8')
+
+
+def read_fixture(xml_path):
+    with open(os.path.join(XML_DIR, xml_path)) as f:
+        return f.read()
+
+
+JOURNAL_ROW = ('<row date="2010-12-10 06:32:00" refID="%d" refTypeID="72" ownerName1="A"'
+               ' ownerID1="1" ownerName2="B" ownerID2="2" argName1="" argID1="0"'
+               ' amount="-8.00" balance="100.00" reason="" owner1TypeID="1"'
+               ' owner2TypeID="2" />')
+
+
+def journal_page(*ref_ids):
+    return make_response('<result><rowset name="entries" key="refID">%s</rowset></result>'
+        % ''.join(JOURNAL_ROW % ref_id for ref_id in ref_ids))
+
+
+class ExportTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api = evelink_api.API(cache=evelink_api.APICache(), api_key=(1, 'abc'))
+        self.api.send_request = mock.Mock()
+
+    def test_rows_match_parser(self):
+        result = read_fixture('char/wallet_journal.xml')
+        self.api.send_request.return_value = (make_response(result), None)
+
+        rows = list(evelink_export.iter_rows(self.api, 'char/WalletJournal',
+            {'characterID': 1}, paginate=False))
+
+        expected = parse_wallet_journal(self.api.xml_backend.fromstring(result))
+        self.assertEqual(sorted(rows, key=lambda r: r['id']), expected)
+
+    @mock.patch.object(evelink_export, 'PAGE_SIZE', 2)
+    def test_paging(self):
+        self.api.send_request.side_effect = [
+            (journal_page(9, 8), None),
+            (journal_page(7, 6), None),
+            (journal_page(5), None),
+        ]
+
+        out = six.StringIO()
+        count = evelink_export.export(self.api, 'corp/WalletJournal', out,
+            params={'accountKey': 1000})
+
+        self.assertEqual(count, 5)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['id'] for row in lines], [9, 8, 7, 6, 5])
+        params = [c[0][1] for c in self.api.send_request.call_args_list]
+        self.assertEqual([p.get('fromID') for p in params], [None, '8', '6'])
+        self.assertEqual(set(p['rowCount'] for p in params), set(['2']))
+
+        # The pages were cached on the way.
+        self.api.send_request.reset_mock()
+        self.assertEqual(evelink_export.export(self.api, 'corp/WalletJournal', six.StringIO(),
+            params={'accountKey': 1000}), 5)
+        self.assertFalse(self.api.send_request.called)
+
+    @mock.patch.object(evelink_export, 'PAGE_SIZE', 2)
+    def test_metrics_scope_per_page(self):
+        self.api.metrics = evelink_metrics.Metrics()
+        self.api.send_request.side_effect = [
+            (journal_page(9, 8), None),
+            (journal_page(7), None),
+        ]
+
+        with mock.patch.object(self.api.metrics, 'request',
+                wraps=self.api.metrics.request) as mock_request:
+            evelink_export.export(self.api, 'corp/WalletJournal', six.StringIO())
+
+        self.assertEqual(mock_request.call_count, 2)
+        counters = self.api.metrics.snapshot()['corp/WalletJournal']['counters']
+        self.assertEqual(counters['cache_miss'], 2)
+
+    def test_csv(self):
+        result = read_fixture('corp/container_log.xml')
+        self.api.send_request.return_value = (make_response(result), None)
+
+        out = six.StringIO()
+        evelink_export.export(self.api, 'corp/ContainerLog', out, format='csv')
+
+        rows = list(csv.DictReader(six.StringIO(out.getvalue())))
+        expected = parse_container_log(self.api.xml_backend.fromstring(result))
+        self.assertEqual(len(rows), len(expected))
+        self.assertEqual(rows[0]['actor.name'], expected[0]['actor']['name'])
+        self.assertEqual(rows[2]['details.config.new'], '0')
+        self.assertEqual(rows[0]['details.config.new'], '')
+
+    def test_api_error(self):
+        self.api.send_request.return_value = (make_response(
+            '<error code="221">Illegal page request!</error>'), None)
+
+        try:
+            list(evelink_export.iter_rows(self.api, 'corp/MemberTracking'))
+        except evelink_api.APIError as e:
+            self.assertEqual(e.code, '221')
+        else:
+            self.fail("No APIError raised")
+        self.assertEqual(self.api.send_request.call_args[0][1]['extended'], '1')
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, list,
+            evelink_export.iter_rows(self.api, 'char/AssetList'))
+        self.assertRaises(ValueError, evelink_export.export,
+            self.api, 'corp/ContainerLog', six.StringIO(), format='xml')
+
+
+if __name__ == "__main__":
+    unittest.main()
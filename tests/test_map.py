@@ -1,3 +1,7 @@
+import os
+import shutil
+import tempfile
+
 import mock
 
 from tests.compat import unittest
@@ -108,5 +112,56 @@ class MapTestCase(APITestCase):
         self.assertEqual(expires, 67890)
 
 
+class SystemActivityHistoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.history = evelink_map.SystemActivityHistory()
+        self.history.add_jumps(({1: 5, 2: 3}, 3600))
+        self.history.add_jumps(({2: 4, 3: 10}, 7200))
+        self.history.add_jumps(({1: 1, 3: 2}, 10800))
+        self.history.add_kills(({
+            1: {'id': 1, 'faction': 1, 'ship': 2, 'pod': 0},
+        }, 3600))
+
+    def test_append_only(self):
+        self.assertFalse(self.history.add_jumps(({1: 100}, 7200)))
+        self.assertEqual(self.history.hours('jumps'), [3600, 7200, 10800])
+
+    def test_window_sums(self):
+        sums = self.history.window_sums('jumps')
+        totals = dict(zip(self.history.system_ids(), sums))
+        self.assertEqual(totals, {1: 6, 2: 7, 3: 12})
+
+        sums = self.history.window_sums('jumps', start=7200, end=7200)
+        totals = dict(zip(self.history.system_ids(), sums))
+        self.assertEqual(totals, {1: 0, 2: 4, 3: 10})
+
+    def test_top(self):
+        self.assertEqual(self.history.top('jumps', 2), [(3, 12), (2, 7)])
+        self.assertEqual(self.history.top('ship', 5), [(1, 2)])
+        self.assertEqual(self.history.top('pod', 5), [])
+
+    def test_series(self):
+        self.assertEqual(self.history.series('jumps', 3),
+            [(3600, 0), (7200, 10), (10800, 2)])
+        self.assertEqual(self.history.series('jumps', 99),
+            [(3600, 0), (7200, 0), (10800, 0)])
+        self.assertEqual(self.history.rolling_sums('jumps', 1, 2),
+            [(3600, 5), (7200, 5), (10800, 1)])
+
+    def test_save_and_load(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'history')
+            self.history.save(path)
+            loaded = evelink_map.SystemActivityHistory.load(path)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        self.assertEqual(loaded.top('jumps', 3), self.history.top('jumps', 3))
+        loaded.add_jumps(({4: 1}, 14400))
+        self.assertEqual(loaded.system_ids(), [1, 2, 3, 4])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,111 @@
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.metrics as evelink_metrics
+
+XML = r"""
+<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <result>
+        <rowset>
+            <row foo="bar" />
+        </rowset>
+    </result>
+    <cachedUntil>%s</cachedUntil>
+</eveapi>
+""".strip()
+
+
+class MetricsTestCase(unittest.TestCase):
+
+    def test_memory_sink(self):
+        metrics = evelink_metrics.Metrics()
+        metrics.observe('network', 0.003, path='foo/Bar')
+        metrics.observe('network', 20.0, path='foo/Bar')
+        with metrics.request('foo/Baz'):
+            metrics.incr('cache_hit')
+            metrics.incr('bytes_in', 100)
+
+        snapshot = metrics.snapshot()
+        network = snapshot['foo/Bar']['phases']['network']
+        self.assertEqual(network['count'], 2)
+        self.assertEqual(network['min'], 0.003)
+        self.assertEqual(network['max'], 20.0)
+        self.assertEqual(sum(network['buckets']), 2)
+        self.assertEqual(network['buckets'][-1], 1)
+        self.assertEqual(snapshot['foo/Baz']['counters'],
+            {'cache_hit': 1, 'bytes_in': 100})
+
+    def test_callback_sink(self):
+        callback = mock.Mock()
+        metrics = evelink_metrics.Metrics(
+            sinks=[evelink_metrics.CallbackSink(callback)])
+        metrics.observe('parse', 0.5, path='corp/AssetList')
+        metrics.incr('cache_miss', path='corp/AssetList')
+
+        self.assertEqual(callback.mock_calls, [
+                mock.call('evelink.corp.AssetList.parse', 500.0, 'ms'),
+                mock.call('evelink.corp.AssetList.cache_miss', 1, 'c'),
+            ])
+        self.assertEqual(metrics.snapshot(), None)
+
+
+class APIMetricsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = evelink_metrics.Metrics()
+        self.cache = mock.MagicMock(spec=evelink_api.APICache)
+        self.api = evelink_api.API(cache=self.cache, metrics=self.metrics)
+        self._has_requests = evelink_api._has_requests
+        evelink_api._has_requests = False
+
+    def tearDown(self):
+        evelink_api._has_requests = self._has_requests
+
+    @mock.patch('evelink.thirdparty.six.moves.urllib.request.urlopen')
+    def test_miss(self, mock_urlopen):
+        response = (XML % '2009-11-18 17:05:31').encode()
+        mock_urlopen.return_value.read.return_value = response
+        self.cache.get.return_value = None
+
+        self.api.get('foo/Bar', {'a': 1})
+
+        entry = self.metrics.snapshot()['foo/Bar']
+        self.assertEqual(entry['counters'], {
+            'cache_miss': 1,
+            'bytes_out': len('a=1'),
+            'bytes_in': len(response),
+        })
+        self.assertEqual(sorted(entry['phases']), ['cache', 'network', 'parse'])
+        self.assertEqual(entry['phases']['cache']['count'], 2)
+
+    def test_hits(self):
+        self.cache.get.return_value = (XML % '2037-01-01 00:00:00').encode()
+        self.api.get('foo/Bar')
+        self.cache.get.return_value = (XML % '2009-11-18 17:05:31').encode()
+        self.api.get('foo/Bar')
+
+        self.assertEqual(self.metrics.snapshot()['foo/Bar']['counters'],
+            {'cache_hit': 1, 'cache_stale': 1})
+
+    def test_method_phase(self):
+        self.cache.get.return_value = (XML % '2037-01-01 00:00:00').encode()
+        client = mock.Mock(api=self.api)
+
+        @evelink_api.auto_call('foo/Bar')
+        def method(self, api_result=None):
+            return api_result
+
+        method(client)
+        phases = self.metrics.snapshot()['foo/Bar']['phases']
+        self.assertEqual(phases['method']['count'], 1)
+
+    def test_invalid_metrics(self):
+        self.assertRaises(ValueError, evelink_api.API, metrics=object())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.char as evelink_char
+import evelink.metrics as evelink_metrics
+import evelink.parsepool as evelink_parsepool
+import evelink.slowcalls as evelink_slowcalls
+from evelink.parsing.wallet_journal import parse_wallet_journal
+
+XML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xml')
+
+
+def make_response(xml_path):
+    with open(os.path.join(XML_DIR, xml_path), 'rb') as f:
+        result = f.read()
+    return (b'<eveapi version="2"><currentTime>2009-10-18 17:05:31</currentTime>'
+            + result + b'<cachedUntil>2009-10-18 17:35:31</cachedUntil></eveapi>')
+
+ERROR_RESPONSE = b"""
+<eveapi version="2">
+    <currentTime>2009-10-18 17:05:31</currentTime>
+    <error code="221">Illegal page request!</error>
+    <cachedUntil>2009-10-18 17:35:31</cachedUntil>
+</eveapi>
+"""
+
+
+class Journal(object):
+
+    def __init__(self, api):
+        self.api = api
+
+    @evelink_api.auto_call('char/WalletJournal', parser=parse_wallet_journal)
+    def ref_ids(self, api_result=None):
+        return sorted(entry['id'] for entry in api_result.result)
+
+
+class ParsePoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = evelink_parsepool.ParsePool(max_workers=1, threshold=100)
+        self.api = evelink_api.API(cache=evelink_api.APICache(), parse_pool=self.pool)
+        self.api.send_request = mock.Mock(
+            return_value=(make_response('char/wallet_journal.xml'), None))
+        self.char = evelink_char.Char(1, api=self.api)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def expected_journal(self):
+        api = evelink_api.API(cache=evelink_api.APICache())
+        api.send_request = self.api.send_request
+        return evelink_char.Char(1, api=api).wallet_journal()
+
+    def test_large_response_is_parsed_in_pool(self):
+        expected = self.expected_journal()
+        with mock.patch.object(self.pool, 'parse', wraps=self.pool.parse) as mock_parse:
+            result = self.char.wallet_journal()
+
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(result, expected)
+        self.assertEqual(self.api.last_timestamps['cached_until'], expected.expires)
+
+    def test_method_runs_on_pooled_result(self):
+        with mock.patch.object(self.pool, 'parse', wraps=self.pool.parse) as mock_parse:
+            ref_ids = Journal(self.api).ref_ids()
+
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual(ref_ids, sorted(e['id'] for e in self.expected_journal().result))
+
+    def test_small_response_is_parsed_in_thread(self):
+        self.pool.threshold = 1024 * 1024
+        expected = self.expected_journal()
+        with mock.patch.object(self.pool, 'parse') as mock_parse:
+            result = self.char.wallet_journal()
+
+        self.assertFalse(mock_parse.called)
+        self.assertEqual(result, expected)
+
+    def test_slow_calls_and_metrics(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        recorder = evelink_slowcalls.SlowCallRecorder(directory, threshold=0,
+            profiler=None, save_payload=True)
+        self.api.slow_calls = recorder
+        self.api.metrics = evelink_metrics.Metrics()
+
+        self.char.wallet_journal()
+
+        response = self.api.send_request.return_value[0]
+        base = os.path.join(directory, recorder.captures()[0])
+        with open(base + '.json') as f:
+            self.assertEqual(json.load(f)['response_bytes'], len(response))
+        with open(base + '.xml', 'rb') as f:
+            self.assertEqual(f.read(), response)
+        phases = self.api.metrics.snapshot()['char/WalletJournal']['phases']
+        self.assertEqual(phases['method']['count'], 1)
+
+    def test_error_response(self):
+        self.api.send_request.return_value = (ERROR_RESPONSE, None)
+        try:
+            self.char.wallet_journal()
+        except evelink_api.APIError as e:
+            self.assertEqual(e.code, '221')
+            self.assertEqual(e.expires, 1255887331)
+        else:
+            self.fail("No APIError raised")
+
+    def test_parse_response(self):
+        parsed = evelink_parsepool.parse_response(
+            make_response('char/wallet_journal.xml'), parse_wallet_journal, 'expat')
+        self.assertEqual(parsed.error, None)
+        self.assertEqual(parsed.current_time, 1255885531)
+        self.assertEqual(len(parsed.result), 5)
+
+    def test_backend_must_be_a_name(self):
+        self.assertRaises(ValueError, evelink_parsepool.ParsePool, xml_backend=object())
+        self.assertRaises(ValueError, evelink_api.API, parse_pool=object())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import threading
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.proxy as evelink_proxy
+
+RESPONSE = b"""<?xml version='1.0' encoding='UTF-8'?>
+<eveapi version="2">
+  <currentTime>2009-10-18 17:05:31</currentTime>
+  <result><foo>1</foo></result>
+  <cachedUntil>2009-11-18 17:05:31</cachedUntil>
+</eveapi>
+"""
+
+
+class CachingProxyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api = evelink_api.API()
+        self.api.send_request = mock.MagicMock(return_value=(RESPONSE, None))
+        self.proxy = evelink_proxy.CachingProxy(self.api)
+
+    def call(self, path, query='', method='GET', body=b''):
+        statuses = []
+        environ = {
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'REQUEST_METHOD': method,
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+        }
+        result = self.proxy(environ, lambda status, headers: statuses.append(status))
+        return statuses[0], b''.join(result)
+
+    def test_passthrough(self):
+        status, body = self.call('/eve/SkillTree.xml.aspx')
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(body, RESPONSE)
+        self.assertEqual(self.api.send_request.mock_calls, [
+                mock.call('https://api.eveonline.com/eve/SkillTree.xml.aspx', {}),
+            ])
+
+    def test_cache_hit_is_not_parsed(self):
+        self.api.cache.put(self.api.request_key('char/Foo', {'a': '1'}), RESPONSE, 60)
+
+        with mock.patch.object(self.api.xml_backend, 'fromstring') as mock_parse:
+            status, body = self.call('/char/Foo.xml.aspx', method='POST', body=b'a=1')
+
+        self.assertEqual(body, RESPONSE)
+        self.assertFalse(self.api.send_request.called)
+        self.assertFalse(mock_parse.called)
+
+    def test_params_are_part_of_the_key(self):
+        self.call('/char/Foo.xml.aspx', query='keyID=1&vCode=abc')
+        self.call('/char/Foo.xml.aspx', query='keyID=2&vCode=abc')
+        self.call('/char/Foo.xml.aspx', query='vCode=abc&keyID=1')
+        self.assertEqual(self.api.send_request.mock_calls, [
+                mock.call('https://api.eveonline.com/char/Foo.xml.aspx',
+                    {'keyID': '1', 'vCode': 'abc'}),
+                mock.call('https://api.eveonline.com/char/Foo.xml.aspx',
+                    {'keyID': '2', 'vCode': 'abc'}),
+            ])
+
+    def test_single_flight(self):
+        requests = 5
+        lock = threading.Lock()
+        waiting = [0]
+        all_waiting = threading.Event()
+
+        class CountingEvent(object):
+            """Sets all_waiting once every follower waits on the event."""
+
+            def __init__(self, event):
+                self.event = event
+
+            def wait(self):
+                with lock:
+                    waiting[0] += 1
+                    if waiting[0] == requests - 1:
+                        all_waiting.set()
+                return self.event.wait()
+
+            def set(self):
+                self.event.set()
+
+        class CountingFlight(evelink_proxy._Flight):
+            def __init__(self):
+                super(CountingFlight, self).__init__()
+                self.done = CountingEvent(self.done)
+
+        def send_request(full_path, params):
+            # Only answer once every other request waits on this one.
+            all_waiting.wait(10)
+            return RESPONSE, None
+        self.api.send_request.side_effect = send_request
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            self.proxy.fetch('eve/SkillTree', {}))) for _ in range(requests)]
+        with mock.patch.object(evelink_proxy, '_Flight', CountingFlight):
+            for t in threads:
+                t.daemon = True
+                t.start()
+            for t in threads:
+                t.join(10)
+
+        self.assertTrue(all_waiting.is_set())
+        self.assertEqual(results, [RESPONSE] * requests)
+        self.assertEqual(self.api.send_request.call_count, 1)
+
+    def test_upstream_error(self):
+        self.api.send_request.return_value = (b'not xml', None)
+        status, body = self.call('/eve/SkillTree.xml.aspx')
+        self.assertEqual(status, '502 Bad Gateway')
+
+    def test_not_an_api_path(self):
+        status, body = self.call('/favicon.ico')
+        self.assertEqual(status, '404 Not Found')
+
+
+if __name__ == "__main__":
+    unittest.main()
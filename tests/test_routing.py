@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.routing as evelink_routing
+import evelink.thirdparty.eve_central as evelink_evec
+
+
+# A small graph: a highsec chain 1-2-3-4 with a lowsec shortcut 1-5-4,
+# and an unreachable system 6.
+SYSTEMS = [
+    (1, 'Alpha', 1.0, [2, 5]),
+    (2, 'Bravo', 0.9, [1, 3]),
+    (3, 'Charlie', 0.6, [2, 4]),
+    (4, 'Delta', 0.5, [3, 5]),
+    (5, 'Echo', 0.3, [1, 4]),
+    (6, 'Foxtrot', -0.5, []),
+]
+
+
+class RouterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.router = evelink_routing.Router(SYSTEMS)
+
+    def test_route(self):
+        self.assertEqual(self.router.route('Alpha', 4), [
+                {
+                    'from': {'id': 1, 'name': 'Alpha'},
+                    'to': {'id': 5, 'name': 'Echo'},
+                    'security_change': True,
+                },
+                {
+                    'from': {'id': 5, 'name': 'Echo'},
+                    'to': {'id': 4, 'name': 'Delta'},
+                    'security_change': True,
+                },
+            ])
+
+    def test_route_security_filter(self):
+        route = self.router.route(1, 'delta', min_security=0.45)
+        self.assertEqual([s['to']['id'] for s in route], [2, 3, 4])
+        self.assertFalse(any(s['security_change'] for s in route))
+
+    def test_route_to_filtered_destination(self):
+        route = self.router.route(1, 5, min_security=0.45)
+        self.assertEqual([s['to']['id'] for s in route], [5])
+
+    def test_same_system(self):
+        self.assertEqual(self.router.route(1, 1), [])
+
+    def test_unreachable(self):
+        self.assertEqual(self.router.route(1, 6), [])
+        self.assertEqual(self.router.jumps(1, 6), None)
+        self.assertEqual(self.router.route(1, 4, min_security=0.95), [])
+
+    def test_unknown_system(self):
+        self.assertRaises(ValueError, self.router.route, 1, 'Nowhere')
+        self.assertRaises(ValueError, self.router.route, 1, 99)
+
+    def test_jumps_and_systems_within(self):
+        self.assertEqual(self.router.jumps('3', 'Echo'), 2)
+        self.assertEqual(self.router.systems_within(1, 1), {1: 0, 2: 1, 5: 1})
+
+    def test_tree_cache(self):
+        self.router.max_cached_trees = 1
+        self.router.route(1, 4)
+        self.router.route(2, 4)
+        # Only the tree of the most recent source (ordinal 1) is kept.
+        self.assertEqual(list(self.router._trees), [(1, None, None)])
+
+    def test_load(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, 'jumps.tsv')
+            with open(path, 'w') as f:
+                f.write('# id\tname\tsecurity\tneighbors\n')
+                for system_id, name, security, neighbors in SYSTEMS:
+                    f.write('%d\t%s\t%s\t%s\n' % (
+                        system_id, name, security, ','.join(str(n) for n in neighbors)))
+            router = evelink_routing.Router.load(path)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        self.assertEqual(router.route(1, 4), self.router.route(1, 4))
+
+    def test_eve_central_router(self):
+        url_fetch = mock.MagicMock()
+        evec = evelink_evec.EVECentral(url_fetch_func=url_fetch, router=self.router)
+
+        self.assertEqual(evec.route('Alpha', 'Delta'), self.router.route(1, 4))
+        self.assertEqual(evec.route('Alpha', 'Foxtrot'), [])
+        self.assertFalse(url_fetch.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
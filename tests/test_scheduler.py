@@ -0,0 +1,137 @@
+import threading
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.scheduler as evelink_scheduler
+
+
+class RefreshSchedulerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.api = evelink_api.API(cache=evelink_api.APICache())
+        self.api.get = mock.Mock(side_effect=self.fake_get)
+        self.cached = False
+        self.scheduler = evelink_scheduler.RefreshScheduler(
+            api=self.api, max_workers=1, delay=1, jitter=10, retry_delay=60)
+
+    def fake_get(self, path, params=None):
+        # As if fetched at the API's currentTime of 1000, or cached since.
+        self.api._set_last_timestamps(1000, 1300, self.cached)
+        return evelink_api.APIResult(None, 1000, 1300)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_refresh_after_expiry(self, mock_time):
+        mock_time.time.return_value = 5000
+        callback = mock.Mock()
+        sub_id = self.scheduler.subscribe('char/WalletJournal', {'characterID': 1},
+            callback=callback)
+
+        self.assertEqual(self.scheduler.seconds_until_next(), 0)
+        self.assertEqual(self.scheduler.run_pending(), 1)
+        self.api.get.assert_called_once_with('char/WalletJournal', {'characterID': 1})
+
+        sub = self.scheduler.subscription(sub_id)
+        callback.assert_called_once_with(sub, sub.last_result, None)
+        self.assertEqual(sub.last_result.expires, 1300)
+        # 300 seconds of cache, plus the delay and up to 10s of jitter.
+        self.assertTrue(5301 <= sub.next_run <= 5311)
+        self.assertEqual(self.scheduler.run_pending(now=5300), 0)
+        self.assertEqual(self.scheduler.run_pending(now=5312), 1)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_refresh_of_cached_result(self, mock_time):
+        mock_time.time.return_value = 5000
+        sub_id = self.scheduler.subscribe('char/WalletJournal')
+        self.scheduler.run_pending()
+
+        # Still cached when refreshed early: the refresh comes just after
+        # cachedUntil, which is at 5300 by our clock.
+        self.cached = True
+        mock_time.time.return_value = 5200
+        self.scheduler.run_pending(now=5312)
+        sub = self.scheduler.subscription(sub_id)
+        self.assertTrue(5301 <= sub.next_run <= 5311)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_cached_result_after_restart(self, mock_time):
+        # Nothing fetched yet, so our clock is trusted.
+        self.cached = True
+        mock_time.time.return_value = 1250
+        sub_id = self.scheduler.subscribe('char/WalletJournal')
+        self.scheduler.run_pending()
+        self.assertTrue(1301 <= self.scheduler.subscription(sub_id).next_run <= 1311)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_missing_timestamps(self, mock_time):
+        mock_time.time.return_value = 5000
+        self.api.get = mock.Mock(return_value=evelink_api.APIResult(None, None, None))
+        sub_id = self.scheduler.subscribe('char/Foo')
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.subscription(sub_id).next_run, 5060)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_per_key_apis_share_the_cache(self, mock_time):
+        mock_time.time.return_value = 5000
+        self.api.slow_calls = mock.sentinel.slow_calls
+        self.api.parse_pool = mock.sentinel.parse_pool
+        del self.api.get
+        with mock.patch.object(evelink_api.API, 'get', autospec=True) as mock_get:
+            mock_get.return_value = evelink_api.APIResult(None, 1000, 1300)
+            self.scheduler.subscribe('char/Foo', api_key=(1, 'abc'))
+            self.scheduler.subscribe('char/Bar', api_key=(1, 'abc'))
+            self.scheduler.run_pending()
+
+        # One API is created for the key, and used for both endpoints.
+        apis = set(c[0][0] for c in mock_get.call_args_list)
+        self.assertEqual(len(apis), 1)
+        api = apis.pop()
+        self.assertEqual(api.api_key, (1, 'abc'))
+        for attr in ('base_url', 'cache', 'store', 'metrics', 'slow_calls',
+                     'xml_backend', 'parse_pool'):
+            self.assertTrue(getattr(api, attr) is getattr(self.api, attr))
+        self.assertEqual(self.api.api_key, None)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_callable_endpoint_and_errors(self, mock_time):
+        mock_time.time.return_value = 5000
+        endpoint = mock.Mock(side_effect=[
+            evelink_api.APIError(221, 'Illegal page request', 5000, 5600),
+            ValueError('boom'),
+        ])
+        sub_id = self.scheduler.subscribe(endpoint, {'before_id': 5})
+
+        self.scheduler.run_pending()
+        endpoint.assert_called_once_with(before_id=5)
+        sub = self.scheduler.subscription(sub_id)
+        self.assertTrue(isinstance(sub.last_error, evelink_api.APIError))
+        self.assertTrue(5601 <= sub.next_run <= 5611)
+
+        self.scheduler.run_pending(now=6000)
+        self.assertEqual(sub.next_run, 5060)
+
+    @mock.patch('evelink.scheduler.time')
+    def test_unsubscribe(self, mock_time):
+        mock_time.time.return_value = 5000
+        sub_id = self.scheduler.subscribe('char/Foo')
+        self.scheduler.unsubscribe(sub_id)
+
+        self.assertEqual(self.scheduler.run_pending(), 0)
+        self.assertEqual(self.scheduler.seconds_until_next(), None)
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_background_thread(self):
+        done = threading.Event()
+        scheduler = evelink_scheduler.RefreshScheduler(api=self.api, max_workers=2)
+        scheduler.subscribe('char/Foo', callback=lambda sub, result, error: done.set())
+
+        scheduler.start()
+        self.assertTrue(done.wait(5))
+        scheduler.stop()
+        self.api.get.assert_called_once_with('char/Foo', {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+from xml.etree import ElementTree
+
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.slowcalls as evelink_slowcalls
+
+
+class SlowCallRecorderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = os.path.join(tempfile.mkdtemp(), 'slow')
+        self.api = mock.MagicMock(spec=evelink_api.API)
+        self.api.get.return_value = evelink_api.APIResult(
+            ElementTree.fromstring('<result><foo>bar</foo></result>'), 12345, 67890)
+        self.client = mock.Mock(api=self.api)
+
+        @evelink_api.auto_call('foo/Bar', map_params={'thing_id': 'thingID'})
+        def method(self, thing_id, api_result=None):
+            return api_result.result.find('foo').text
+        self.method = method
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.directory))
+
+    def read_info(self, recorder, name):
+        with open(os.path.join(recorder.directory, name + '.json')) as f:
+            return json.load(f)
+
+    def test_capture(self):
+        recorder = evelink_slowcalls.SlowCallRecorder(self.directory,
+            threshold=0, profiler='cprofile', save_payload=True)
+        self.api.slow_calls = recorder
+
+        self.assertEqual(self.method(self.client, 1), 'bar')
+
+        captures = recorder.captures()
+        self.assertEqual(len(captures), 1)
+        info = self.read_info(recorder, captures[0])
+        self.assertEqual(info['path'], 'foo/Bar')
+        self.assertEqual(info['params'], {'thingID': 1})
+        self.assertEqual(info['response_bytes'], len(b'<result><foo>bar</foo></result>'))
+        base = os.path.join(self.directory, captures[0])
+        self.assertTrue(os.path.exists(base + '.prof'))
+        with open(base + '.xml', 'rb') as f:
+            self.assertEqual(f.read(), b'<result><foo>bar</foo></result>')
+
+    def test_sampled_profile(self):
+        recorder = evelink_slowcalls.SlowCallRecorder(self.directory, threshold=0,
+            profiler='sample')
+        self.api.slow_calls = recorder
+
+        self.method(self.client, 1)
+
+        base = os.path.join(self.directory, recorder.captures()[0])
+        self.assertTrue(os.path.exists(base + '.folded'))
+        self.assertFalse(os.path.exists(base + '.xml'))
+
+    def test_fast_calls_are_not_captured(self):
+        recorder = evelink_slowcalls.SlowCallRecorder(self.directory, threshold=60)
+        self.api.slow_calls = recorder
+
+        self.method(self.client, 1)
+        self.assertEqual(recorder.captures(), [])
+
+    def test_no_profiler_by_default(self):
+        recorder = evelink_slowcalls.SlowCallRecorder(self.directory, threshold=0)
+        self.api.slow_calls = recorder
+
+        with mock.patch.object(evelink_slowcalls, '_StackSampler') as mock_sampler:
+            self.method(self.client, 1)
+
+        self.assertFalse(mock_sampler.called)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+            [recorder.captures()[0] + '.json'])
+
+    def test_rotation(self):
+        recorder = evelink_slowcalls.SlowCallRecorder(self.directory,
+            threshold=0, profiler=None, keep=3)
+        self.api.slow_calls = recorder
+
+        for i in range(5):
+            self.method(self.client, i)
+
+        captures = recorder.captures()
+        self.assertEqual(len(captures), 3)
+        self.assertEqual([self.read_info(recorder, c)['params']['thingID'] for c in captures],
+            [2, 3, 4])
+        self.assertEqual(len(os.listdir(self.directory)), 3)
+
+    def test_invalid_profiler(self):
+        self.assertRaises(ValueError, evelink_slowcalls.SlowCallRecorder,
+            self.directory, profiler='perf')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import shutil
+import tempfile
+
+from tests.compat import unittest
+from tests.utils import APITestCase
+
+import evelink.eve as evelink_eve
+import evelink.static as evelink_static
+
+
+def make_skill(skill_id, required=None):
+    required = required or {}
+    return {
+        'id': skill_id,
+        'group_id': 1,
+        'name': 'Skill %d' % skill_id,
+        'published': True,
+        'description': 'Description %d' % skill_id,
+        'rank': 1,
+        'required_skills': dict(
+            (r, {'id': r, 'level': l, 'name': 'Skill %d' % r})
+            for r, l in required.items()),
+        'bonuses': {},
+        'attributes': {'primary': 'memory', 'secondary': 'intelligence'},
+    }
+
+
+class SkillTreeTestCase(APITestCase):
+
+    def setUp(self):
+        super(SkillTreeTestCase, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'skills.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        self.api.get.return_value = self.make_api_result("eve/skill_tree.xml")
+        eve = evelink_eve.EVE(api=self.api)
+        expected = eve.skill_tree().result
+
+        evelink_static.build_skill_tree(self.path, eve)
+        snapshot = evelink_static.SkillTree.load(self.path)
+
+        self.assertEqual(snapshot.groups(), expected)
+        self.assertEqual(snapshot.skill(3301), expected[255]['skills'][3301])
+        self.assertEqual(snapshot.prerequisites(3301), {3300: 1})
+        self.assertTrue(3300 in snapshot)
+
+    def test_load_is_lazy(self):
+        snapshot = evelink_static.SkillTree.load(os.path.join(self.tmp_dir, 'missing'))
+        self.assertRaises(IOError, snapshot.prerequisites, 1)
+
+    def test_prerequisite_closure(self):
+        groups = {
+            1: {
+                'id': 1,
+                'name': 'Group',
+                'skills': {
+                    1: make_skill(1),
+                    2: make_skill(2, {1: 3}),
+                    3: make_skill(3, {2: 1, 1: 1}),
+                    4: make_skill(4, {3: 5}),
+                },
+            },
+        }
+        snapshot = evelink_static.SkillTree.from_result(groups)
+
+        self.assertEqual(snapshot.prerequisites(1), {})
+        self.assertEqual(snapshot.prerequisites(2), {1: 3})
+        # Skill 1 is needed at level 3 through skill 2, not level 1.
+        self.assertEqual(snapshot.prerequisites(3), {1: 3, 2: 1})
+        self.assertEqual(snapshot.prerequisites(4), {1: 3, 2: 1, 3: 5})
+        self.assertEqual(snapshot.prerequisites(99), {})
+
+
+class StaticBundleTestCase(APITestCase):
+
+    fixtures = {
+        'eve/AllianceList': 'eve/alliances.xml',
+        'eve/ConquerableStationlist': 'eve/conquerable_stations.xml',
+        'eve/ErrorList': 'eve/errors.xml',
+        'eve/RefTypes': 'eve/reference_types.xml',
+        'eve/SkillTree': 'eve/skill_tree.xml',
+    }
+
+    def setUp(self):
+        super(StaticBundleTestCase, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'static.bundle')
+        self.api.get.side_effect = lambda path, params=None: self.make_api_result(
+            self.fixtures[path])
+        self.eve = evelink_eve.EVE(api=self.api)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_static_eve(self):
+        evelink_static.build_bundle(self.path, self.eve)
+        self.api.reset_mock()
+
+        static_eve = evelink_static.StaticEVE(self.path, api=self.api)
+        for name in evelink_static.BUNDLED_METHODS:
+            self.assertEqual(getattr(static_eve, name)(), getattr(self.eve, name)())
+        self.assertEqual(static_eve.bundle.skill_tree().prerequisites(3301), {3300: 1})
+        static_eve.bundle.close()
+
+    def test_unbundled_method(self):
+        evelink_static.build_bundle(self.path, self.eve, methods=('errors',))
+        self.api.reset_mock()
+
+        static_eve = evelink_static.StaticEVE(self.path, api=self.api)
+        static_eve.errors()
+        self.assertFalse(self.api.get.called)
+        static_eve.reference_types()
+        self.assertTrue(self.api.get.called)
+        static_eve.bundle.close()
+
+    def test_not_a_bundle(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'not a bundle at all')
+        self.assertRaises(ValueError, evelink_static.StaticBundle, self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
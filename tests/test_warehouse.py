@@ -0,0 +1,110 @@
+import mock
+
+from tests.compat import unittest
+from tests.utils import make_api_result
+
+import evelink.api as evelink_api
+import evelink.corp as evelink_corp
+import evelink.warehouse as evelink_warehouse
+from evelink.parsing.industry_jobs import parse_industry_jobs
+from evelink.parsing.orders import parse_market_orders
+from evelink.parsing.wallet_journal import parse_wallet_journal
+from evelink.parsing.wallet_transactions import parse_wallet_transactions
+
+
+class WarehouseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.warehouse = evelink_warehouse.Warehouse(':memory:')
+
+    def tearDown(self):
+        self.warehouse.close()
+
+    def parse(self, parser, xml_path):
+        api_result, _, _ = make_api_result(xml_path)
+        return parser(api_result)
+
+    def test_journal(self):
+        entries = self.parse(parse_wallet_journal, 'char/wallet_journal.xml')
+        self.assertEqual(self.warehouse.add_journal(entries, owner_id=1), 5)
+        # Adding the same page again updates the rows in place.
+        self.assertEqual(self.warehouse.add_journal(entries, owner_id=1), 5)
+        self.warehouse.add_journal(entries[:2], owner_id=1, account_key=1001)
+
+        self.assertEqual(self.warehouse.query('select count(*) from wallet_journal'), [(7,)])
+        self.assertEqual(self.warehouse.query(
+            'select ref_id, party_2_name, tax_receiver_id from wallet_journal'
+            ' where owner_id = 1 and account_key = 1000 order by ref_id limit 1'),
+            [(entries[0]['id'], entries[0]['party_2']['name'], 0)])
+
+        totals = self.warehouse.journal_totals(1, since=entries[0]['timestamp'])
+        amounts = [e['amount'] for e in entries] + [e['amount'] for e in entries[:2]]
+        self.assertEqual(sum(count for count, _ in totals.values()), 7)
+        self.assertAlmostEqual(sum(total for _, total in totals.values()), sum(amounts))
+        self.assertEqual(self.warehouse.journal_totals(2), {})
+
+    def test_transactions_orders_and_jobs(self):
+        transactions = self.parse(parse_wallet_transactions, 'char/wallet_transactions.xml')
+        orders = self.parse(parse_market_orders, 'char/orders.xml')
+        jobs = self.parse(parse_industry_jobs, 'char/industry_jobs.xml')
+
+        self.assertEqual(self.warehouse.add_transactions(transactions, 1), len(transactions))
+        self.assertEqual(self.warehouse.add_orders(orders, 1), len(orders))
+        self.assertEqual(self.warehouse.add_industry_jobs(jobs, 1), len(jobs))
+
+        order = list(orders.values())[0]
+        self.assertEqual(self.warehouse.query(
+            'select status, price from market_orders where order_id = ?', [order['id']]),
+            [(order['status'], order['price'])])
+        job_id, job = list(jobs.items())[0]
+        self.assertEqual(self.warehouse.query(
+            'select blueprint_type_name, system_name from industry_jobs where job_id = ?',
+            [job_id]),
+            [(job['blueprint']['type']['name'], job['system']['name'])])
+        self.assertEqual(self.warehouse.query(
+            'select transaction_for, char_id from wallet_transactions'
+            ' where transaction_id = ?', [transactions[0]['id']]),
+            [(transactions[0]['for'], None)])
+
+    def test_all_divisions(self):
+        api = mock.MagicMock(spec=evelink_api.API)
+        journal = make_api_result('char/wallet_journal.xml')
+        transactions = make_api_result('char/wallet_transactions.xml')
+        api.get.side_effect = lambda path, params: (
+            journal if path == 'corp/WalletJournal' else transactions)
+        corp = evelink_corp.Corp(api=api)
+
+        entries = corp.all_wallet_journals(accounts=[1000, 1003])
+        self.assertEqual(self.warehouse.add_journal(entries, owner_id=1), 10)
+        count = self.warehouse.add_transactions(corp.all_wallet_transactions(), owner_id=1)
+        self.assertEqual(count, 7 * len(parse_wallet_transactions(transactions[0])))
+
+        self.assertEqual(self.warehouse.query('select account_key, count(*)'
+            ' from wallet_journal group by account_key'), [(1000, 5), (1003, 5)])
+        self.assertEqual([k for k, in self.warehouse.query('select distinct account_key'
+            ' from wallet_transactions order by account_key')], list(range(1000, 1007)))
+
+    @mock.patch.object(evelink_warehouse, 'PAGE_SIZE', 2)
+    def test_one_transaction_per_page(self):
+        entries = self.parse(parse_wallet_journal, 'char/wallet_journal.xml')
+        connection = self.warehouse.connection
+        self.warehouse.connection = mock.MagicMock(wraps=connection)
+
+        self.assertEqual(self.warehouse.add_journal(iter(entries), owner_id=1), 5)
+
+        pages = [c[0][1] for c in self.warehouse.connection.executemany.call_args_list]
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(self.warehouse.connection.__enter__.call_count, 3)
+        self.warehouse.connection = connection
+
+    def test_indexes(self):
+        indexes = [name for name, in self.warehouse.query(
+            "select name from sqlite_master where type = 'index' and name not like 'sqlite_%'")]
+        self.assertTrue('wallet_journal_owner_id_timestamp' in indexes)
+        plan = self.warehouse.query('explain query plan select * from market_orders'
+            " where type_id = 34 and status = 'active'")
+        self.assertTrue('market_orders_type_id_status' in str(plan))
+
+
+if __name__ == "__main__":
+    unittest.main()
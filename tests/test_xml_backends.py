@@ -0,0 +1,107 @@
+import os
+import mock
+
+from tests.compat import unittest
+
+import evelink.api as evelink_api
+import evelink.xml_backends as evelink_xml
+from evelink.parsing import assets, kills, wallet_journal
+
+XML_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xml')
+
+
+def fixtures():
+    for dirpath, _, filenames in os.walk(XML_DIR):
+        for filename in sorted(filenames):
+            if filename.endswith('.xml'):
+                path = os.path.join(dirpath, filename)
+                with open(path, 'rb') as f:
+                    yield os.path.relpath(path, XML_DIR), f.read()
+
+
+def as_tuple(elem):
+    return (elem.tag, dict(elem.attrib), elem.text, elem.tail,
+            [as_tuple(child) for child in elem])
+
+
+class XMLBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.etree = evelink_xml.get_backend('etree')
+        self.others = [evelink_xml.get_backend(name)
+                       for name in evelink_xml.available_backends() if name != 'etree']
+
+    def test_identical_trees(self):
+        for name, data in fixtures():
+            expected = as_tuple(self.etree.fromstring(data))
+            for backend in self.others:
+                self.assertEqual(as_tuple(backend.fromstring(data)), expected,
+                    "%s differs with %s" % (name, backend.name))
+
+    def test_identical_parse_results(self):
+        cases = [
+            ('char/wallet_journal.xml', wallet_journal.parse_wallet_journal),
+            ('corp/assets.xml', assets.parse_assets),
+            ('char/kills.xml', kills.parse_kills),
+        ]
+        for path, parse in cases:
+            with open(os.path.join(XML_DIR, path), 'rb') as f:
+                data = f.read()
+            expected = parse(self.etree.fromstring(data))
+            for backend in self.others:
+                self.assertEqual(parse(backend.fromstring(data)), expected)
+
+    def test_tostring(self):
+        data = b'<result><foo a="1">bar</foo></result>'
+        for backend in [self.etree] + self.others:
+            self.assertEqual(backend.tostring(backend.fromstring(data)), data)
+
+    def test_errors(self):
+        for backend in [self.etree] + self.others:
+            self.assertRaises(backend.errors, backend.fromstring, b'<result><foo></result>')
+
+    def test_default_is_etree(self):
+        self.assertEqual(evelink_xml.get_backend().name, 'etree')
+        self.assertEqual(evelink_api.API().xml_backend.name, 'etree')
+        self.assertRaises(ValueError, evelink_xml.get_backend, 'auto')
+
+    def test_large_response_threshold(self):
+        backend = evelink_xml.LargeResponseBackend('expat', threshold=100)
+        self.assertEqual(backend.name, 'large-response:expat')
+        large = b'<result>' + b'<row/>' * 20000 + b'</result>'
+        self.assertEqual(len(backend.fromstring(large).findall('row')), 20000)
+        with mock.patch.object(backend.large, 'fromstring') as large_fromstring:
+            backend.fromstring(b'<result/>')
+            self.assertFalse(large_fromstring.called)
+            backend.fromstring(large)
+            large_fromstring.assert_called_once_with(large)
+
+    def test_unknown_backend(self):
+        self.assertRaises(ValueError, evelink_xml.get_backend, 'sax')
+        self.assertRaises(ValueError, evelink_api.API, xml_backend='sax')
+
+    @unittest.skipUnless('lxml' in evelink_xml.available_backends(), "lxml is not installed")
+    def test_lxml(self):
+        backend = evelink_xml.get_backend('lxml')
+        for name, data in fixtures():
+            tree = backend.fromstring(data.decode('utf-8'))
+            self.assertTrue(hasattr(tree, 'getroottree'), name)
+            self.assertEqual(as_tuple(tree), as_tuple(self.etree.fromstring(data)), name)
+        self.assertRaises(backend.errors, backend.fromstring, b'<!-- --><result>')
+
+        large_response = evelink_xml.LargeResponseBackend('lxml')
+        large = b'<result>' + b'<row/>' * 20000 + b'</result>'
+        self.assertTrue(hasattr(large_response.fromstring(large), 'getroottree'))
+        self.assertFalse(hasattr(large_response.fromstring(b'<result/>'), 'getroottree'))
+
+    def test_backends_implement_fromstring(self):
+        self.assertRaises(TypeError, evelink_xml.XMLBackend)
+
+    @unittest.skipIf('lxml' in evelink_xml.available_backends(), "lxml is installed")
+    def test_missing_lxml(self):
+        self.assertRaises(ImportError, evelink_xml.get_backend, 'lxml')
+        self.assertRaises(ImportError, evelink_xml.LargeResponseBackend, 'lxml')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,81 @@ import mock
 
 from tests.compat import unittest
 
+import evelink.api as evelink_api
 import evelink.thirdparty.eve_central as evelink_evec
+from evelink.thirdparty.six.moves import urllib
+
+def make_order(order_id, price, remaining, station_id, region_id=1):
+    return {
+        'id': order_id,
+        'region_id': region_id,
+        'station': {'id': station_id, 'name': 'Station %d' % station_id},
+        'security': 0.5,
+        'range': 32767,
+        'price': price,
+        'volume': {'remaining': remaining, 'minimum': 1},
+        'expires': datetime.date(2012, 9, 14),
+        'reported': datetime.datetime(2012, 9, 6, 22, 6, 36),
+    }
+
+
+def make_item_orders():
+    orders = {
+        'buy': [
+            make_order(1, 10.0, 5, 100),
+            make_order(2, 12.0, 3, 101, region_id=2),
+            make_order(3, 11.0, 10, 100),
+        ],
+        'sell': [
+            make_order(4, 13.0, 4, 100),
+            make_order(5, 15.0, 6, 101, region_id=2),
+            make_order(6, 14.0, 2, 100),
+        ],
+    }
+    return {
+        'id': 1877,
+        'name': 'Rapid Light Missile Launcher II',
+        'hours': 360,
+        'quantity_min': 1,
+        'regions': None,
+        'orders': dict((side, dict((o['id'], o) for o in side_orders))
+            for side, side_orders in orders.items()),
+    }
+
+
+class OrderBookTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.book = evelink_evec.OrderBook(make_item_orders())
+
+    def test_sorted_sides(self):
+        self.assertEqual([o['id'] for o in self.book.orders('buy')], [2, 3, 1])
+        self.assertEqual([o['id'] for o in self.book.orders('sell')], [4, 6, 5])
+        self.assertRaises(ValueError, self.book.orders, 'bid')
+
+    def test_views(self):
+        self.assertEqual([o['id'] for o in self.book.orders('buy', station_id=100)], [3, 1])
+        self.assertEqual([o['id'] for o in self.book.orders('sell', region_id=2)], [5])
+        self.assertEqual(self.book.orders('sell', station_id=999), [])
+        self.assertEqual(self.book.stations('buy'), [100, 101])
+
+    def test_best_and_spread(self):
+        self.assertEqual(self.book.best('buy')['price'], 12.0)
+        self.assertEqual(self.book.best('sell', station_id=101)['price'], 15.0)
+        self.assertEqual(self.book.spread(), 1.0)
+        self.assertEqual(self.book.spread(station_id=100), 2.0)
+        self.assertEqual(self.book.spread(region_id=3), None)
+
+    def test_depth(self):
+        self.assertEqual(self.book.depth('sell', quantity=5),
+            {'volume': 5, 'average': (4 * 13.0 + 14.0) / 5, 'worst': 14.0})
+        self.assertEqual(self.book.depth('buy', price_limit=11.0),
+            {'volume': 13, 'average': (3 * 12.0 + 10 * 11.0) / 13, 'worst': 11.0})
+        self.assertEqual(self.book.depth('sell', stations=set([101])),
+            {'volume': 6, 'average': 15.0, 'worst': 15.0})
+        self.assertEqual(self.book.depth('buy', stations=()),
+            {'volume': 0, 'average': None, 'worst': None})
+
 
 class EVECentralTestCase(unittest.TestCase):
 
@@ -13,6 +87,33 @@ class EVECentralTestCase(unittest.TestCase):
         evec = evelink_evec.EVECentral()
         self.assertTrue(isinstance(evec, evelink_evec.EVECentral))
 
+    def test_default_fetch(self):
+        mock_api = mock.MagicMock(spec=evelink_api.API)
+        mock_api.send_request.return_value = (b'<evec_api/>', mock.sentinel.robj)
+
+        evec = evelink_evec.EVECentral(api=mock_api)
+
+        self.assertEqual(evec.url_fetch('http://example.com/'), b'<evec_api/>')
+        self.assertEqual(mock_api.send_request.mock_calls, [
+                mock.call('http://example.com/', None),
+            ])
+        self.assertEqual(mock_api.maybe_raise_http_error.mock_calls, [
+                mock.call(mock.sentinel.robj),
+            ])
+
+    @mock.patch('evelink.api.API')
+    def test_api_is_created_on_first_fetch(self, mock_api_class):
+        mock_api_class.return_value.send_request.return_value = (b'<evec_api/>', None)
+
+        evec = evelink_evec.EVECentral(url_fetch_func=mock.MagicMock())
+        self.assertFalse(mock_api_class.called)
+
+        evec = evelink_evec.EVECentral()
+        self.assertFalse(mock_api_class.called)
+        evec.url_fetch('http://example.com/')
+        evec.url_fetch('http://example.com/')
+        self.assertEqual(mock_api_class.call_count, 1)
+
     @mock.patch('evelink.thirdparty.eve_central.EVECentral._parse_item_orders')
     def test_item_orders(self, mock_parse):
         url_fetch = mock.MagicMock()
@@ -155,6 +256,61 @@ class EVECentralTestCase(unittest.TestCase):
                 mock.call('%s/marketstat?typeid=34&hours=24' % evec.api_base),
             ])
 
+    def test_market_stats_cached(self):
+        xml_file = os.path.join(os.path.dirname(__file__), '..',
+            'xml', 'thirdparty', 'eve_central', 'market_stats.xml')
+        url_fetch = mock.MagicMock()
+        with open(xml_file) as f:
+            url_fetch.return_value = f.read()
+
+        evec = evelink_evec.EVECentral(url_fetch_func=url_fetch,
+            cache=evelink_api.APICache())
+
+        first = evec.market_stats([34])
+        self.assertEqual(evec.market_stats([34]), first)
+        self.assertEqual(len(url_fetch.mock_calls), 1)
+
+        # Different filters are cached separately.
+        evec.market_stats([34], hours=48)
+        self.assertEqual(len(url_fetch.mock_calls), 2)
+
+    def test_market_stats_not_cached_by_default(self):
+        xml_file = os.path.join(os.path.dirname(__file__), '..',
+            'xml', 'thirdparty', 'eve_central', 'market_stats.xml')
+        url_fetch = mock.MagicMock()
+        with open(xml_file) as f:
+            url_fetch.return_value = f.read()
+
+        evec = evelink_evec.EVECentral(url_fetch_func=url_fetch)
+
+        self.assertEqual(evec.cache, None)
+        evec.market_stats([34])
+        evec.market_stats([34])
+        self.assertEqual(len(url_fetch.mock_calls), 2)
+
+    @mock.patch('evelink.thirdparty.eve_central.EVECentral._parse_market_stats')
+    def test_market_stats_chunked(self, mock_parse):
+        url_fetch = mock.MagicMock()
+        url_fetch.side_effect = lambda url: url
+        mock_parse.side_effect = lambda url: dict(
+            (int(t), {'id': int(t)}) for t in
+            urllib.parse.parse_qs(urllib.parse.urlparse(url).query)['typeid'])
+
+        evec = evelink_evec.EVECentral(url_fetch_func=url_fetch,
+            max_url_length=100)
+        type_ids = list(range(1000, 1030))
+
+        results = evec.market_stats(type_ids + type_ids[::-1])
+
+        self.assertEqual(sorted(results), type_ids)
+        self.assertTrue(len(url_fetch.mock_calls) > 1)
+        requested = []
+        for call in url_fetch.mock_calls:
+            self.assertTrue(len(call[1][0]) <= 100)
+            requested.extend(urllib.parse.parse_qs(
+                urllib.parse.urlparse(call[1][0]).query)['typeid'])
+        self.assertEqual(sorted(int(t) for t in requested), type_ids)
+
     @mock.patch('evelink.thirdparty.eve_central.EVECentral.market_stats')
     def test_item_market_stats(self, mock_stats):
         mock_stats.return_value = {123:mock.sentinel.stats_retval}
@@ -170,6 +326,17 @@ class EVECentralTestCase(unittest.TestCase):
                 mock.call([123]),
             ])
 
+    @mock.patch('evelink.thirdparty.eve_central.EVECentral._parse_item_orders')
+    def test_order_book(self, mock_parse):
+        mock_parse.return_value = make_item_orders()
+        evec = evelink_evec.EVECentral(url_fetch_func=mock.MagicMock())
+
+        book = evec.order_book(1877, hours=24)
+
+        self.assertTrue(isinstance(book, evelink_evec.OrderBook))
+        self.assertEqual(book.best('buy')['id'], 2)
+        self.assertEqual(book.best('sell')['id'], 4)
+
     def test_route(self):
         mock_fetch = mock.MagicMock()
         mock_fetch.return_value = """
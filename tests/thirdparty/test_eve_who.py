@@ -1,8 +1,11 @@
+import json
+
 import mock
 
 from tests.compat import unittest
 
 from evelink.thirdparty.six.moves.urllib.parse import urlparse, parse_qs
+import evelink.api as evelink_api
 import evelink.thirdparty.eve_who as evelink_evewho
 
 
@@ -12,6 +15,48 @@ class EVEWhoTestCase(unittest.TestCase):
         evewho = evelink_evewho.EVEWho()
         self.assertTrue(isinstance(evewho, evelink_evewho.EVEWho))
 
+    def test_default_fetch(self):
+        mock_api = mock.MagicMock(spec=evelink_api.API)
+        mock_api.send_request.return_value = (b'{"info": null}', mock.sentinel.robj)
+
+        evewho = evelink_evewho.EVEWho(api=mock_api)
+
+        self.assertEqual(evewho.url_fetch('http://example.com/'), '{"info": null}')
+        self.assertEqual(mock_api.send_request.mock_calls, [
+                mock.call('http://example.com/', None),
+            ])
+        self.assertEqual(mock_api.maybe_raise_http_error.mock_calls, [
+                mock.call(mock.sentinel.robj),
+            ])
+
+    @mock.patch('evelink.api.API')
+    def test_api_is_created_on_first_fetch(self, mock_api_class):
+        mock_api_class.return_value.send_request.return_value = (b'{}', None)
+
+        evewho = evelink_evewho.EVEWho(url_fetch_func=mock.MagicMock())
+        self.assertFalse(mock_api_class.called)
+
+        evewho = evelink_evewho.EVEWho()
+        self.assertFalse(mock_api_class.called)
+        evewho.url_fetch('http://example.com/')
+        evewho.url_fetch('http://example.com/')
+        self.assertEqual(mock_api_class.call_count, 1)
+
+    def test_cache(self):
+        mock_fetch = mock.MagicMock(return_value='{"info": null}')
+        evewho = evelink_evewho.EVEWho(url_fetch_func=mock_fetch)
+        self.assertEqual(evewho.cache, None)
+        evewho._get(1, 'corplist')
+        evewho._get(1, 'corplist')
+        self.assertEqual(mock_fetch.call_count, 2)
+
+        mock_fetch.reset_mock()
+        evewho = evelink_evewho.EVEWho(url_fetch_func=mock_fetch,
+            cache=evelink_api.APICache())
+        evewho._get(1, 'corplist')
+        self.assertEqual(evewho._get(1, 'corplist'), {'info': None})
+        self.assertEqual(mock_fetch.call_count, 1)
+
     def test_member_list(self):
         mock_fetch = mock.MagicMock()
         mock_fetch.return_value = """
@@ -71,3 +116,61 @@ class EVEWhoTestCase(unittest.TestCase):
         expected_query_dict = parse_qs('type=corplist&id=869043665&page=0')
 
         self.assertEqual(fetch_query_dict, expected_query_dict)
+
+    def test_cache_key_is_stable(self):
+        evewho = evelink_evewho.EVEWho()
+        key = evewho._cache_key('http://evewho.com/api.php',
+            {'id': 1, 'type': 'corplist', 'page': 0})
+        self.assertEqual(key, evewho._cache_key('http://evewho.com/api.php',
+            {'page': 0, 'type': 'corplist', 'id': 1}))
+        self.assertEqual(key, 'evewho-%s' % evelink_evewho.hashlib.sha1(
+            str(['http://evewho.com/api.php',
+                [('id', 1), ('page', 0), ('type', 'corplist')]]).encode('utf-8')
+            ).hexdigest())
+
+    def test_member_list_pages(self):
+        def fetch(url):
+            page = int(parse_qs(urlparse(url).query)['page'][0])
+            return json.dumps({
+                'info': {'member_count': '450'},
+                'characters': [{
+                    'character_id': str(page * 200 + i),
+                    'corporation_id': '1',
+                    'alliance_id': '2',
+                    'name': 'Char %d' % (page * 200 + i),
+                } for i in range(200 if page < 2 else 50)],
+            })
+        mock_fetch = mock.MagicMock(side_effect=fetch)
+
+        evewho = evelink_evewho.EVEWho(url_fetch_func=mock_fetch)
+        results = evewho._member_list(2, 'allilist')
+
+        self.assertEqual([m['char_id'] for m in results], list(range(450)))
+        self.assertEqual(len(mock_fetch.mock_calls), 3)
+
+    @mock.patch('evelink.thirdparty.eve_who.time')
+    @mock.patch('evelink.thirdparty.eve_who.sleep')
+    def test_hammering_backoff(self, mock_sleep, mock_time):
+        clock = [1000.0]
+        mock_time.time.side_effect = lambda: clock[0]
+        mock_sleep.side_effect = lambda seconds: clock.__setitem__(0, clock[0] + seconds)
+        responses = [
+            "hammering a website isn't very nice ya know.... please wait 5 seconds",
+            json.dumps({'info': None, 'characters': []}),
+        ]
+        mock_fetch = mock.MagicMock(side_effect=lambda url: responses.pop(0))
+
+        evewho = evelink_evewho.EVEWho(url_fetch_func=mock_fetch)
+        self.assertEqual(evewho._member_list(1, 'corplist'), [])
+
+        self.assertEqual(len(mock_fetch.mock_calls), 2)
+        self.assertEqual(mock_sleep.mock_calls, [mock.call(5.0)])
+        self.assertEqual(evewho._backoff_until, 1005.0)
+
+    def test_hammering_without_wait(self):
+        mock_fetch = mock.MagicMock(return_value=
+            "hammering a website isn't very nice ya know.... please wait 5 seconds")
+
+        evewho = evelink_evewho.EVEWho(url_fetch_func=mock_fetch, wait=False)
+        self.assertRaises(evelink_evewho.FetchError,
+            evewho._member_list, 1, 'corplist')
@@ -20,3 +20,10 @@ class APITestCase(unittest.TestCase):
 
     def make_api_result(self, xml_path):
         return make_api_result(xml_path)
+
+    def patch_parser(self, method):
+        """Replace the parser of an auto_call method with a mock."""
+        patcher = mock.patch.dict(method._request_specs, parser=mock.Mock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return method._request_specs['parser']